@@ -5,6 +5,7 @@ Main process to setup and manage all the other working processes
 """
 
 import multiprocessing as mp
+import pathlib
 import queue
 import time
 
@@ -14,13 +15,21 @@ from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.command import command
+from modules.command import command_governor
 from modules.command import command_worker
+from modules.heartbeat import heartbeat_peer_receiver_worker
 from modules.heartbeat import heartbeat_receiver_worker
 from modules.heartbeat import heartbeat_sender_worker
+from modules.heartbeat import heartbeat_service_worker
+from modules.mavlink_router import mavlink_router
+from modules.mavlink_router import mavlink_router_worker
+from modules.telemetry import telemetry
 from modules.telemetry import telemetry_worker
-from utilities.workers import queue_proxy_wrapper
+from utilities.workers import pipeline
+from utilities.workers import queue_metrics_reporter
+from utilities.workers import worker_autoscaler
 from utilities.workers import worker_controller
-from utilities.workers import worker_manager
+from utilities.workers import worker_supervisor
 
 
 # MAVLink connection
@@ -29,17 +38,49 @@ CONNECTION_STRING = "tcp:localhost:12345"
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-# Set queue max sizes (<= 0 for infinity)
-MAX_QUEUE = 5
-
-# Set worker counts
-HEARTBEAT_SENDER_COUNT = 1
-HEARTBEAT_RECEIVER_COUNT = 1
-TELEMETRY_COUNT = 1
-COMMAND_COUNT = 1
+# Queues, stages, worker counts, and the edges between them are declared by this file
+# Each stage name is mapped to its worker function below
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("pipeline.yaml")
+
+# Telemetry time aligns attitude and position, outputting up to this many states per second
+# (<= 0 for one per new sample), None pairs the next attitude with the next position instead
+TELEMETRY_FUSION_OUTPUT_RATE = 10
+
+# Command workers are added when the telemetry queue backs up, and retired down to the count
+# of the command stage in the pipeline config
+COMMAND_MAX_COUNT = 4
+COMMAND_SCALE_UP_RATIO = 0.8  # Fraction of the telemetry queue size
+COMMAND_SCALE_DOWN_RATIO = 0.2  # Fraction of the telemetry queue size
+AUTOSCALE_COOLDOWN = 1  # Seconds between changes
+
+# Command workers send each command type at most COMMAND_MAX_SEND_RATE times per second,
+# and suppress repeats of a command still acting within COMMAND_IN_FLIGHT_TIME
+# Each command worker process has its own copy of the governor, so the limits hold per process:
+# autoscaled up to COMMAND_MAX_COUNT workers, commands can be sent COMMAND_MAX_COUNT times as often
+# Their counts of sent and suppressed commands are shared, and logged every METRICS_REPORT_PERIOD
+COMMAND_MAX_SEND_RATE = 1  # Sends per second per command type
+COMMAND_IN_FLIGHT_TIME = 2  # Seconds
+
+# Crashed workers are restarted after RESTART_BASE_DELAY, doubling for each recent crash
+RESTART_BASE_DELAY = 0.01  # Seconds
+RESTART_MAX_DELAY = 5  # Seconds
+# A stage crashing more than this many times within the window is no longer restarted
+RESTART_MAX_CRASHES = 5
+RESTART_CRASH_WINDOW = 60  # Seconds
+
+# Log throughput, depth, blocked time, and latency of each queue this often
+METRICS_REPORT_PERIOD = 5  # Seconds
+
+# Longest main waits for output before running the autoscaler and metrics report
+MAIN_WAKE_PERIOD = 0.1  # Seconds
+
+# Workers buffer logs from their loops and write them from a thread, so logs never delay work
+ASYNC_WORKER_LOGGING = True
 
 # Any other constants
 HEARTBEAT_INTERVAL = 1  # Seconds between heartbeat
+HEARTBEAT_REPORT_PERIOD = 10  # Seconds between logs of heartbeat send jitter and overruns
+HEARTBEAT_DISCONNECT_THRESHOLD = 5  # Heartbeat periods missed before the drone is disconnected
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -81,172 +122,248 @@ def main() -> int:
     # =============================================================================================
     # Create a worker controller
     controller = worker_controller.WorkerController()
+    # Command is autoscaled, so it needs its own controller to retire its workers
+    command_controller = worker_controller.WorkerController()
 
     # Create a multiprocess manager for synchronized queues
     mp_manager = mp.Manager()
 
-    # Create queues
-    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE)
-    telemetry_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE)
-    command_output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE)
+    # The pipeline config declares the queues and stages, code only maps stages to workers
+    result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
+    if not result:
+        main_logger.critical("Failed to load pipeline configuration file")
+        return -1
 
-    # Create worker properties for each worker type (what inputs it takes, how many workers)
-    # Heartbeat sender
-    result, heartbeat_sender_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_SENDER_COUNT,
-        target=heartbeat_sender_worker.heartbeat_sender_worker,
-        work_arguments=(connection, HEARTBEAT_INTERVAL, {}),
-        # Heartbeats are emitted each second
-        input_queues=[],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
+    # Create the queues, the telemetry queue sends TelemetryData in its fixed binary layout
+    # instead of pickled when it uses shared memory
+    result, worker_pipeline = pipeline.Pipeline.create(
+        mp_manager,
+        controller,
+        pipeline_config,
+        main_logger,
+        packed_types={"telemetry_queue": (telemetry.TelemetryData,)},
     )
     if not result:
-        main_logger.critical("Unable to send heartbeat sender properties")
+        main_logger.critical("Creation of Pipeline Failed")
         return -1
+    # GET PYLANCE TO STOP COMPLAINING
+    assert worker_pipeline is not None
+
+    # Main reads the output queue and autoscales command
+    output_queue = worker_pipeline.get_queue("output_queue")
+    if output_queue is None or not worker_pipeline.has_stage("command"):
+        main_logger.critical("Pipeline config needs an output_queue and a command stage")
+        return -1
+
+    # Workers receive from the router, or read the raw connection without it
+    heartbeat_receiver_connection = connection
+    heartbeat_peer_receiver_connection = connection
+    telemetry_connection = connection
+    if worker_pipeline.has_stage("mavlink_router"):
+        heartbeat_message_queue = worker_pipeline.get_queue("heartbeat_message_queue")
+        telemetry_message_queue = worker_pipeline.get_queue("telemetry_message_queue")
+        if heartbeat_message_queue is None or telemetry_message_queue is None:
+            main_logger.critical("Pipeline config has no queues for the MAVLink router")
+            return -1
+
+        heartbeat_receiver_connection = mavlink_router.RoutedConnection(heartbeat_message_queue)
+        telemetry_connection = mavlink_router.RoutedConnection(telemetry_message_queue)
+
+        # MAVLink router
+        subscribers = {
+            "heartbeat_message_queue": heartbeat_message_queue,
+            "telemetry_message_queue": telemetry_message_queue,
+        }
+        routes = {
+            "HEARTBEAT": ["heartbeat_message_queue"],
+            "ATTITUDE": ["telemetry_message_queue"],
+            "LOCAL_POSITION_NED": ["telemetry_message_queue"],
+        }
+
+        # Heartbeats of every peer, if their liveness is monitored
+        peer_heartbeat_message_queue = worker_pipeline.get_queue("peer_heartbeat_message_queue")
+        if peer_heartbeat_message_queue is not None:
+            heartbeat_peer_receiver_connection = mavlink_router.RoutedConnection(
+                peer_heartbeat_message_queue
+            )
+            subscribers["peer_heartbeat_message_queue"] = peer_heartbeat_message_queue
+            routes["HEARTBEAT"].append("peer_heartbeat_message_queue")
+
+        worker_pipeline.add_worker(
+            "mavlink_router",
+            mavlink_router_worker.mavlink_router_worker,
+            (connection, subscribers, routes),
+        )
+
+    # Map each stage to its worker function, stages the config does not declare are unused
+    # Stages without a worker are reported when the pipeline is built
+    # Heartbeat sending and receiving in one process
+    worker_pipeline.add_worker(
+        "heartbeat_service",
+        heartbeat_service_worker.heartbeat_service_worker,
+        (connection, heartbeat_receiver_connection),
+        {
+            "period": HEARTBEAT_INTERVAL,
+            "disconnect_threshold": HEARTBEAT_DISCONNECT_THRESHOLD,
+            "report_period": HEARTBEAT_REPORT_PERIOD,
+        },
+    )
 
-    # Get pylance to stop complaining
-    assert heartbeat_sender_properties is not None
+    # Heartbeat sender
+    worker_pipeline.add_worker(
+        "heartbeat_sender",
+        heartbeat_sender_worker.heartbeat_sender_worker,
+        (connection,),
+        {
+            "period": HEARTBEAT_INTERVAL,
+            "report_period": HEARTBEAT_REPORT_PERIOD,
+            "async_logging": ASYNC_WORKER_LOGGING,
+        },
+    )
 
     # Heartbeat receiver
-    result, heartbeat_receiver_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_RECEIVER_COUNT,
-        target=heartbeat_receiver_worker.heartbeat_receiver_worker,
-        work_arguments=(connection, HEARTBEAT_INTERVAL, {}),
-        input_queues=[],
-        output_queues=[heartbeat_queue],
-        controller=controller,
-        local_logger=main_logger,
+    worker_pipeline.add_worker(
+        "heartbeat_receiver",
+        heartbeat_receiver_worker.heartbeat_receiver_worker,
+        (heartbeat_receiver_connection,),
+        {
+            "period": HEARTBEAT_INTERVAL,
+            "disconnect_threshold": HEARTBEAT_DISCONNECT_THRESHOLD,
+        },
     )
-    if not result:
-        main_logger.critical("Unable to send heartbeat receiver properties")
-        return -1
 
-    # Get pylance to stop complaining
-    assert heartbeat_receiver_properties is not None
+    # Connection state of every peer on the link
+    worker_pipeline.add_worker(
+        "heartbeat_peer_receiver",
+        heartbeat_peer_receiver_worker.heartbeat_peer_receiver_worker,
+        (heartbeat_peer_receiver_connection,),
+        {
+            "period": HEARTBEAT_INTERVAL,
+            "disconnect_threshold": HEARTBEAT_DISCONNECT_THRESHOLD,
+        },
+    )
 
     # Telemetry
-    result, telemetry_properties = worker_manager.WorkerProperties.create(
-        count=TELEMETRY_COUNT,
-        target=telemetry_worker.telemetry_worker,
-        work_arguments=(connection, {}),
-        input_queues=[],
-        output_queues=[command_output_queue],
-        controller=controller,
-        local_logger=main_logger,
+    worker_pipeline.add_worker(
+        "telemetry",
+        telemetry_worker.telemetry_worker,
+        (telemetry_connection,),
+        {
+            "fusion_output_rate": TELEMETRY_FUSION_OUTPUT_RATE,
+            "async_logging": ASYNC_WORKER_LOGGING,
+        },
     )
-    if not result:
-        main_logger.critical("Unable to send telemetry properties")
-        return -1
-
-    # Get pylance to stop complaining
-    assert telemetry_properties is not None
 
     # Command
     target_coordinates = command.Position(0, 0, 0)
-    result, command_properties = worker_manager.WorkerProperties.create(
-        count=COMMAND_COUNT,
-        target=command_worker.command_worker,
-        work_arguments=(connection, target_coordinates, {}),
-        input_queues=[telemetry_queue],
-        output_queues=[command_output_queue],
-        controller=controller,
-        local_logger=main_logger,
+    result, governor = command_governor.CommandGovernor.create(
+        COMMAND_MAX_SEND_RATE, COMMAND_IN_FLIGHT_TIME
     )
     if not result:
-        main_logger.critical("Unable to send command properties")
+        main_logger.critical("Creation of Command Governor Failed")
         return -1
-
-    # Get pylance to stop complaining
-    assert command_properties is not None
+    # GET PYLANCE TO STOP COMPLAINING
+    assert governor is not None
+
+    worker_pipeline.add_worker(
+        "command",
+        command_worker.command_worker,
+        (connection, target_coordinates),
+        # Copied into each worker process, so its limits hold per worker
+        {"governor": governor, "async_logging": ASYNC_WORKER_LOGGING},
+        controller=command_controller,
+    )
 
     # Create the workers (processes) and obtain their managers
-    worker_managers: list[worker_manager.WorkerManager] = []
-
-    result, heartbeat_sender_manager = worker_manager.WorkerManager.create(
-        worker_properties=heartbeat_sender_properties,
-        local_logger=main_logger,
-    )
-    if not result:
-        main_logger.critical("Creation of Heartbeat Sender Manager Failed")
+    if not worker_pipeline.build():
+        main_logger.critical("Creation of Pipeline workers Failed")
         return -1
+
+    worker_managers = worker_pipeline.get_managers()
+    command_manager = worker_pipeline.get_manager("command")
     # GET PYLANCE TO STOP COMPLAINING
-    assert heartbeat_sender_manager is not None
-    worker_managers.append(heartbeat_sender_manager)
+    assert command_manager is not None
 
-    result, heartbeat_receiver_manager = worker_manager.WorkerManager.create(
-        worker_properties=heartbeat_receiver_properties,
+    result, command_autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+        manager=command_manager,
+        min_count=command_manager.get_worker_count(),
+        max_count=COMMAND_MAX_COUNT,
+        scale_up_ratio=COMMAND_SCALE_UP_RATIO,
+        scale_down_ratio=COMMAND_SCALE_DOWN_RATIO,
+        cooldown=AUTOSCALE_COOLDOWN,
         local_logger=main_logger,
     )
     if not result:
-        main_logger.critical("Creation of Heartbeat Receiver Manager Failed")
+        main_logger.critical("Creation of Command Autoscaler Failed")
         return -1
     # GET PYLANCE TO STOP COMPLAINING
-    assert heartbeat_receiver_manager is not None
-    worker_managers.append(heartbeat_receiver_manager)
-
-    result, telemetry_manager = worker_manager.WorkerManager.create(
-        worker_properties=telemetry_properties,
+    assert command_autoscaler is not None
+
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(
+        managers=worker_managers,
+        base_delay=RESTART_BASE_DELAY,
+        max_delay=RESTART_MAX_DELAY,
+        max_crashes=RESTART_MAX_CRASHES,
+        crash_window=RESTART_CRASH_WINDOW,
         local_logger=main_logger,
     )
     if not result:
-        main_logger.critical("Creation of Telemetry Manager Failed")
+        main_logger.critical("Creation of Worker Supervisor Failed")
         return -1
     # GET PYLANCE TO STOP COMPLAINING
-    assert telemetry_manager is not None
-    worker_managers.append(telemetry_manager)
+    assert supervisor is not None
 
-    result, command_manager = worker_manager.WorkerManager.create(
-        worker_properties=command_properties,
+    result, metrics_reporter = queue_metrics_reporter.QueueMetricsReporter.create(
+        queues=worker_pipeline.get_queues(),
+        period=METRICS_REPORT_PERIOD,
         local_logger=main_logger,
+        # Sent and suppressed commands of every command worker
+        counters={"command_governor": governor.counters},
     )
     if not result:
-        main_logger.critical("Creation of Command Manager Failed")
+        main_logger.critical("Creation of Queue Metrics Reporter Failed")
         return -1
     # GET PYLANCE TO STOP COMPLAINING
-    assert command_manager is not None
-    worker_managers.append(command_manager)
+    assert metrics_reporter is not None
 
     # Start worker processes
-    for manager in worker_managers:
-        manager.start_workers()
+    worker_pipeline.start()
+
+    # Restart workers as soon as they crash
+    supervisor.start()
 
     main_logger.info("Started")
 
-    # Main's work: read from all queues that output to main, and log any commands that we make
+    # Main's work: read the queue that outputs to main, and log any commands that we make
     start_time = time.time()
     # Continue running for 100 seconds or until the drone disconnects
-    total_queue = [heartbeat_queue, telemetry_queue, command_output_queue]
     while time.time() - start_time < 100:
-        reading = total_queue.queue.get()
-        if not total_queue.queue.empty():
-            main_logger.info(f"Active reading from queue: {reading}")
+        command_autoscaler.run()
+        metrics_reporter.run()
+        # Heartbeat states come out before any command waiting in the queue
+        try:
+            reading = output_queue.get(timeout=MAIN_WAKE_PERIOD)
+        except queue.Empty:
+            continue
+
+        main_logger.info(f"Active reading: {reading}")
         if reading == "DISCONNECTED":
             main_logger.critical("Stopping. Drone disconnected.")
             break
 
-    # Stop the processes
-    controller.request_exit()
-
-    main_logger.info("Requested exit")
-
-    # Fill and drain queues from END TO START
-    heartbeat_queue.fill_and_drain_queue()
-    telemetry_queue.fill_and_drain_queue()
-    command_output_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared")
+    # Stop restarting workers before they are asked to exit
+    supervisor.stop()
+    main_logger.info(f"Supervisor: {supervisor}")
+    main_logger.info(f"Command governor: {governor}")
 
-    # Clean up worker processes
-    for manager in worker_managers:
-        manager.join_workers()
+    # Stop the processes, poison queues from END TO START, and clean up worker processes
+    stop_times = worker_pipeline.stop()
 
-    main_logger.info("Stopped")
+    main_logger.info(f"Stopped in {max(stop_times.values(), default=0.0) * 1000:.1f} ms")
 
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
-    controller.clear_exit()
+    worker_pipeline.clear_exit()
 
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -198,9 +198,9 @@ def main() -> int:
 
     main_logger.info("Requested exit", True)
 
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
+    # Poison queues from END TO START, waking workers blocked on them
+    add_random_to_concatenator_queue.poison()
+    countup_to_add_random_queue.poison()
 
     main_logger.info("Queues cleared", True)
 
@@ -51,8 +51,12 @@ def add_random_worker(
 
         # Get an item from the queue
         # If the queue is empty, the worker process will block
-        # until the queue is non-empty
-        term = input_queue.queue.get()
+        # until the queue is non-empty or closed
+        try:
+            term = input_queue.get()
+        # Exit once the queue is closed
+        except queue_proxy_wrapper.QueueClosed:
+            break
 
         # Exit on sentinel
         if term is None:
@@ -69,5 +73,5 @@ def add_random_worker(
 
         # Put an item into the queue
         # If the queue is full, the worker process will block
-        # until the queue is non-empty
-        output_queue.queue.put(value)
+        # until the queue is non-full or closed
+        output_queue.put(value)
@@ -47,8 +47,12 @@ def concatenator_worker(
 
         # Get an item from the queue
         # If the queue is empty, the worker process will block
-        # until the queue is non-empty
-        input_data = input_queue.queue.get()
+        # until the queue is non-empty or closed
+        try:
+            input_data = input_queue.get()
+        # Exit once the queue is closed
+        except queue_proxy_wrapper.QueueClosed:
+            break
 
         # Exit on sentinel
         if input_data is None:
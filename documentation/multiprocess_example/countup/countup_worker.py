@@ -57,5 +57,5 @@ def countup_worker(
 
         # Put an item into the queue
         # If the queue is full, the worker process will block
-        # until the queue is non-empty
-        output_queue.queue.put(value)
+        # until the queue is non-full or closed
+        output_queue.put(value)
@@ -2,12 +2,17 @@
 Decision-making logic.
 """
 
+import enum
 import math
 
+import numpy as np
 from pymavlink import mavutil
 
+from . import command_governor
+from . import velocity_statistics
 from ..common.modules.logger import logger
 from ..telemetry import telemetry
+from ..telemetry import telemetry_batch
 
 
 class Position:
@@ -24,6 +29,34 @@ class Position:
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
+class Decision(enum.IntEnum):
+    """
+    Which command a state would fire.
+    """
+
+    NONE = 0
+    CHANGE_ALTITUDE = 1
+    CHANGE_YAW = 2
+
+
+class BatchDecisions:
+    """
+    Decisions for a batch of states, one array element per state.
+    """
+
+    def __init__(
+        self, altitude_delta: np.ndarray, yaw_delta: np.ndarray, decision: np.ndarray
+    ) -> None:
+        """
+        altitude_delta: Target minus current altitude in metres.
+        yaw_delta: Relative yaw to face the target in degrees, in range [-180, 180].
+        decision: Decision values.
+        """
+        self.altitude_delta = altitude_delta
+        self.yaw_delta = yaw_delta
+        self.decision = decision
+
+
 class Command:  # pylint: disable=too-many-instance-attributes
     """
     Command class to make a decision based on recieved telemetry,
@@ -31,6 +64,8 @@ class Command:  # pylint: disable=too-many-instance-attributes
     """
 
     __private_key = object()
+    __ALTITUDE_TOLERANCE = 0.5  # m
+    __YAW_TOLERANCE = 5  # degrees
 
     @classmethod
     def create(
@@ -38,12 +73,20 @@ class Command:  # pylint: disable=too-many-instance-attributes
         connection: mavutil.mavfile,
         target: Position,  # Put your own arguments here
         local_logger: logger.Logger,
+        statistics: velocity_statistics.VelocityStatistics | None = None,
+        governor: command_governor.CommandGovernor | None = None,
     ) -> "tuple[True, Command] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a Command object.
+
+        statistics: Velocity statistics to keep, defaults to the lifetime (Welford) mean.
+        governor: Suppresses repeated and too frequent commands, None sends every decision.
         """
+        if statistics is None:
+            statistics = velocity_statistics.WelfordStatistics()
+
         try:
-            command = cls(cls.__private_key, connection, target, local_logger)
+            command = cls(cls.__private_key, connection, target, local_logger, statistics, governor)
             return True, command
         except (OSError, mavutil.mavlink.MAVError) as exception:
             local_logger.error(f"Command object creation failed: {exception}")
@@ -55,6 +98,8 @@ class Command:  # pylint: disable=too-many-instance-attributes
         connection: mavutil.mavfile,
         target: Position,  # Put your own arguments here
         local_logger: logger.Logger,
+        statistics: velocity_statistics.VelocityStatistics,
+        governor: command_governor.CommandGovernor | None,
     ) -> None:
         assert key is Command.__private_key, "Use create() method"
 
@@ -62,28 +107,28 @@ class Command:  # pylint: disable=too-many-instance-attributes
         self.connection = connection
         self.target = target
         self.local_logger = local_logger
-        self.xv = 0
-        self.yv = 0
-        self.zv = 0
-        self.n_val = 0
+        self.statistics = statistics
+        self.governor = governor
 
     def run(
         self,
-        target: Position,
-        path: telemetry.TelemetryData,  # Put your own arguments here
+        target: Position,  # Put your own arguments here
+        path: telemetry.TelemetryData | telemetry_batch.TelemetryBatch,
     ) -> str:
         """
         Make a decision based on received telemetry data.
+        A batch contributes all of its samples to the statistics,
+        and the decision is made on its latest sample.
         """
-        self.n_val += 1
-        self.xv += path.x_velocity
-        self.yv += path.y_velocity
-        self.zv += path.z_velocity
-        average_velocity = (
-            self.xv / self.n_val,
-            self.yv / self.n_val,
-            self.zv / self.n_val,
-        )
+        if isinstance(path, telemetry_batch.TelemetryBatch):
+            self.statistics.update_batch(
+                np.column_stack((path.x_velocity, path.y_velocity, path.z_velocity))
+            )
+            path = path.latest()
+        else:
+            self.statistics.update((path.x_velocity, path.y_velocity, path.z_velocity))
+
+        average_velocity = self.statistics.mean()
         # Log average velocity for this trip so far
         self.local_logger.info(f"Average Velocity: {average_velocity}")
 
@@ -96,8 +141,22 @@ class Command:  # pylint: disable=too-many-instance-attributes
         # Adjust direction (yaw) using MAV_CMD_CONDITION_YAW (115). Must use relative angle to current state
         # String to return to main: "CHANGING_YAW: {degree you changed it by in range [-180, 180]}"
         # Positive angle is counter-clockwise as in a right handed system
-        if target.z - path.z > 0.5 or target.z - path.z < -0.5:
-            amount_to_move = target.z - path.z
+
+        # Same decision as run_batch(), on a batch of one
+        decisions = self.decide(
+            target,
+            np.array([path.x]),
+            np.array([path.y]),
+            np.array([path.z]),
+            np.array([path.yaw]),
+        )
+        decision = decisions.decision[0]
+        if decision == Decision.CHANGE_ALTITUDE:
+            amount_to_move = float(decisions.altitude_delta[0])
+            if self.governor is not None and not self.governor.request(
+                mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT, target.z
+            ):
+                return None
             # move the drone
             self.connection.mav.command_long_send(
                 1,
@@ -114,19 +173,14 @@ class Command:  # pylint: disable=too-many-instance-attributes
             )
             return f"CHANGE_ALTITUDE: {amount_to_move}"
 
-        target_angle = math.atan2(target.y - path.y, target.x - path.x)
-        # Angle (radians) measured counter-clockwise of x
-        angle_difference = target_angle - path.yaw
-        # Distance needed for drone to face target
-        if angle_difference > (math.pi):
-            angle_difference = -1 * ((2 * math.pi) - angle_difference)
-        elif angle_difference < -1 * (math.pi):
-            angle_difference = -1 * ((-2 * math.pi) - angle_difference)
-        # Determines the shortest value of angle_difference (<+180 or -180) instead of using values 180 to 360
-        angle_difference_deg = math.degrees(angle_difference)
-        if angle_difference_deg > 5 or angle_difference_deg < -5:
+        if decision == Decision.CHANGE_YAW:
             # Drone must be corrected if >5deg from target
+            angle_difference_deg = float(decisions.yaw_delta[0])
             direction = -1 if angle_difference_deg > 0 else 1
+            if self.governor is not None and not self.governor.request(
+                mavutil.mavlink.MAV_CMD_CONDITION_YAW, angle_difference_deg
+            ):
+                return None
             self.connection.mav.command_long_send(
                 1,
                 0,
@@ -143,6 +197,60 @@ class Command:  # pylint: disable=too-many-instance-attributes
             return f"CHANGING_YAW: {angle_difference_deg}"
         return None
 
+    def run_batch(
+        self,
+        target: Position,
+        states: telemetry_batch.TelemetryBatch,
+    ) -> BatchDecisions:
+        """
+        Evaluate the decision of run() for every state at once, for replay and simulation.
+        Does not send commands or update the velocity statistics.
+        """
+        return self.decide(target, states.x, states.y, states.z, states.yaw)
+
+    @classmethod
+    def decide(
+        cls,
+        target: Position,
+        x: np.ndarray,
+        y: np.ndarray,
+        z: np.ndarray,
+        yaw: np.ndarray,
+    ) -> BatchDecisions:
+        """
+        Decides which command each state would fire, shared by run() and run_batch().
+
+        target: Position to reach.
+        x, y, z: Positions of the states in metres.
+        yaw: Yaws of the states in radians.
+        """
+        altitude_delta = target.z - z
+        change_altitude = (altitude_delta > cls.__ALTITUDE_TOLERANCE) | (
+            altitude_delta < -cls.__ALTITUDE_TOLERANCE
+        )
+
+        # Angle (radians) measured counter-clockwise of x
+        target_angle = np.arctan2(target.y - y, target.x - x)
+        angle_difference = target_angle - yaw
+        # Shortest rotation to face the target, within [-180, 180] degrees instead of up to 360
+        angle_difference = np.where(
+            angle_difference > math.pi, -1 * ((2 * math.pi) - angle_difference), angle_difference
+        )
+        angle_difference = np.where(
+            angle_difference < -1 * math.pi,
+            -1 * ((-2 * math.pi) - angle_difference),
+            angle_difference,
+        )
+        yaw_delta = np.degrees(angle_difference)
+        change_yaw = (yaw_delta > cls.__YAW_TOLERANCE) | (yaw_delta < -cls.__YAW_TOLERANCE)
+
+        # Altitude takes priority
+        decision = np.full(len(z), Decision.NONE, dtype=np.int8)
+        decision[change_yaw] = Decision.CHANGE_YAW
+        decision[change_altitude] = Decision.CHANGE_ALTITUDE
+
+        return BatchDecisions(altitude_delta, yaw_delta, decision)
+
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -0,0 +1,152 @@
+"""
+Limits how often COMMAND_LONG messages are sent.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_metrics
+
+
+class CommandGovernor:
+    """
+    Decides whether a command should actually be sent:
+
+    * A command equivalent to one still in flight is suppressed.
+      Altitude changes are equivalent if their target altitudes are within tolerance.
+      Yaw changes are relative, so a correction in the same direction as the one in flight
+      is suppressed, not queued: nothing is sent for it later. Corrections are recomputed
+      from every telemetry sample, so the first one requested after the previous one has had
+      time to act is sent, and it is never stale.
+    * Each command type is sent at most `max_send_rate` times per second.
+
+    Only the commands in GOVERNED_COMMANDS are governed.
+
+    Limits are kept in the process: a governor passed to several worker processes is copied
+    into each, so the limits hold per process. N workers together send a command type up to
+    N * `max_send_rate` times per second, and each may send its own copy of an equivalent command.
+    The counters of sent and suppressed commands are in shared memory, so they total every copy
+    and main can report them while the workers run, see QueueMetricsReporter.
+    """
+
+    __private_key = object()
+
+    GOVERNED_COMMANDS = (
+        mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT,
+        mavutil.mavlink.MAV_CMD_CONDITION_YAW,
+    )
+
+    @classmethod
+    def create(
+        cls,
+        max_send_rate: float,
+        in_flight_time: float,
+        altitude_tolerance: float = 0.1,
+    ) -> "tuple[True, CommandGovernor] | tuple[False, None]":
+        """
+        max_send_rate: Maximum sends per second of each command type.
+        in_flight_time: Seconds a sent command is assumed to still be acting.
+        altitude_tolerance: Metres between target altitudes considered the same command.
+        """
+        if max_send_rate <= 0 or in_flight_time < 0 or altitude_tolerance < 0:
+            return False, None
+
+        return True, CommandGovernor(
+            cls.__private_key, max_send_rate, in_flight_time, altitude_tolerance
+        )
+
+    def __init__(
+        self,
+        key: object,
+        max_send_rate: float,
+        in_flight_time: float,
+        altitude_tolerance: float,
+    ) -> None:
+        assert key is CommandGovernor.__private_key, "Use create() method"
+
+        self.__min_interval = 1 / max_send_rate  # seconds
+        self.__in_flight_time = in_flight_time
+        self.__altitude_tolerance = altitude_tolerance
+
+        # Command ID to (monotonic send time, value)
+        self.__last_sent: "dict[int, tuple[float, float]]" = {}
+        # Shared by every copy
+        self.counters = queue_metrics.SharedCounters(
+            [
+                self.__get_counter_name(command_id, outcome)
+                for command_id in self.GOVERNED_COMMANDS
+                for outcome in ("sent", "suppressed")
+            ]
+        )
+
+    @staticmethod
+    def __get_counter_name(command_id: int, outcome: str) -> str:
+        """
+        Returns the name of the counter of the command, e.g. "MAV_CMD_CONDITION_YAW sent".
+        """
+        return f"{mavutil.mavlink.enums['MAV_CMD'][command_id].name} {outcome}"
+
+    def __get_counts(self, outcome: str) -> "dict[int, int]":
+        """
+        Returns the nonzero counts of the outcome by command ID, from every copy.
+        """
+        counts = self.counters.snapshot()
+        return {
+            command_id: counts[self.__get_counter_name(command_id, outcome)]
+            for command_id in self.GOVERNED_COMMANDS
+            if counts[self.__get_counter_name(command_id, outcome)] > 0
+        }
+
+    @property
+    def sent_counts(self) -> "dict[int, int]":
+        """
+        Commands sent by command ID, from every copy.
+        """
+        return self.__get_counts("sent")
+
+    @property
+    def suppressed_counts(self) -> "dict[int, int]":
+        """
+        Commands suppressed by command ID, from every copy.
+        """
+        return self.__get_counts("suppressed")
+
+    def request(self, command_id: int, value: float, now: "float | None" = None) -> bool:
+        """
+        Records a request to send a command.
+
+        command_id: MAV_CMD value, one of GOVERNED_COMMANDS.
+        value: Target altitude for MAV_CMD_CONDITION_CHANGE_ALT,
+            relative angle for MAV_CMD_CONDITION_YAW, compared for equivalence.
+        now: Monotonic time in seconds, defaults to the current time.
+
+        Returns whether the command should be sent.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        last_sent = self.__last_sent.get(command_id)
+        if last_sent is not None:
+            last_time, last_value = last_sent
+            elapsed = now - last_time
+            if elapsed < self.__min_interval or (
+                elapsed < self.__in_flight_time
+                and self.__is_equivalent(command_id, value, last_value)
+            ):
+                self.counters.increment(self.__get_counter_name(command_id, "suppressed"))
+                return False
+
+        self.__last_sent[command_id] = (now, value)
+        self.counters.increment(self.__get_counter_name(command_id, "sent"))
+        return True
+
+    def __is_equivalent(self, command_id: int, value: float, last_value: float) -> bool:
+        if command_id == mavutil.mavlink.MAV_CMD_CONDITION_YAW:
+            # Same turning direction
+            return (value > 0) == (last_value > 0)
+
+        return abs(value - last_value) <= self.__altitude_tolerance
+
+    def __str__(self) -> str:
+        return f"Commands sent: {self.sent_counts}, suppressed: {self.suppressed_counts}"
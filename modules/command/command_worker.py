@@ -4,15 +4,23 @@ Command worker to make decisions based on Telemetry Data.
 
 import os
 import pathlib
+import queue
 
 from pymavlink import mavutil
 
+from utilities.workers import async_logger
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import command
+from . import command_governor
+from . import velocity_statistics
 from ..common.modules.logger import logger
 
 
+# Longest the worker waits for input before checking for exit or retire requests
+INPUT_CHECK_PERIOD = 0.1  # seconds
+
+
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
@@ -22,6 +30,9 @@ def command_worker(
     command_input_queue: queue_proxy_wrapper.QueueProxyWrapper,
     command_output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,  # Place your own arguments here
+    statistics: velocity_statistics.VelocityStatistics | None = None,
+    governor: command_governor.CommandGovernor | None = None,
+    async_logging: bool = False,
     # Add other necessary worker arguments here
 ) -> None:
     """
@@ -33,6 +44,10 @@ def command_worker(
     controller regulates pause or exit signals
     command_input_queue receives telemetry data
     command_output_queue sends command signals
+    statistics selects the velocity statistics, None for the lifetime mean
+    governor limits repeated and frequent commands, None to send every decision
+    (each worker process gets its own copy, so the limits hold per worker)
+    async_logging buffers logs from the loop so they do not wait on file writes
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -54,8 +69,19 @@ def command_worker(
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Logs from the loop are buffered and written by a thread if async_logging
+    result, loop_logger = async_logger.AsyncLogger.create(local_logger, async_logging)
+    if not result:
+        local_logger.error("Failed to create Async Logger object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert loop_logger is not None
+
     # Instantiate class object (command.Command)
-    result, command_object = command.Command.create(connection, target, local_logger)
+    result, command_object = command.Command.create(
+        connection, target, loop_logger, statistics, governor
+    )
     if not result:
         local_logger.error("Failed to create command object")
         return
@@ -63,11 +89,20 @@ def command_worker(
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
-        if not command_input_queue.queue.empty():
-            path = command_input_queue.queue.get()
-            run_command = command_object.run(target, path)
-            if run_command:
-                command_output_queue.queue.put(run_command)
+        # Blocks instead of spinning while idle, waking to check for a retire request
+        try:
+            path = command_input_queue.get(timeout=INPUT_CHECK_PERIOD)
+        # Exit once the queue is closed
+        except queue_proxy_wrapper.QueueClosed:
+            break
+        except queue.Empty:
+            continue
+
+        run_command = command_object.run(target, path)
+        if run_command:
+            command_output_queue.put(run_command)
+
+    loop_logger.stop()
 
 
 # =================================================================================================
@@ -0,0 +1,149 @@
+"""
+Streaming statistics of 3D velocity.
+"""
+
+import abc
+
+import numpy as np
+
+
+class VelocityStatistics(abc.ABC):
+    """
+    Base class for O(1) per sample velocity statistics.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    @abc.abstractmethod
+    def update(self, velocity: "tuple[float, float, float]") -> None:
+        """
+        Adds one velocity sample in m/s.
+        """
+
+    def update_batch(self, velocities: np.ndarray) -> None:
+        """
+        Adds samples from an (N, 3) array, oldest first.
+        """
+        for velocity in velocities:
+            self.update(tuple(velocity))
+
+    @abc.abstractmethod
+    def mean(self) -> "tuple[float, float, float]":
+        """
+        Returns the mean velocity, zero before any sample.
+        """
+
+
+class WelfordStatistics(VelocityStatistics):
+    """
+    Lifetime mean and variance with Welford's algorithm,
+    which does not accumulate the error of a growing running sum.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__mean = np.zeros(3)
+        self.__squared_deviation_sum = np.zeros(3)
+
+    def update(self, velocity: "tuple[float, float, float]") -> None:
+        self.count += 1
+        sample = np.asarray(velocity, dtype=np.float64)
+        delta = sample - self.__mean
+        self.__mean += delta / self.count
+        self.__squared_deviation_sum += delta * (sample - self.__mean)
+
+    def update_batch(self, velocities: np.ndarray) -> None:
+        """
+        Merges the batch's own mean and variance (Chan et al.) instead of looping.
+        """
+        if len(velocities) == 0:
+            return
+
+        batch_count = len(velocities)
+        batch_mean = velocities.mean(axis=0)
+        batch_squared_deviation_sum = ((velocities - batch_mean) ** 2).sum(axis=0)
+
+        total = self.count + batch_count
+        delta = batch_mean - self.__mean
+        self.__mean += delta * batch_count / total
+        self.__squared_deviation_sum += (
+            batch_squared_deviation_sum + delta**2 * self.count * batch_count / total
+        )
+        self.count = total
+
+    def mean(self) -> "tuple[float, float, float]":
+        return tuple(float(value) for value in self.__mean)
+
+    def variance(self) -> "tuple[float, float, float]":
+        """
+        Returns the sample variance, zero with fewer than 2 samples.
+        """
+        if self.count < 2:
+            return 0.0, 0.0, 0.0
+
+        return tuple(float(value) for value in self.__squared_deviation_sum / (self.count - 1))
+
+
+class ExponentialStatistics(VelocityStatistics):
+    """
+    Exponentially weighted mean, recent samples count the most.
+    """
+
+    def __init__(self, smoothing: float) -> None:
+        """
+        smoothing: Weight of the newest sample, in (0, 1] .
+        """
+        assert 0 < smoothing <= 1, "Smoothing must be in (0, 1]"
+
+        super().__init__()
+        self.__smoothing = smoothing
+        self.__mean = np.zeros(3)
+
+    def update(self, velocity: "tuple[float, float, float]") -> None:
+        self.count += 1
+        sample = np.asarray(velocity, dtype=np.float64)
+        if self.count == 1:
+            self.__mean = sample
+            return
+
+        self.__mean += self.__smoothing * (sample - self.__mean)
+
+    def mean(self) -> "tuple[float, float, float]":
+        return tuple(float(value) for value in self.__mean)
+
+
+class WindowedStatistics(VelocityStatistics):
+    """
+    Mean of the last `window` samples, kept in a preallocated ring array.
+    The running sum is recomputed from the window once per lap so error cannot build up.
+    """
+
+    def __init__(self, window: int) -> None:
+        """
+        window: Number of samples in the mean, must be greater than 0 .
+        """
+        assert window > 0, "Window must be greater than 0"
+
+        super().__init__()
+        self.__samples = np.zeros((window, 3))
+        self.__sum = np.zeros(3)
+
+    def update(self, velocity: "tuple[float, float, float]") -> None:
+        window = len(self.__samples)
+        index = self.count % window
+        sample = np.asarray(velocity, dtype=np.float64)
+
+        self.__sum += sample - self.__samples[index]
+        self.__samples[index] = sample
+        self.count += 1
+
+        if self.count % window == 0:
+            self.__sum = self.__samples.sum(axis=0)
+
+    def mean(self) -> "tuple[float, float, float]":
+        filled = min(self.count, len(self.__samples))
+        if filled == 0:
+            return 0.0, 0.0, 0.0
+
+        return tuple(float(value) for value in self.__sum / filled)
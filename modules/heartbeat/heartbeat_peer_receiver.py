@@ -0,0 +1,153 @@
+"""
+Heartbeat liveness of every peer on the link, by system and component id.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from . import timer_wheel
+from ..common.modules.logger import logger
+
+
+class HeartbeatPeerReceiver:
+    """
+    Tracks whether each peer (vehicle, GCS, or component) is connected from its heartbeats,
+    keyed by (system id, component id).
+
+    A peer is CONNECTED from a heartbeat, and DISCONNECTED exactly when
+    `now - last_seen > disconnect_threshold * period`, like HeartbeatReceiver.
+    A heartbeat updates the liveness table and reschedules the disconnect deadline of the peer
+    in a timer wheel, both O(1). Expired deadlines are taken from the wheel instead of checking
+    every peer, so monitoring scales to hundreds of peers.
+    """
+
+    __private_key = object()
+    # Precision of disconnects, run() waits for a heartbeat at most a tick
+    __TICKS_PER_PERIOD = 10
+    # A revolution covers the disconnect timeout at the default threshold
+    __WHEEL_SLOT_COUNT = 64
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        local_logger: logger.Logger,
+        period: float = 1,
+        disconnect_threshold: int = 5,
+    ) -> "tuple[True, HeartbeatPeerReceiver] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a HeartbeatPeerReceiver object.
+
+        connection: Connection to receive heartbeats from.
+        local_logger: Existing logger from process.
+        period: Seconds between heartbeats of each peer.
+        disconnect_threshold: Periods without a heartbeat before a peer is disconnected.
+        """
+        if period <= 0 or disconnect_threshold <= 0:
+            local_logger.error("Heartbeat period and disconnect threshold must be positive", True)
+            return False, None
+
+        tick = period / cls.__TICKS_PER_PERIOD
+        result, wheel = timer_wheel.TimerWheel.create(
+            tick, cls.__WHEEL_SLOT_COUNT, time.monotonic()
+        )
+        if not result:
+            local_logger.error("Failed to create Timer Wheel object", True)
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert wheel is not None
+
+        return True, HeartbeatPeerReceiver(
+            cls.__private_key, connection, local_logger, period * disconnect_threshold, tick, wheel
+        )
+
+    def __init__(
+        self,
+        key: object,
+        connection: mavutil.mavfile,
+        local_logger: logger.Logger,
+        disconnect_timeout: float,
+        tick: float,
+        wheel: timer_wheel.TimerWheel,
+    ) -> None:
+        assert key is HeartbeatPeerReceiver.__private_key, "Use create() method"
+
+        self.__connection = connection
+        self.__local_logger = local_logger
+        self.__disconnect_timeout = disconnect_timeout
+        self.__tick = tick
+        self.__wheel = wheel
+
+        # Peers are kept once seen, so a reconnect is a transition
+        self.states: "dict[tuple[int, int], str]" = {}
+        self.last_seen: "dict[tuple[int, int], float]" = {}
+
+    def record_heartbeat(
+        self, peer: "tuple[int, int]", arrival_time: float
+    ) -> "tuple[tuple[int, int], str] | None":
+        """
+        Records a heartbeat of the peer.
+
+        peer: System id and component id.
+        arrival_time: Monotonic time the heartbeat arrived.
+
+        Returns the peer and its new state if it connected, otherwise None.
+        """
+        self.last_seen[peer] = arrival_time
+        self.__wheel.schedule(peer, arrival_time + self.__disconnect_timeout)
+
+        if self.states.get(peer) == "CONNECTED":
+            return None
+
+        self.states[peer] = "CONNECTED"
+        self.__local_logger.info(f"Peer {peer[0]}:{peer[1]} CONNECTED", True)
+        return peer, "CONNECTED"
+
+    def update(self, now: float) -> "list[tuple[tuple[int, int], str]]":
+        """
+        Disconnects the peers whose deadline passed.
+
+        now: Monotonic time.
+
+        Returns each disconnected peer and its new state.
+        """
+        transitions: "list[tuple[tuple[int, int], str]]" = []
+        expired_peers: "list[tuple[int, int]]" = self.__wheel.advance(now)  # type: ignore
+        for peer in expired_peers:
+            self.states[peer] = "DISCONNECTED"
+            self.__local_logger.info(
+                f"Peer {peer[0]}:{peer[1]} DISCONNECTED, "
+                f"{now - self.last_seen[peer]:.3f} s since heartbeat",
+                True,
+            )
+            transitions.append((peer, "DISCONNECTED"))
+
+        return transitions
+
+    def run(self, timeout: float) -> "list[tuple[tuple[int, int], str]]":
+        """
+        Attempt to recieve a heartbeat message, waiting up to timeout seconds
+        but no longer than a tick, so disconnects are seen within a tick.
+
+        Returns each peer whose state changed and its new state.
+        """
+        try:
+            message = self.__connection.recv_match(
+                type="HEARTBEAT", blocking=True, timeout=min(timeout, self.__tick)
+            )
+        except (OSError, mavutil.mavlink.MAVError) as exception:
+            self.__local_logger.error(f"Heartbeat Peer Receiver Error: {exception}", True)
+            message = None
+
+        now = time.monotonic()
+        transitions = []
+        if message is not None:
+            transition = self.record_heartbeat(
+                (message.get_srcSystem(), message.get_srcComponent()), now
+            )
+            if transition is not None:
+                transitions.append(transition)
+
+        return transitions + self.update(now)
@@ -0,0 +1,62 @@
+"""
+Heartbeat worker that reports when each peer on the link connects or disconnects.
+"""
+
+import os
+import pathlib
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import heartbeat_peer_receiver
+from ..common.modules.logger import logger
+
+
+def heartbeat_peer_receiver_worker(
+    connection: mavutil.mavfile,
+    report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    period: float = 1,
+    disconnect_threshold: int = 5,
+) -> None:
+    """
+    Worker process.
+
+    connection is the channel heartbeats of all peers are received from
+    report_queue receives ((system id, component id), state) when the state of a peer changes
+    controller regulates the worker state
+    period is the seconds between heartbeats of each peer
+    disconnect_threshold is the periods without a heartbeat before a peer is disconnected
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    result, receiver = heartbeat_peer_receiver.HeartbeatPeerReceiver.create(
+        connection, local_logger, period, disconnect_threshold
+    )
+    if not result:
+        local_logger.error("Failed to create Heartbeat Peer Receiver object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert receiver is not None
+
+    # Main loop: do work until exit is requested
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        for transition in receiver.run(period):
+            # Ahead of any commands sharing the queue to main
+            report_queue.put_high_priority(transition)
+
+    local_logger.info(f"Peers seen: {len(receiver.states)}", True)
@@ -2,6 +2,8 @@
 Heartbeat receiving logic.
 """
 
+import time
+
 from pymavlink import mavutil
 
 from ..common.modules.logger import logger
@@ -12,7 +14,12 @@ from ..common.modules.logger import logger
 # =================================================================================================
 class HeartbeatReceiver:
     """
-    HeartbeatReceiver class to send a heartbeat
+    HeartbeatReceiver class to track whether the drone is connected from its heartbeats.
+
+    The drone is CONNECTED from a heartbeat, and DISCONNECTED exactly when
+    `now - last_seen > disconnect_threshold * period`, where last_seen is the monotonic time
+    the latest heartbeat arrived. The disconnect latency does not depend on how often run() is
+    called, since run() waits for a heartbeat only until the disconnect deadline.
     """
 
     __private_key = object()
@@ -22,12 +29,27 @@ class HeartbeatReceiver:
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        period: float = 1,
+        disconnect_threshold: int = 5,
+        clock: "() -> float" = time.monotonic,  # type: ignore
     ) -> "tuple[True, HeartbeatReceiver] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a HeartbeatReceiver object.
+
+        connection: Connection to receive heartbeats from.
+        local_logger: Existing logger from process.
+        period: Seconds between heartbeats of the drone.
+        disconnect_threshold: Periods without a heartbeat before the drone is disconnected.
+        clock: Monotonic time in seconds, replaceable for tests.
         """
+        if period <= 0 or disconnect_threshold <= 0:
+            local_logger.error("Heartbeat period and disconnect threshold must be positive", True)
+            return False, None
+
         try:
-            heartbeat_receiver = cls(cls.__private_key, connection, local_logger)
+            heartbeat_receiver = cls(
+                cls.__private_key, connection, local_logger, period * disconnect_threshold, clock
+            )
             return True, heartbeat_receiver
         except (OSError, mavutil.mavlink.MAVError) as exception:
             local_logger.error(f"Heartbeat Receiver object creation failed: {exception}")
@@ -38,39 +60,87 @@ class HeartbeatReceiver:
         key: object,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        disconnect_timeout: float,
+        clock: "() -> float",  # type: ignore
     ) -> None:
         assert key is HeartbeatReceiver.__private_key, "Use create() method"
 
         # Do any intializiation here
         self.connection = connection
         self.local_logger = local_logger
-        self.missed_count = 0
+        self.disconnect_timeout = disconnect_timeout
+        self.clock = clock
+        self.last_seen: "float | None" = None
+        self.received_count = 0
         self.state = "DISCONNECTED"
 
+    def record_heartbeat(self, arrival_time: float) -> None:
+        """
+        Records a heartbeat.
+
+        arrival_time: Monotonic time the heartbeat arrived.
+        """
+        self.last_seen = arrival_time
+        self.received_count += 1
+
+    def get_deadline(self) -> "float | None":
+        """
+        Returns the monotonic time the drone is disconnected at without another heartbeat,
+        or None if no heartbeat was received.
+        """
+        if self.last_seen is None:
+            return None
+
+        return self.last_seen + self.disconnect_timeout
+
+    def update(self, now: float) -> "str | None":
+        """
+        Updates the state from the time since the latest heartbeat.
+
+        now: Monotonic time.
+
+        Returns the new state if it changed, otherwise None.
+        """
+        deadline = self.get_deadline()
+        if deadline is not None and now <= deadline:
+            state = "CONNECTED"
+        else:
+            state = "DISCONNECTED"
+
+        if state == self.state:
+            return None
+
+        self.state = state
+        if self.last_seen is not None:
+            self.local_logger.info(f"{state}, {now - self.last_seen:.3f} s since heartbeat", True)
+        return state
+
     def run(
         self,
-    ) -> None:
+        timeout: float,
+    ) -> "str | None":
         """
-        Attempt to recieve a heartbeat message.
-        If disconnected for over a threshold number of periods,
-        the connection is considered disconnected.
+        Attempt to recieve a heartbeat message, waiting up to timeout seconds
+        but no later than the disconnect deadline.
+
+        Returns the new state if it changed, otherwise None.
         """
+        wait = timeout
+        deadline = self.get_deadline()
+        if self.state == "CONNECTED" and deadline is not None:
+            wait = min(wait, max(deadline - self.clock(), 0.0))
+
         try:
-            signal = self.connection.recv_match(type="HEARTBEAT", blocking=False)
-            if signal is not None:
-                self.missed_count = 0
-                if self.state != "CONNECTED":
-                    self.state = "CONNECTED"
-                    self.local_logger.info("Heartbeat Received!", True)
-                self.local_logger.info("Heartbeat received", True)
-            else:
-                self.missed_count += 1
-                if self.state != "DISCONNECTED" and self.missed_count >= 5:
-                    self.state = "DISCONNECTED"
-                    self.local_logger.info("Disconnected!", True)
-            time.sleep(0.2)
+            signal = self.connection.recv_match(type="HEARTBEAT", blocking=True, timeout=wait)
         except (OSError, mavutil.mavlink.MAVError) as exception:
             self.local_logger.error(f"Heartbeat Receiver Error: {exception}", True)
+            signal = None
+
+        now = self.clock()
+        if signal is not None:
+            self.record_heartbeat(now)
+
+        return self.update(now)
 
 
 # =================================================================================================
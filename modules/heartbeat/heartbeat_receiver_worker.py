@@ -1,5 +1,5 @@
 """
-Heartbeat worker that sends heartbeats periodically.
+Heartbeat worker that reports when the drone connects or disconnects.
 """
 
 import os
@@ -20,14 +20,17 @@ def heartbeat_receiver_worker(
     connection: mavutil.mavfile,
     report_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,  # Place your own arguments here
-    # Add other necessary worker arguments here
+    period: float = 1,
+    disconnect_threshold: int = 5,
 ) -> None:
     """
     Worker process.
 
     connection is a channel between drone and heartbeat receiver worker
-    report_queue stores data in queue
+    report_queue receives the state ("CONNECTED" or "DISCONNECTED") when it changes
     controller regulates a worker's state
+    period is the seconds between heartbeats of the drone
+    disconnect_threshold is the periods without a heartbeat before the drone is disconnected
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -50,7 +53,9 @@ def heartbeat_receiver_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (heartbeat_receiver.HeartbeatReceiver)
-    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(connection, local_logger)
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        connection, local_logger, period, disconnect_threshold
+    )
     if not result:
         local_logger.error("Failed to create Heartbeat Receiver Object")
         return
@@ -60,11 +65,13 @@ def heartbeat_receiver_worker(
     assert receiver is not None
 
     # Main loop: do work.
+    # Waiting in run() instead of sleeping, so a heartbeat or the disconnect deadline wakes it
     while not controller.is_exit_requested():
         controller.check_pause()
-        receiver.run()
-        report_queue.queue.put(receiver.run())
-        time.sleep(1)
+        state = receiver.run(period)
+        if state is not None:
+            # Ahead of any commands sharing the queue to main
+            report_queue.put_high_priority(state)
 
 
 # =================================================================================================
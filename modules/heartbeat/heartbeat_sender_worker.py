@@ -4,10 +4,11 @@ Heartbeat worker that sends heartbeats periodically.
 
 import os
 import pathlib
-import time
 
 from pymavlink import mavutil
 
+from utilities.workers import async_logger
+from utilities.workers import periodic_scheduler
 from utilities.workers import worker_controller
 from . import heartbeat_sender
 from ..common.modules.logger import logger
@@ -19,6 +20,9 @@ from ..common.modules.logger import logger
 def heartbeat_sender_worker(
     connection: mavutil.mavfile,
     controller: worker_controller.WorkerController,  # Place your own arguments here
+    period: float = 1,
+    report_period: float = 0,
+    async_logging: bool = False,
     # Add other necessary worker arguments here
 ) -> None:
     """
@@ -27,6 +31,9 @@ def heartbeat_sender_worker(
     args... describe what the arguments are
     connection is an active MAVLink pipeline to communicate with drone
     controller controls worker requests
+    period is the seconds between heartbeats
+    report_period is the seconds between logs of the send timing, 0 to never log
+    async_logging buffers logs from the loop so they do not wait on file writes
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -48,19 +55,49 @@ def heartbeat_sender_worker(
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Logs from the loop are buffered and written by a thread if async_logging
+    result, loop_logger = async_logger.AsyncLogger.create(local_logger, async_logging)
+    if not result:
+        local_logger.error("Failed to create Async Logger object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert loop_logger is not None
+
     # Instantiate class object (heartbeat_sender.HeartbeatSender)
     result, heartbeat_instance = heartbeat_sender.HeartbeatSender.create(connection)
     if not result:
         local_logger.error("Failed to create Heartbeat Sender object!")
         return
 
-    # Main loop: do work.
-    while not controller.is_exit_requested():
-        controller.check_pause()
+    # Get Pylance to stop complaining
+    assert heartbeat_instance is not None
+
+    def send_heartbeat() -> None:
         heartbeat_instance.run()
-        local_logger.info("Heartbeat Sent!")
-        time.sleep(1)
+        loop_logger.info("Heartbeat Sent!")
+
+    # Other periodic MAVLink messages can be added as tasks of the same scheduler
+    result, scheduler = periodic_scheduler.PeriodicScheduler.create(local_logger)
+    if not result:
+        local_logger.error("Failed to create Periodic Scheduler object!")
+        return
+
+    # Get Pylance to stop complaining
+    assert scheduler is not None
+
+    if not scheduler.add_task("heartbeat", period, send_heartbeat):
+        return
+
+    if report_period > 0 and not scheduler.add_task(
+        "report", report_period, lambda: local_logger.info(str(scheduler), True), report_period
+    ):
+        return
 
+    # Main loop: do work on absolute deadlines, so the period does not drift
+    scheduler.run(controller)
+    loop_logger.stop()
+    local_logger.info(f"Scheduler: {scheduler}", True)
 
 
 # =================================================================================================
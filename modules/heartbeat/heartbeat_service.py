@@ -0,0 +1,186 @@
+"""
+Heartbeat sending and monitoring as coroutines of one event loop.
+"""
+
+import asyncio
+
+from pymavlink import mavutil
+
+from utilities.workers import periodic_scheduler
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import heartbeat_receiver
+from . import heartbeat_sender
+from ..common.modules.logger import logger
+
+
+class HeartbeatService:
+    """
+    Sends heartbeats and monitors the heartbeats of the drone in one process,
+    instead of a mostly sleeping process for each.
+
+    Sending runs the tasks of a PeriodicScheduler, so heartbeats go out on absolute deadlines
+    with the same jitter and overrun statistics as heartbeat_sender_worker.
+    Receiving runs a HeartbeatReceiver, so the drone is DISCONNECTED exactly when no heartbeat
+    arrived for `disconnect_threshold` periods, like heartbeat_receiver_worker.
+    Only transitions are put into the report queue, in its high priority lane if it has one.
+
+    Blocking calls (reading the connection, putting into the queue, waiting on the controller)
+    run in threads of the default executor, so they do not stall the other coroutine.
+    """
+
+    __private_key = object()
+    # Longest a receiving thread blocks, so it ends soon after the service stops
+    __RECEIVE_TIMEOUT = 0.1  # seconds
+    # Longest between checks of a retire request, which does not wake wait_for_exit()
+    __EXIT_CHECK_PERIOD = 1  # seconds
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        receive_connection: mavutil.mavfile,
+        report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        controller: worker_controller.WorkerController,
+        period: float,
+        disconnect_threshold: int,
+        local_logger: logger.Logger,
+        report_period: float = 0,
+    ) -> "tuple[True, HeartbeatService] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a HeartbeatService object.
+
+        connection: Connection to send heartbeats on.
+        receive_connection: Connection to receive heartbeats from, e.g. routed, can be the same.
+        report_queue: Queue to put the state into when it changes.
+        controller: Worker controller.
+        period: Seconds between heartbeats, in both directions.
+        disconnect_threshold: Periods without a heartbeat before the drone is disconnected.
+        local_logger: Existing logger from process.
+        report_period: Seconds between logs of the send timing, 0 to never log.
+        """
+        result, sender = heartbeat_sender.HeartbeatSender.create(connection)
+        if not result:
+            local_logger.error("Failed to create Heartbeat Sender object", True)
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert sender is not None
+
+        result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+            receive_connection, local_logger, period, disconnect_threshold
+        )
+        if not result:
+            local_logger.error("Failed to create Heartbeat Receiver object", True)
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert receiver is not None
+
+        result, scheduler = periodic_scheduler.PeriodicScheduler.create(local_logger)
+        if not result:
+            local_logger.error("Failed to create Periodic Scheduler object", True)
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert scheduler is not None
+
+        if not scheduler.add_task("heartbeat", period, sender.run):
+            return False, None
+
+        if report_period > 0 and not scheduler.add_task(
+            "report", report_period, lambda: local_logger.info(str(scheduler), True), report_period
+        ):
+            return False, None
+
+        return True, HeartbeatService(
+            cls.__private_key,
+            receiver,
+            scheduler,
+            report_queue,
+            controller,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        key: object,
+        receiver: heartbeat_receiver.HeartbeatReceiver,
+        scheduler: periodic_scheduler.PeriodicScheduler,
+        report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> None:
+        assert key is HeartbeatService.__private_key, "Use create() method"
+
+        self.__receiver = receiver
+        self.__scheduler = scheduler
+        self.__report_queue = report_queue
+        self.__controller = controller
+        self.__local_logger = local_logger
+
+    @property
+    def state(self) -> str:
+        """
+        "CONNECTED" or "DISCONNECTED".
+        """
+        return self.__receiver.state
+
+    @property
+    def sent_count(self) -> int:
+        """
+        Number of heartbeats sent.
+        """
+        return self.__scheduler.get_statistics()["heartbeat"].run_count
+
+    @property
+    def received_count(self) -> int:
+        """
+        Number of heartbeats received.
+        """
+        return self.__receiver.received_count
+
+    async def run(self) -> None:
+        """
+        Sends and monitors heartbeats until exit is requested or a coroutine fails.
+        """
+        tasks = [
+            asyncio.create_task(self.__send()),
+            asyncio.create_task(self.__receive()),
+        ]
+        exit_task = asyncio.create_task(self.__wait_for_exit())
+
+        done, _ = await asyncio.wait(tasks + [exit_task], return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks + [exit_task]:
+            task.cancel()
+
+        await asyncio.gather(*tasks, exit_task, return_exceptions=True)
+
+        for task in done:
+            if task is not exit_task and not task.cancelled() and task.exception() is not None:
+                self.__local_logger.error(f"Heartbeat service failed: {task.exception()}", True)
+
+    async def __wait_for_exit(self) -> None:
+        while not self.__controller.is_exit_requested():
+            await asyncio.to_thread(self.__controller.wait_for_exit, self.__EXIT_CHECK_PERIOD)
+
+    async def __send(self) -> None:
+        """
+        Runs the due scheduler tasks, sleeping until the next deadline in between.
+        """
+        while True:
+            await asyncio.to_thread(self.__controller.check_pause)
+            delay = self.__scheduler.run_pending()
+            await asyncio.sleep(delay)
+
+    async def __receive(self) -> None:
+        """
+        Runs the receiver, putting the state into the report queue when it changes.
+        """
+        while True:
+            state = await asyncio.to_thread(self.__receiver.run, self.__RECEIVE_TIMEOUT)
+            if state is not None:
+                await asyncio.to_thread(self.__report_queue.put_high_priority, state)
+
+    def __str__(self) -> str:
+        return str(self.__scheduler)
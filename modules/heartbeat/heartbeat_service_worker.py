@@ -0,0 +1,73 @@
+"""
+Heartbeat worker that sends heartbeats and reports the connection state from one event loop.
+"""
+
+import asyncio
+import os
+import pathlib
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import heartbeat_service
+from ..common.modules.logger import logger
+
+
+def heartbeat_service_worker(
+    connection: mavutil.mavfile,
+    receive_connection: mavutil.mavfile,
+    report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    period: float = 1,
+    disconnect_threshold: int = 5,
+    report_period: float = 0,
+) -> None:
+    """
+    Worker process.
+
+    connection is the channel to the drone that heartbeats are sent on
+    receive_connection is the channel heartbeats are received from, e.g. routed
+    report_queue receives the state ("CONNECTED" or "DISCONNECTED") when it changes
+    controller regulates the worker state
+    period is the seconds between heartbeats
+    disconnect_threshold is the periods without a heartbeat before the drone is disconnected
+    report_period is the seconds between logs of the send timing, 0 to never log
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    result, service = heartbeat_service.HeartbeatService.create(
+        connection,
+        receive_connection,
+        report_queue,
+        controller,
+        period,
+        disconnect_threshold,
+        local_logger,
+        report_period,
+    )
+    if not result:
+        local_logger.error("Failed to create Heartbeat Service object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert service is not None
+
+    # Main loop: do work until exit is requested
+    asyncio.run(service.run())
+
+    local_logger.info(
+        f"Heartbeats sent: {service.sent_count}, received: {service.received_count}", True
+    )
+    local_logger.info(f"Scheduler: {service}", True)
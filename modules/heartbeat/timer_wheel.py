@@ -0,0 +1,103 @@
+"""
+Hashed timer wheel for expiring many deadlines without scanning them all.
+"""
+
+import math
+
+
+class TimerWheel:
+    """
+    Deadlines of keys, hashed into a ring of slots by tick.
+
+    Scheduling, rescheduling, and cancelling a key is O(1).
+    Advancing visits only the slots of the ticks that passed, so expiring costs the number of
+    keys in those slots rather than the number of keys in the wheel.
+    Deadlines further than a revolution (tick * slot_count) away stay in their slot until the
+    wheel comes around to the revolution they are in.
+
+    A key expires once the time passes its deadline (deadline < now).
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(cls, tick: float, slot_count: int, now: float) -> "tuple[bool, TimerWheel | None]":
+        """
+        Creates an empty wheel.
+
+        tick: Seconds per slot, the precision of expiry.
+        slot_count: Number of slots in a revolution.
+        now: Monotonic time to start the wheel from.
+
+        Returns the TimerWheel object.
+        """
+        if tick <= 0.0 or slot_count <= 0:
+            return False, None
+
+        return True, TimerWheel(cls.__create_key, tick, slot_count, now)
+
+    def __init__(
+        self, class_private_create_key: object, tick: float, slot_count: int, now: float
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is TimerWheel.__create_key, "Use create() method"
+
+        self.__tick = tick
+        self.__slots: "list[dict[object, float]]" = [{} for _ in range(slot_count)]
+        # Slot of each key, to remove it from its old slot when rescheduled
+        self.__slot_of: "dict[object, int]" = {}
+        # First tick not yet advanced past
+        self.__next_tick = self.__get_tick(now)
+
+    def __get_tick(self, time: float) -> int:
+        return math.floor(time / self.__tick)
+
+    def schedule(self, key: object, deadline: float) -> None:
+        """
+        Sets the deadline of the key, replacing any earlier deadline.
+
+        key: Hashable key.
+        deadline: Monotonic time the key expires after.
+        """
+        self.cancel(key)
+
+        # Deadlines in ticks already advanced past go in the next slot to be visited
+        slot = max(self.__get_tick(deadline), self.__next_tick) % len(self.__slots)
+        self.__slots[slot][key] = deadline
+        self.__slot_of[key] = slot
+
+    def cancel(self, key: object) -> None:
+        """
+        Removes the key if it is scheduled.
+        """
+        slot = self.__slot_of.pop(key, None)
+        if slot is not None:
+            del self.__slots[slot][key]
+
+    def advance(self, now: float) -> "list[object]":
+        """
+        Removes and returns the keys whose deadline passed, in slot order.
+
+        now: Monotonic time, not earlier than the previous advance.
+        """
+        current_tick = self.__get_tick(now)
+        # After a revolution every slot was visited, so skip the rest
+        last_tick = min(current_tick, self.__next_tick + len(self.__slots) - 1)
+
+        expired = []
+        for tick in range(self.__next_tick, last_tick + 1):
+            slot = self.__slots[tick % len(self.__slots)]
+            for key, deadline in list(slot.items()):
+                if deadline < now:
+                    del slot[key]
+                    del self.__slot_of[key]
+                    expired.append(key)
+
+        # The current tick may still have deadlines in the rest of it
+        self.__next_tick = max(current_tick, self.__next_tick)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.__slot_of)
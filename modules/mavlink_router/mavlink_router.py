@@ -0,0 +1,200 @@
+"""
+Routes received MAVLink messages to subscribers by message type.
+"""
+
+import queue
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from ..common.modules.logger import logger
+
+
+class MavlinkRouter:
+    """
+    Owns the receiving side of the connection, parses each message once
+    and puts it into the queues subscribed to its type.
+    """
+
+    __private_key = object()
+    __RECEIVE_TIMEOUT = 0.1  # seconds
+    __DROP_LOG_PERIOD = 1.0  # seconds
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        subscribers: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        routes: "dict[str, list[str]]",
+        local_logger: logger.Logger,
+    ) -> "tuple[True, MavlinkRouter] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a MavlinkRouter object.
+
+        connection: Connection to receive from.
+        subscribers: Subscriber name to the queue its messages are put into.
+        routes: Message type (e.g. "HEARTBEAT") to the names of the subscribers it is sent to.
+        local_logger: Existing logger from process.
+        """
+        if len(routes) == 0:
+            local_logger.error("MAVLink router requires at least one route", True)
+            return False, None
+
+        for message_type, names in routes.items():
+            for name in names:
+                if name not in subscribers:
+                    local_logger.error(
+                        f"MAVLink router route {message_type} has unknown subscriber: {name}",
+                        True,
+                    )
+                    return False, None
+
+        return True, MavlinkRouter(cls.__private_key, connection, subscribers, routes, local_logger)
+
+    def __init__(
+        self,
+        key: object,
+        connection: mavutil.mavfile,
+        subscribers: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        routes: "dict[str, list[str]]",
+        local_logger: logger.Logger,
+    ) -> None:
+        assert key is MavlinkRouter.__private_key, "Use create() method"
+
+        self.__connection = connection
+        self.__routes = {
+            message_type: [(name, subscribers[name]) for name in names]
+            for message_type, names in routes.items()
+        }
+        self.__message_types = set(routes.keys())
+        self.__local_logger = local_logger
+        self.dropped_counts: "dict[str, int]" = {name: 0 for name in subscribers}
+        self.__logged_dropped_counts = dict(self.dropped_counts)
+        self.__next_drop_log_time = 0.0
+
+    def run(self) -> "str | None":
+        """
+        Receives one message and routes it.
+        Each subscriber queue applies its overflow policy without waiting, so a slow consumer
+        does not stall the others. A full "block" queue drops the message for that subscriber,
+        which is counted in `dropped_counts`; the other policies count in the queue metrics.
+
+        Returns the type of the routed message, or None if nothing was routed.
+        """
+        try:
+            message = self.__connection.recv_match(
+                type=self.__message_types,
+                blocking=True,
+                timeout=self.__RECEIVE_TIMEOUT,
+            )
+        except (OSError, mavutil.mavlink.MAVError) as exception:
+            self.__local_logger.error(f"MAVLink router receive failed: {exception}", True)
+            return None
+
+        if message is None:
+            return None
+
+        message_type = message.get_type()
+        for name, subscriber_queue in self.__routes[message_type]:
+            try:
+                subscriber_queue.put(message, block=False)
+            except queue.Full:
+                self.dropped_counts[name] += 1
+                self.__log_dropped()
+
+        return message_type
+
+    def __log_dropped(self) -> None:
+        """
+        Logs the messages dropped per subscriber since the last log, at most once per period.
+        """
+        now = time.monotonic()
+        if now < self.__next_drop_log_time:
+            return
+
+        self.__next_drop_log_time = now + self.__DROP_LOG_PERIOD
+        summary = ", ".join(
+            f"{name}: {count - self.__logged_dropped_counts[name]} (total {count})"
+            for name, count in self.dropped_counts.items()
+            if count > self.__logged_dropped_counts[name]
+        )
+        self.__logged_dropped_counts = dict(self.dropped_counts)
+        self.__local_logger.warning(f"MAVLink router dropped messages for {summary}", True)
+
+
+class RoutedConnection:
+    """
+    Receive-only stand-in for mavutil.mavfile that reads messages routed by MavlinkRouter.
+    Provides the `recv_match()` and `select()` subset used by Telemetry and HeartbeatReceiver.
+
+    `closed` is set once the input queue is closed and empty, so readers can stop
+    instead of waiting on a queue that will not receive anything.
+    """
+
+    def __init__(self, input_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        input_queue: Queue the router puts this subscriber's messages into.
+        """
+        self.__input_queue = input_queue
+        self.__pending = None
+        self.closed = False
+
+    def select(self, timeout: float) -> bool:
+        """
+        Waits for up to timeout seconds for a message.
+
+        Returns whether a message is available.
+        """
+        if self.__pending is not None:
+            return True
+
+        try:
+            self.__pending = self.__input_queue.get(timeout=max(timeout, 0.0))
+        except queue_proxy_wrapper.QueueClosed:
+            self.closed = True
+            return False
+        except queue.Empty:
+            return False
+
+        return self.__pending is not None
+
+    def recv_match(
+        self,
+        type: "str | list[str] | set[str] | None" = None,  # pylint: disable=redefined-builtin
+        blocking: bool = False,
+        timeout: "float | None" = None,
+    ) -> "object | None":
+        """
+        Returns the next routed message matching type, same arguments as mavfile.recv_match().
+        Messages of other types are discarded.
+        """
+        if isinstance(type, str):
+            type = [type]
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            message = self.__pending
+            self.__pending = None
+            if message is None:
+                try:
+                    if not blocking:
+                        message = self.__input_queue.get_nowait()
+                    elif deadline is None:
+                        message = self.__input_queue.get()
+                    else:
+                        message = self.__input_queue.get(
+                            timeout=max(deadline - time.monotonic(), 0.0)
+                        )
+                except queue_proxy_wrapper.QueueClosed:
+                    self.closed = True
+                    return None
+                except queue.Empty:
+                    return None
+
+            # Sentinel from fill_and_drain_queue()
+            if message is None:
+                return None
+
+            if type is None or message.get_type() in type:
+                return message
@@ -0,0 +1,58 @@
+"""
+MAVLink router worker that owns the connection and dispatches messages by type.
+"""
+
+import os
+import pathlib
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import mavlink_router
+from ..common.modules.logger import logger
+
+
+def mavlink_router_worker(
+    connection: mavutil.mavfile,
+    subscribers: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+    routes: "dict[str, list[str]]",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process.
+
+    connection is the channel to the drone, only this worker receives from it
+    subscribers maps a subscriber name to the queue its messages are put into
+    routes maps a message type (e.g. "ATTITUDE") to the names of the subscribers it is sent to
+    controller regulates the worker state
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, subscribers, routes, local_logger
+    )
+    if not result:
+        local_logger.error("Failed to create MAVLink router object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert router is not None
+
+    # Main loop: do work.
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        router.run()
+
+    local_logger.info(f"Messages dropped by subscriber: {router.dropped_counts}", True)
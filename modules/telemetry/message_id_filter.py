@@ -0,0 +1,66 @@
+"""
+Skipping unwanted MAVLink messages before they are decoded.
+"""
+
+from pymavlink import mavutil
+
+
+class MessageIdFilter:
+    """
+    Makes a MAVLink parser skip frames whose message ID is not wanted, by peeking at the ID
+    in the frame header before the payload is unpacked and the message object is built.
+    Skipped frames are not checked (CRC, signature) and never reach the connection's
+    message bookkeeping, so only install it on a connection whose other messages are unused.
+
+    A skipped frame does not end parsing: the parser continues with the next buffered frame,
+    so a wanted message behind skipped ones in the same read is returned at once.
+    """
+
+    def __init__(self, mav: mavutil.mavlink.MAVLink, message_ids: "set[int]") -> None:
+        """
+        mav: Parser of the connection, e.g. `mavfile.mav`, wrapped in place.
+        message_ids: IDs of the messages to decode.
+        """
+        self.__message_ids = frozenset(message_ids)
+        self.__decode = mav.decode
+        self.__parse_char = mav.parse_char
+        self.__skipped = False
+        self.skipped_count = 0
+
+        mav.decode = self.decode
+        mav.parse_char = self.parse_char
+
+    @staticmethod
+    def get_message_id(frame: "bytes | bytearray") -> int:
+        """
+        Returns the message ID from the header of a complete MAVLink 1 or 2 frame.
+        """
+        if frame[0] == mavutil.mavlink.PROTOCOL_MARKER_V1:
+            return frame[5]
+
+        return frame[7] | frame[8] << 8 | frame[9] << 16
+
+    def decode(self, frame: bytearray) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Decodes a complete frame, or returns None if its message is not wanted.
+        """
+        if self.get_message_id(frame) not in self.__message_ids:
+            self.__skipped = True
+            self.skipped_count += 1
+            return None
+
+        return self.__decode(frame)
+
+    def parse_char(self, data: bytes) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Adds received bytes and returns the next wanted message,
+        or None once more data is needed.
+        """
+        while True:
+            self.__skipped = False
+            message = self.__parse_char(data)
+            if message is not None or not self.__skipped:
+                return message
+
+            # Parse what is left in the buffer
+            data = b""
@@ -2,18 +2,43 @@
 Telemetry gathering logic.
 """
 
+import struct
 import time
 
 from pymavlink import mavutil
 
+from . import message_id_filter
+from . import telemetry_fusion
 from ..common.modules.logger import logger
 
 
 class TelemetryData:  # pylint: disable=too-many-instance-attributes
     """
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
+
+    Has a fixed-layout binary encoding for queue transport: a presence bitmask (bit i set
+    if field i is not None), the int64 timestamp, then 12 float64 fields, little endian.
     """
 
+    __slots__ = (
+        "time_since_boot",
+        "x",
+        "y",
+        "z",
+        "x_velocity",
+        "y_velocity",
+        "z_velocity",
+        "roll",
+        "pitch",
+        "yaw",
+        "roll_speed",
+        "pitch_speed",
+        "yaw_speed",
+    )
+
+    __PACKED_FORMAT = struct.Struct("<Hq12d")
+    PACKED_SIZE = __PACKED_FORMAT.size  # bytes
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -44,6 +69,54 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         self.pitch_speed = pitch_speed
         self.yaw_speed = yaw_speed
 
+    def to_bytes(self) -> bytes:
+        """
+        Encodes into the fixed binary layout, None fields are stored as 0 with the bit cleared.
+        """
+        return self.__PACKED_FORMAT.pack(*self.__packed_values())
+
+    def pack_into(self, buffer: "bytearray | memoryview", offset: int = 0) -> None:
+        """
+        Encodes directly into a writable buffer, such as a shared memory slot.
+
+        buffer: Writable buffer with at least PACKED_SIZE bytes after offset.
+        offset: Position in bytes to start writing.
+        """
+        self.__PACKED_FORMAT.pack_into(buffer, offset, *self.__packed_values())
+
+    @classmethod
+    def from_buffer(
+        cls, buffer: "bytes | bytearray | memoryview", offset: int = 0
+    ) -> "TelemetryData":
+        """
+        Decodes from the fixed binary layout.
+        Reads the values straight out of the buffer (e.g. a memoryview of shared memory)
+        without copying it first.
+
+        buffer: Buffer with at least PACKED_SIZE bytes after offset.
+        offset: Position in bytes to start reading.
+
+        Returns the decoded TelemetryData.
+        """
+        presence, *values = cls.__PACKED_FORMAT.unpack_from(buffer, offset)
+
+        data = cls.__new__(cls)
+        for i, name in enumerate(cls.__slots__):
+            setattr(data, name, values[i] if presence & (1 << i) else None)
+
+        return data
+
+    def __packed_values(self) -> "list[int | float]":
+        presence = 0
+        values = []
+        for i, name in enumerate(self.__slots__):
+            value = getattr(self, name)
+            if value is not None:
+                presence |= 1 << i
+            values.append(value if value is not None else 0)
+
+        return [presence] + values
+
     def __str__(self) -> str:
         return f"""{{
             time_since_boot: {self.time_since_boot},
@@ -71,18 +144,30 @@ class Telemetry:
     """
 
     __private_key = object()
+    __RECEIVE_TIMEOUT = 1  # seconds
+    # Only these are returned by the receive call, everything else is discarded while parsing
+    __MESSAGE_TYPES = {"ATTITUDE", "LOCAL_POSITION_NED"}
+    # Kept in sync with __MESSAGE_TYPES, a direct connection skips other IDs before decoding
+    __MESSAGE_IDS = {
+        mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE,  # 30
+        mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED,  # 32
+    }
 
     @classmethod
     def create(
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        fusion_output_rate: "float | None" = None,
     ) -> "tuple[True, Telemetry] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a Telemetry object.
+
+        fusion_output_rate: None pairs the next ATTITUDE with the next LOCAL_POSITION_NED,
+        otherwise time aligns the streams and outputs up to this many per second (<= 0 for every sample).
         """
         try:
-            telemetry = cls(cls.__private_key, connection, local_logger)
+            telemetry = cls(cls.__private_key, connection, local_logger, fusion_output_rate)
             return True, telemetry
         except (OSError, mavutil.mavlink.MAVError) as exception:
             local_logger.error(f"Telemetry object creation failed: {exception}")
@@ -93,6 +178,7 @@ class Telemetry:
         key: object,
         connection: mavutil.mavfile,  # Put your own arguments here
         local_logger: logger.Logger,
+        fusion_output_rate: "float | None",
     ) -> None:
         assert key is Telemetry.__private_key, "Use create() method"
 
@@ -100,26 +186,93 @@ class Telemetry:
         self.connection = connection
         self.local_logger = local_logger
 
+        # Message ID to handler, avoids repeated get_type() string comparisons
+        self.__handlers = {
+            mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: self.__handle_attitude,
+            mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED: self.__handle_local_position,
+        }
+        # A direct connection (mavfile) parses here, a routed one receives decoded messages
+        self.__message_filter = None
+        if hasattr(connection, "mav"):
+            self.__message_filter = message_id_filter.MessageIdFilter(
+                connection.mav, self.__MESSAGE_IDS
+            )
+        self.__attitude = None
+        self.__local_position = None
+        self.__fusion = None
+        if fusion_output_rate is not None:
+            self.__fusion = telemetry_fusion.TelemetryFusion(fusion_output_rate)
+
+    def __handle_attitude(self, message: "mavutil.mavlink.MAVLink_attitude_message") -> None:
+        self.__attitude = message
+        if self.__fusion is not None:
+            self.__fusion.add_attitude(message)
+
+    def __handle_local_position(
+        self, message: "mavutil.mavlink.MAVLink_local_position_ned_message"
+    ) -> None:
+        self.__local_position = message
+        if self.__fusion is not None:
+            self.__fusion.add_local_position(message)
+
+    def __get_skipped_count(self) -> int:
+        if self.__message_filter is None:
+            return 0
+
+        return self.__message_filter.skipped_count
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the connection was closed, e.g. a routed connection at shutdown.
+        """
+        return getattr(self.connection, "closed", False)
+
     def run(
         self,
     ) -> TelemetryData:
         """
         Receive LOCAL_POSITION_NED and ATTITUDE messages from the drone,
         combining them together to form a single TelemetryData object.
+        With fusion, returns as soon as a time aligned output is available instead.
+        Returns None at once if the connection is closed.
+
+        Sleeps on the connection's file descriptor between messages instead of polling,
+        and gives up once the deadline has passed.
         """
-        start_time = time.time()
-        local_position = None
-        attitude = None
-        while time.time() - start_time < 1:
-            reading = self.connection.recv_match(blocking=False)
-            if reading:
-                self.local_logger.info(f"Received Telemetry Data: {reading.get_type()}")
-            # Read MAVLink message LOCAL_POSITION_NED (32)
-            if reading and reading.get_type() == "LOCAL_POSITION_NED":
-                local_position = reading
-            # Read MAVLink message ATTITUDE (30)
-            elif reading and reading.get_type() == "ATTITUDE":
-                attitude = reading
+        deadline = time.monotonic() + self.__RECEIVE_TIMEOUT
+        self.__attitude = None
+        self.__local_position = None
+        remaining = float(self.__RECEIVE_TIMEOUT)
+        while remaining > 0:
+            skipped_count = self.__get_skipped_count()
+            # Parses any buffered message first, only returns None when more data is needed
+            reading = self.connection.recv_match(type=self.__MESSAGE_TYPES, blocking=False)
+            if reading is None:
+                if self.is_closed():
+                    return None
+
+                # A UDP connection reads one datagram per call, more may be waiting behind
+                # a skipped message
+                if self.__get_skipped_count() != skipped_count:
+                    remaining = deadline - time.monotonic()
+                    continue
+
+                # Wait for the socket to become readable (mavfile falls back to a sleep without one)
+                self.connection.select(remaining)
+                remaining = deadline - time.monotonic()
+                continue
+            handler = self.__handlers.get(reading.get_msgId())
+            if handler is not None:
+                handler(reading)
+            if self.__fusion is not None:
+                fused = self.__fusion.fuse()
+                if fused is not None:
+                    fused_time, position, attitude = fused
+                    return TelemetryData(fused_time, *position, *attitude)
+                remaining = deadline - time.monotonic()
+                continue
+            attitude = self.__attitude
+            local_position = self.__local_position
             if attitude and local_position:
                 max_time_since_boot = max(local_position.time_boot_ms, attitude.time_boot_ms)
                 # Return the most recent of both, and use the most recent message's timestamp
@@ -138,6 +291,7 @@ class Telemetry:
                     attitude.pitchspeed,
                     attitude.yawspeed,
                 )
+            remaining = deadline - time.monotonic()
         self.local_logger.error("Telemetry data could not be received from drone.")
         return None
 
@@ -0,0 +1,78 @@
+"""
+Columnar batch of telemetry samples.
+"""
+
+import numpy as np
+
+from . import telemetry
+
+
+class TelemetryBatch:  # pylint: disable=too-many-instance-attributes
+    """
+    Several TelemetryData samples stored as one NumPy array per field, oldest first.
+    Sent as a single queue item instead of one item per sample.
+    Each field of TelemetryData is an attribute holding its column, e.g. `batch.x_velocity`.
+
+    None is stored as NaN.
+    """
+
+    FIELDS = telemetry.TelemetryData.__slots__
+
+    def __init__(self, columns: "dict[str, np.ndarray]") -> None:
+        """
+        columns: One equal length float64 array for each name in FIELDS.
+        """
+        lengths = {len(columns[name]) for name in self.FIELDS}
+        assert len(lengths) == 1, "Columns must have the same length"
+
+        for name in self.FIELDS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_samples(cls, samples: "list[telemetry.TelemetryData]") -> "TelemetryBatch":
+        """
+        Builds a batch from samples, oldest first.
+        """
+        values = np.array(
+            [
+                [
+                    np.nan if getattr(sample, name) is None else getattr(sample, name)
+                    for name in cls.FIELDS
+                ]
+                for sample in samples
+            ],
+            dtype=np.float64,
+        ).reshape(len(samples), len(cls.FIELDS))
+        # One contiguous row per field
+        columns = np.ascontiguousarray(values.T)
+
+        return TelemetryBatch({name: columns[i] for i, name in enumerate(cls.FIELDS)})
+
+    def __len__(self) -> int:
+        return len(self.time_since_boot)
+
+    def sample(self, index: int) -> telemetry.TelemetryData:
+        """
+        Returns a single sample as TelemetryData.
+        """
+        values = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)[index]
+            values[name] = None if np.isnan(value) else float(value)
+
+        if values["time_since_boot"] is not None:
+            values["time_since_boot"] = int(values["time_since_boot"])
+
+        return telemetry.TelemetryData(**values)
+
+    def latest(self) -> telemetry.TelemetryData:
+        """
+        Returns the most recent sample.
+        """
+        return self.sample(-1)
+
+    def __str__(self) -> str:
+        if len(self) == 0:
+            return "TelemetryBatch(0 samples)"
+
+        return f"TelemetryBatch({len(self)} samples, latest: {self.latest()})"
@@ -0,0 +1,165 @@
+"""
+Time alignment of attitude and position streams.
+"""
+
+import collections
+import math
+
+from pymavlink import mavutil
+
+
+class TelemetryFusion:
+    """
+    Keeps the most recent ATTITUDE and LOCAL_POSITION_NED samples and emits a fused state
+    at the faster stream's timestamp, with the slower stream interpolated to that timestamp.
+
+    Angles are interpolated along the shortest arc. Past the newest sample of the slower
+    stream, its values are extrapolated with the rates it reported (velocity, angular speed).
+    """
+
+    def __init__(self, output_rate: float, buffer_size: int = 8) -> None:
+        """
+        output_rate: Maximum outputs per second of drone time, <= 0 for every new sample.
+        buffer_size: Samples kept per stream, must be at least 2 .
+        """
+        assert buffer_size >= 2, "Buffer size must be at least 2"
+
+        self.__output_period = 1000 / output_rate if output_rate > 0 else 0.0  # ms
+        # (time_boot_ms, (3 values, 3 rates)), oldest first
+        self.__attitudes: "collections.deque[tuple[int, tuple]]" = collections.deque(
+            maxlen=buffer_size
+        )
+        self.__positions: "collections.deque[tuple[int, tuple]]" = collections.deque(
+            maxlen=buffer_size
+        )
+        self.__last_output_time: "int | None" = None
+
+    def add_attitude(self, message: "mavutil.mavlink.MAVLink_attitude_message") -> None:
+        """
+        Adds an ATTITUDE sample.
+        """
+        self.__add(
+            self.__attitudes,
+            message.time_boot_ms,
+            (
+                message.roll,
+                message.pitch,
+                message.yaw,
+                message.rollspeed,
+                message.pitchspeed,
+                message.yawspeed,
+            ),
+        )
+
+    def add_local_position(
+        self, message: "mavutil.mavlink.MAVLink_local_position_ned_message"
+    ) -> None:
+        """
+        Adds a LOCAL_POSITION_NED sample.
+        """
+        self.__add(
+            self.__positions,
+            message.time_boot_ms,
+            (message.x, message.y, message.z, message.vx, message.vy, message.vz),
+        )
+
+    def fuse(self) -> "tuple[int, tuple, tuple] | None":
+        """
+        Returns the state aligned to the newest sample of the faster stream,
+        or None if a stream is empty or the output period has not elapsed.
+
+        The state is time_boot_ms, (x, y, z, vx, vy, vz), (roll, pitch, yaw, and their speeds),
+        in the same order as the TelemetryData constructor.
+        """
+        if len(self.__attitudes) == 0 or len(self.__positions) == 0:
+            return None
+
+        if self.__is_faster(self.__attitudes, self.__positions):
+            output_time = self.__attitudes[-1][0]
+        else:
+            output_time = self.__positions[-1][0]
+
+        if self.__last_output_time is not None and (
+            output_time <= self.__last_output_time
+            or output_time - self.__last_output_time < self.__output_period
+        ):
+            return None
+
+        self.__last_output_time = output_time
+
+        position = self.__sample_at(self.__positions, output_time, False)
+        attitude = self.__sample_at(self.__attitudes, output_time, True)
+
+        return output_time, position, attitude
+
+    @staticmethod
+    def __add(samples: "collections.deque[tuple[int, tuple]]", time_ms: int, values: tuple) -> None:
+        # Out of order or repeated samples would break interpolation
+        if len(samples) > 0 and time_ms <= samples[-1][0]:
+            return
+
+        samples.append((time_ms, values))
+
+    @staticmethod
+    def __is_faster(
+        first: "collections.deque[tuple[int, tuple]]",
+        second: "collections.deque[tuple[int, tuple]]",
+    ) -> bool:
+        """
+        Whether the first stream has the shorter mean sample period.
+        Falls back to the stream with the newest sample when a period cannot be estimated.
+        """
+        if len(first) < 2 or len(second) < 2:
+            return first[-1][0] >= second[-1][0]
+
+        first_period = (first[-1][0] - first[0][0]) / (len(first) - 1)
+        second_period = (second[-1][0] - second[0][0]) / (len(second) - 1)
+        return first_period <= second_period
+
+    @staticmethod
+    def __sample_at(
+        samples: "collections.deque[tuple[int, tuple]]", time_ms: int, is_angle: bool
+    ) -> tuple:
+        """
+        Values and rates of a stream at time_ms.
+        """
+        if time_ms <= samples[0][0]:
+            return samples[0][1]
+
+        previous_time, previous_values = samples[0]
+        for sample_time, values in samples:
+            if sample_time >= time_ms:
+                fraction = (time_ms - previous_time) / (sample_time - previous_time)
+                return tuple(
+                    interpolate(previous_value, value, fraction, is_angle and i < 3)
+                    for i, (previous_value, value) in enumerate(zip(previous_values, values))
+                )
+
+            previous_time, previous_values = sample_time, values
+
+        # Newer than every sample, extrapolate the values with the rates
+        elapsed = (time_ms - previous_time) / 1000  # s
+        extrapolated = [
+            value + rate * elapsed for value, rate in zip(previous_values[:3], previous_values[3:])
+        ]
+        if is_angle:
+            extrapolated = [wrap_angle(value) for value in extrapolated]
+
+        return tuple(extrapolated) + tuple(previous_values[3:])
+
+
+def wrap_angle(angle: float) -> float:
+    """
+    Wraps an angle in radians to [-pi, pi).
+    """
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def interpolate(start: float, end: float, fraction: float, is_angle: bool) -> float:
+    """
+    Linear interpolation, along the shortest arc for angles in radians.
+    """
+    if not is_angle:
+        return start + (end - start) * fraction
+
+    return wrap_angle(start + wrap_angle(end - start) * fraction)
@@ -4,12 +4,17 @@ Telemtry worker that gathers GPS data.
 
 import os
 import pathlib
+import queue
+import time
 
 from pymavlink import mavutil
 
+from utilities.workers import async_logger
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
 from utilities.workers import worker_controller
 from . import telemetry
+from . import telemetry_batch
 from ..common.modules.logger import logger
 
 
@@ -18,8 +23,12 @@ from ..common.modules.logger import logger
 # =================================================================================================
 def telemetry_worker(
     connection: mavutil.mavfile,
-    controller: worker_controller.WorkerController,
     telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,  # Place your own arguments here
+    controller: worker_controller.WorkerController,
+    batch_size: int = 0,
+    batch_window: float = 0.0,
+    fusion_output_rate: "float | None" = None,
+    async_logging: bool = False,
     # Add other necessary worker arguments here
 ) -> None:
     """
@@ -27,8 +36,13 @@ def telemetry_worker(
 
     args... describe what the arguments are
     connection indicates the channel between the drone
-    controller regulates the worker state
     telemetry_queue stores telemetry data for access
+    controller regulates the worker state
+    batch_size is the number of samples per TelemetryBatch, <= 0 sends each TelemetryData on its own
+    (a batch must fit in a slot of a shared memory queue, about 30 samples for the default slot)
+    batch_window is the maximum seconds to hold samples before sending a partial batch, <= 0 for no limit
+    fusion_output_rate time aligns attitude and position at up to this many outputs per second, None to pair
+    async_logging buffers logs from the loop so they do not wait on file writes
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -50,20 +64,77 @@ def telemetry_worker(
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Every batch of batch_size samples pickles to the same size, so check one before reading
+    if batch_size > 0 and isinstance(
+        telemetry_queue, shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ):
+        largest_batch = telemetry_batch.TelemetryBatch.from_samples(
+            [telemetry.TelemetryData()] * batch_size
+        )
+        if not telemetry_queue.fits(largest_batch):
+            local_logger.error(
+                f"Batch of {batch_size} samples does not fit in a slot of the telemetry queue",
+                True,
+            )
+            return
+
+    # Logs from the loop are buffered and written by a thread if async_logging
+    result, loop_logger = async_logger.AsyncLogger.create(local_logger, async_logging)
+    if not result:
+        local_logger.error("Failed to create Async Logger object", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert loop_logger is not None
+
     # Instantiate class object (telemetry.Telemetry)
-    result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+    result, telemetry_instance = telemetry.Telemetry.create(
+        connection, loop_logger, fusion_output_rate
+    )
     if not result:
         local_logger.error("Failed to create telemetry object")
         return
 
+    samples: "list[telemetry.TelemetryData]" = []
+    batch_start = time.time()
+
     # Main loop: do work.
     while (
         not controller.is_exit_requested()
     ):  # i love documentation file for letting me spam this ult
         controller.check_pause()
         value = telemetry_instance.run()
+        # Routed connection closed at shutdown, nothing more will arrive
+        if value is None and telemetry_instance.is_closed():
+            break
+
+        if batch_size <= 0:
+            if value:
+                telemetry_queue.put(value)
+            continue
+
         if value:
-            telemetry_queue.queue.put(value)
+            if not samples:
+                batch_start = time.time()
+            samples.append(value)
+
+        if not samples:
+            continue
+
+        # Ship the batch once full, or once its oldest sample has waited for the whole window
+        window_elapsed = 0 < batch_window <= time.time() - batch_start
+        if len(samples) >= batch_size or window_elapsed:
+            telemetry_queue.put(telemetry_batch.TelemetryBatch.from_samples(samples))
+            samples = []
+
+    # Ship the samples still held, unless nothing is left to make space in the queue
+    if samples:
+        try:
+            telemetry_queue.put_nowait(telemetry_batch.TelemetryBatch.from_samples(samples))
+        except queue.Full:
+            loop_logger.warning(f"Dropped {len(samples)} samples at exit, queue is full")
+
+    loop_logger.stop()
 
 
 # =================================================================================================
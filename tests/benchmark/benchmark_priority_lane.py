@@ -0,0 +1,109 @@
+"""
+Benchmark the latency of control items while bulk items saturate the queue.
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+CONTROL_COUNT = 200
+CONTROL_PERIOD = 0.01  # seconds
+MAX_QUEUE = 64
+# Work per item, so the consumer is slower than the bulk producer and the normal lane stays full
+CONSUMER_WORK = 0.0005  # seconds
+# Similar in size to a telemetry sample
+MESSAGE = {"time": 0.0, "x": 1.0, "y": 2.0, "z": 3.0, "roll": 0.1, "pitch": 0.2, "yaw": 0.3}
+
+
+def bulk_producer(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Puts bulk messages as fast as the queue takes them, until it is closed.
+    """
+    while not wrapper.is_closed():
+        wrapper.put(MESSAGE)
+
+
+def control_producer(wrapper: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts `count` control items with the time they were put, then a sentinel.
+    """
+    for _ in range(count):
+        time.sleep(CONTROL_PERIOD)
+        wrapper.put_high_priority(time.monotonic_ns())
+
+    wrapper.put_high_priority(None)
+
+
+def consume(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> "list[int]":
+    """
+    Gets items until the sentinel, doing some work for each.
+
+    Returns the latencies of the control items in microseconds.
+    """
+    latencies = []
+    while True:
+        item = wrapper.get()
+        if item is None:
+            return latencies
+
+        if isinstance(item, int):
+            latencies.append((time.monotonic_ns() - item) // 1000)
+
+        deadline = time.perf_counter() + CONSUMER_WORK
+        while time.perf_counter() < deadline:
+            pass
+
+
+def run(name: str, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> int:
+    """
+    Sends CONTROL_COUNT control items to main while a bulk producer keeps the queue full.
+
+    Returns the p99 latency in microseconds.
+    """
+    bulk_process = mp.Process(target=bulk_producer, args=(wrapper,))
+    control_process = mp.Process(target=control_producer, args=(wrapper, CONTROL_COUNT))
+    bulk_process.start()
+    # Let the bulk producer fill the queue first
+    time.sleep(0.5)
+    control_process.start()
+    latencies = sorted(consume(wrapper))
+    control_process.join()
+    wrapper.poison()
+    bulk_process.join()
+
+    assert len(latencies) == CONTROL_COUNT
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    print(f"{name:>9}: control latency p50 {p50} us, p99 {p99} us")
+    return p99
+
+
+def main() -> int:
+    """
+    Runs the benchmark with and without a high priority lane.
+    """
+    mp_manager = mp.Manager()
+
+    p99s = {
+        # Control items queue behind the bulk items
+        "single": run("single", queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE)),
+        "priority": run(
+            "priority",
+            queue_proxy_wrapper.PriorityQueueProxyWrapper(mp_manager, MAX_QUEUE, MAX_QUEUE),
+        ),
+    }
+
+    mp_manager.shutdown()
+
+    print(f"Priority lane p99 is {p99s['single'] / max(p99s['priority'], 1):.1f}x lower")
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -0,0 +1,111 @@
+"""
+Benchmark the throughput of each queue transport between two processes.
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+
+
+MESSAGE_COUNT = 20000
+MAX_QUEUE = 64
+BATCH_SIZE = 32
+# Similar in size to a telemetry sample
+MESSAGE = {"time": 0.0, "x": 1.0, "y": 2.0, "z": 3.0, "roll": 0.1, "pitch": 0.2, "yaw": 0.3}
+
+
+def producer(wrapper: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts `count` messages then a sentinel.
+    """
+    for _ in range(count):
+        wrapper.put(MESSAGE)
+
+    wrapper.put(None)
+
+
+def consume(wrapper: queue_proxy_wrapper.QueueProxyWrapper, batched: bool) -> int:
+    """
+    Gets messages until the sentinel.
+
+    Returns the number of messages.
+    """
+    count = 0
+    while True:
+        if batched:
+            # Get Pylance to stop complaining
+            assert isinstance(wrapper, pipe_queue_wrapper.PipeQueueWrapper)
+
+            items = wrapper.get_batch(BATCH_SIZE)
+        else:
+            items = [wrapper.get()]
+
+        for item in items:
+            if item is None:
+                return count
+
+            count += 1
+
+
+def run(name: str, wrapper: queue_proxy_wrapper.QueueProxyWrapper, batched: bool) -> float:
+    """
+    Sends MESSAGE_COUNT messages from a producer process to main.
+
+    Returns the messages per second.
+    """
+    process = mp.Process(target=producer, args=(wrapper, MESSAGE_COUNT))
+    start = time.perf_counter()
+    process.start()
+    count = consume(wrapper, batched)
+    elapsed = time.perf_counter() - start
+    process.join()
+
+    assert count == MESSAGE_COUNT
+    rate = count / elapsed
+    if wrapper.metrics is None:
+        print(f"{name:>14}: {rate:>9.0f} messages/s")
+        return rate
+
+    p99 = wrapper.metrics.snapshot().latency_percentile(99)
+    print(f"{name:>14}: {rate:>9.0f} messages/s, latency p99 {p99} us")
+    return rate
+
+
+def main() -> int:
+    """
+    Runs the benchmark for each transport.
+    """
+    mp_manager = mp.Manager()
+    shared_queue = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(MAX_QUEUE)
+
+    rates = {
+        "manager": run(
+            "manager", queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE), False
+        ),
+        # Cost of counting items and measuring their latency
+        "manager_metrics": run(
+            "manager_metrics",
+            queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE, record_metrics=True),
+            False,
+        ),
+        "shared_memory": run("shared_memory", shared_queue, False),
+        "pipe": run("pipe", pipe_queue_wrapper.PipeQueueWrapper(MAX_QUEUE), False),
+        "pipe_batched": run("pipe_batched", pipe_queue_wrapper.PipeQueueWrapper(MAX_QUEUE), True),
+    }
+
+    shared_queue.release()
+    mp_manager.shutdown()
+
+    print(f"Pipe is {rates['pipe'] / rates['manager']:.1f}x the manager queue")
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -0,0 +1,125 @@
+"""
+Benchmark the CPU time telemetry spends per received MAVLink message.
+"""
+
+import socket
+import time
+
+from pymavlink import mavutil
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+
+
+ADDRESS = ("127.0.0.1", 14601)
+# Sent in chunks, so the socket buffer never overflows
+CHUNK_SIZE = 200
+CHUNK_COUNT = 50
+# Rate of the whole stream from the drone
+STREAM_RATE = 1000  # messages/s
+MESSAGE_TYPES = {"ATTITUDE", "LOCAL_POSITION_NED"}
+
+
+def stream_chunk(time_ms: int) -> "list[bytes]":
+    """
+    Returns CHUNK_SIZE frames, each 10 of which have one ATTITUDE and one LOCAL_POSITION_NED.
+    """
+    sender = common.MAVLink(None, 1, 1)
+    messages = [
+        common.MAVLink_attitude_message(time_ms, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0),
+        common.MAVLink_local_position_ned_message(time_ms, 1.0, 2.0, -3.0, 0.0, 0.0, 0.0),
+        common.MAVLink_heartbeat_message(2, 3, 0, 0, 4, 3),
+        common.MAVLink_sys_status_message(0, 0, 0, 500, 12000, -1, 90, 0, 0, 0, 0, 0, 0),
+        common.MAVLink_gps_raw_int_message(time_ms * 1000, 3, 0, 0, 0, 100, 100, 0, 0, 10),
+        common.MAVLink_raw_imu_message(time_ms * 1000, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+        common.MAVLink_servo_output_raw_message(time_ms * 1000, 0, *([1500] * 8)),
+        common.MAVLink_vfr_hud_message(5.0, 5.0, 90, 50, 30.0, 0.0),
+        common.MAVLink_scaled_pressure_message(time_ms, 1013.0, 0.0, 2500),
+        common.MAVLink_rc_channels_message(time_ms, 8, *([1500] * 18), 255),
+    ]
+    return [messages[i % len(messages)].pack(sender) for i in range(CHUNK_SIZE)]
+
+
+def receive_before(connection: mavutil.mavfile, local_logger: logger.Logger) -> None:
+    """
+    Receives one ATTITUDE and LOCAL_POSITION_NED pair like Telemetry.run() did before:
+    every message is decoded, and every wanted one is logged.
+    """
+    attitude = None
+    local_position = None
+    while attitude is None or local_position is None:
+        reading = connection.recv_match(type=MESSAGE_TYPES, blocking=False)
+        if reading is None:
+            continue
+
+        local_logger.info(f"Received Telemetry Data: {reading.get_type()}")
+        if reading.get_msgId() == common.MAVLINK_MSG_ID_ATTITUDE:
+            attitude = reading
+        else:
+            local_position = reading
+
+
+def run(name: str, local_logger: logger.Logger, before: bool) -> float:
+    """
+    Sends the stream to a new connection and receives every pair.
+
+    Returns the CPU time per message in microseconds.
+    """
+    connection = mavutil.mavlink_connection(f"udpin:{ADDRESS[0]}:{ADDRESS[1]}")
+    telemetry_instance = None
+    if not before:
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    cpu_time = 0.0
+    for chunk in range(CHUNK_COUNT):
+        for frame in stream_chunk(chunk):
+            sender.sendto(frame, ADDRESS)
+
+        start = time.process_time()
+        for _ in range(CHUNK_SIZE // 10):
+            if telemetry_instance is None:
+                receive_before(connection, local_logger)
+            else:
+                assert telemetry_instance.run() is not None
+
+        cpu_time += time.process_time() - start
+
+    sender.close()
+    connection.close()
+
+    per_message = cpu_time / (CHUNK_SIZE * CHUNK_COUNT) * 1e6
+    print(
+        f"{name:>6}: {per_message:>6.1f} us CPU per message, "
+        f"{per_message * STREAM_RATE / 1e4:.1f}% of a core at {STREAM_RATE} messages/s"
+    )
+    return per_message
+
+
+def main() -> int:
+    """
+    Runs the benchmark before and after skipping messages by ID.
+    """
+    result, local_logger = logger.Logger.create("benchmark_telemetry_dispatch", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    before = run("before", local_logger, True)
+    after = run("after", local_logger, False)
+
+    print(f"Skipping by ID uses {before / after:.1f}x less CPU per message")
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
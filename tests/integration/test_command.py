@@ -77,7 +77,7 @@ def read_queue(
     while not controller.is_exit_requested():
         if not command_output_queue.queue.empty():
             main_logger.info(
-                command_output_queue.queue.get()
+                command_output_queue.get()
             )  # Add logic to read from your worker's output queue and print it using the logger
 
 
@@ -89,7 +89,7 @@ def put_queue(
     Place mocked inputs into the input queue periodically with period TELEMETRY_PERIOD.
     """
     for data in telemetry_data_list:
-        command_input_queue.queue.put(data)
+        command_input_queue.put(data)
         time.sleep(
             TELEMETRY_PERIOD
         )  # Add logic to place the mocked inputs into your worker's input queue periodically
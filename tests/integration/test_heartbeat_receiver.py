@@ -3,8 +3,10 @@ Test the heartbeat reciever worker with a mocked drone.
 """
 
 import multiprocessing as mp
+import queue
 import subprocess
 import threading
+import time
 
 from pymavlink import mavutil
 
@@ -31,6 +33,8 @@ ERROR_TOLERANCE = 1e-2
 # =================================================================================================
 # Add your own constants here
 RECEIVER_QUEUE_MAX_SIZE = 5  # Ensures we that each fail is counted as consecutive
+# Disconnects are reported this long after the deadline at most, for waking up and queueing
+DETECTION_LATENCY_TOLERANCE = 0.05  # seconds
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
 # =================================================================================================
@@ -63,17 +67,78 @@ def read_queue(
     active_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
     main_logger: logger.Logger,
+    states: "list[tuple[str, float]]",
 ) -> None:
     """
-    Read and print the output queue.
+    Read and print the output queue, recording each state with the monotonic time it arrived.
     """
+    start = time.monotonic()
     while not controller.is_exit_requested():
-        if not active_queue.queue.empty():
-            state = active_queue.queue.get()
-            main_logger.info(f"State: {state}", True)
-            time.sleep(
-                1
-            )  # Add logic to read from your worker's output queue and print it using the logger
+        # Waiting on the queue, so a state is timed when it arrives
+        try:
+            state = active_queue.get(timeout=0.1)
+        except (queue.Empty, queue_proxy_wrapper.QueueClosed):
+            continue
+
+        # Sentinel from stopping
+        if state is None:
+            continue
+
+        now = time.monotonic()
+        states.append((state, now))
+        main_logger.info(f"State: {state} at {now - start:.3f} s", True)
+
+
+def record_heartbeats(connection: mavutil.mavfile, heartbeat_times: "list[float]") -> None:
+    """
+    Records the monotonic time each heartbeat is received on the connection.
+    """
+    receive = connection.recv_match
+
+    def recv_match(**kwargs: object) -> "object | None":
+        message = receive(**kwargs)
+        if message is not None:
+            heartbeat_times.append(time.monotonic())
+
+        return message
+
+    connection.recv_match = recv_match
+
+
+def check_detection_latency(
+    states: "list[tuple[str, float]]",
+    heartbeat_times: "list[float]",
+    main_logger: logger.Logger,
+) -> bool:
+    """
+    Checks that every disconnect was reported DISCONNECT_THRESHOLD periods after the latest
+    heartbeat, within DETECTION_LATENCY_TOLERANCE.
+    """
+    disconnect_times = [now for state, now in states if state == "DISCONNECTED"]
+    if len(disconnect_times) == 0:
+        main_logger.error("The drone was never disconnected", True)
+        return False
+
+    expected_latency = HEARTBEAT_PERIOD * DISCONNECT_THRESHOLD
+    for disconnect_time in disconnect_times:
+        last_seen = max(
+            (arrival for arrival in heartbeat_times if arrival < disconnect_time), default=None
+        )
+        if last_seen is None:
+            main_logger.error("Disconnected before any heartbeat", True)
+            return False
+
+        latency = disconnect_time - last_seen
+        main_logger.info(f"Disconnect detected {latency:.3f} s after the last heartbeat", True)
+        if not expected_latency <= latency <= expected_latency + DETECTION_LATENCY_TOLERANCE:
+            main_logger.error(
+                f"Disconnect latency {latency:.3f} s is not within {DETECTION_LATENCY_TOLERANCE} s "
+                f"after {expected_latency} s",
+                True,
+            )
+            return False
+
+    return True
 
 
 # =================================================================================================
@@ -81,7 +146,6 @@ def read_queue(
 # =================================================================================================
 
 
-
 def main() -> int:
     """
     Start the heartbeat receiver worker simulation.
@@ -135,18 +199,33 @@ def main() -> int:
     threading.Timer(
         HEARTBEAT_PERIOD * (NUM_TRIALS * 2 + DISCONNECT_THRESHOLD + NUM_DISCONNECTS + 2),
         stop,
-        (controller, active_queue),
+        (active_queue, controller),
     ).start()
 
     # Read the main queue (worker outputs)
-    threading.Thread(target=read_queue, args=(active_queue, controller, main_logger)).start()
+    states: "list[tuple[str, float]]" = []
+    reader = threading.Thread(
+        target=read_queue, args=(active_queue, controller, main_logger, states)
+    )
+    reader.start()
+
+    # Detection latency is measured from when the latest heartbeat was received
+    heartbeat_times: "list[float]" = []
+    record_heartbeats(connection, heartbeat_times)
 
     heartbeat_receiver_worker.heartbeat_receiver_worker(
         # Place your own arguments here
         connection,
         active_queue,
         controller,
+        HEARTBEAT_PERIOD,
+        DISCONNECT_THRESHOLD,
     )
+
+    reader.join()
+    if not check_detection_latency(states, heartbeat_times, main_logger):
+        return -1
+
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
     # =============================================================================================
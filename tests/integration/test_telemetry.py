@@ -70,7 +70,7 @@ def read_queue(
     while not controller.is_exit_requested():
         if not telemetry_queue.queue.empty():
             main_logger.info(
-                telemetry_queue.queue.get()
+                telemetry_queue.get()
             )  # Add logic to read from your worker's output queue and print it using the logger
 
 
@@ -138,7 +138,7 @@ def main() -> int:
     # Read the main queue (worker outputs)
     threading.Thread(target=read_queue, args=(telemetry_queue, controller, main_logger)).start()
 
-    telemetry_worker.telemetry_worker(connection, controller, telemetry_queue)
+    telemetry_worker.telemetry_worker(connection, telemetry_queue, controller)
     # Put your own arguments here
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
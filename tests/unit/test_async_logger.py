@@ -0,0 +1,162 @@
+"""
+Test buffered logging with a writer thread.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utilities.workers import async_logger
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class MockLogger:
+    """
+    Records what is written, optionally slowly like a file on a busy disk.
+    """
+
+    def __init__(self, write_time: float = 0.0) -> None:
+        self.records: "list[tuple[str, str]]" = []
+        self.write_time = write_time
+        # Thread each record was written from
+        self.writer_threads: "list[int]" = []
+
+    def __write(self, level: str, message: str) -> None:
+        time.sleep(self.write_time)
+        self.writer_threads.append(threading.get_ident())
+        self.records.append((level, message))
+
+    # pylint: disable-next=unused-argument
+    def info(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Writes an info message.
+        """
+        self.__write("info", message)
+
+    # pylint: disable-next=unused-argument
+    def warning(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Writes a warning message.
+        """
+        self.__write("warning", message)
+
+    # pylint: disable-next=unused-argument
+    def error(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Writes an error message.
+        """
+        self.__write("error", message)
+
+
+@pytest.fixture()
+def mock_logger() -> MockLogger:  # type: ignore
+    """
+    Logger the records are written with.
+    """
+    yield MockLogger()  # type: ignore
+
+
+def create_logger(mock_logger: MockLogger, **kwargs: object) -> async_logger.AsyncLogger:
+    """
+    Asynchronous logger writing with the mock.
+    """
+    result, test_logger = async_logger.AsyncLogger.create(mock_logger, **kwargs)  # type: ignore
+    assert result
+    assert test_logger is not None
+    return test_logger
+
+
+def test_invalid_buffer(mock_logger: MockLogger) -> None:
+    """
+    A non-positive buffer size is rejected.
+    """
+    result, test_logger = async_logger.AsyncLogger.create(mock_logger, buffer_size=0)  # type: ignore
+    assert not result
+    assert test_logger is None
+
+
+def test_written_by_thread_in_order(mock_logger: MockLogger) -> None:
+    """
+    Records are written in order from the writer thread, with the frame info of the caller.
+    """
+    # Setup
+    test_logger = create_logger(mock_logger, sample_burst=0)
+
+    # Run
+    for i in range(100):
+        test_logger.info(f"Sample {i}", False)
+    test_logger.error("Failed")
+    test_logger.stop()
+
+    # Test
+    messages = [message for _, message in mock_logger.records]
+    assert messages[:100] == [f"Sample {i}" for i in range(100)]
+    assert mock_logger.records[100][0] == "error"
+    assert "test_async_logger.py | test_written_by_thread_in_order" in messages[100]
+    assert threading.get_ident() not in mock_logger.writer_threads[:101]
+    assert test_logger.written_count == 101
+    assert "written: 101, suppressed: 0, dropped: 0" in messages[-1]
+
+
+def test_full_buffer_drops_without_waiting() -> None:
+    """
+    Logging does not wait on a slow writer, records that do not fit are counted.
+    """
+    # Setup
+    slow_logger = MockLogger(0.01)
+    test_logger = create_logger(slow_logger, buffer_size=10, batch_size=5, sample_burst=0)
+
+    # Run
+    start = time.monotonic()
+    for i in range(100):
+        test_logger.info(f"Sample {i}", False)
+    elapsed = time.monotonic() - start
+    test_logger.stop()
+
+    # Test
+    assert elapsed < 0.05
+    assert test_logger.dropped_count > 0
+    assert test_logger.written_count + test_logger.dropped_count == 100
+
+
+def test_repetitive_messages_sampled(mock_logger: MockLogger) -> None:
+    """
+    Repeated info records from one call site are suppressed past the burst, warnings are not.
+    """
+    # Setup
+    test_logger = create_logger(mock_logger, sample_burst=3, sample_window=10.0)
+
+    # Run
+    for i in range(10):
+        test_logger.info(f"Average Velocity: {i}")
+        test_logger.warning(f"Slow {i}")
+    test_logger.stop()
+
+    # Test
+    levels = [level for level, _ in mock_logger.records]
+    assert levels.count("warning") == 10
+    assert test_logger.suppressed_count == 7
+    assert any(
+        "7 similar suppressed, last: Average Velocity: 9" in message
+        for _, message in mock_logger.records
+    )
+
+
+def test_synchronous(mock_logger: MockLogger) -> None:
+    """
+    Synchronous mode writes immediately from the caller.
+    """
+    # Setup
+    test_logger = create_logger(mock_logger, asynchronous=False)
+
+    # Run
+    test_logger.info("Heartbeat Sent!", False)
+
+    # Test
+    assert mock_logger.records == [("info", "Heartbeat Sent!")]
+    assert mock_logger.writer_threads == [threading.get_ident()]
@@ -0,0 +1,245 @@
+"""
+Test the command decision logic.
+"""
+
+import math
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from modules.command import command
+from modules.command import command_worker
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_batch
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class MockMav:
+    """
+    Records sent commands.
+    """
+
+    def __init__(self) -> None:
+        self.sent: "list[tuple]" = []
+
+    def command_long_send(self, *args: object, **kwargs: object) -> None:
+        """
+        Records the command.
+        """
+        self.sent.append((args, kwargs))
+
+
+class MockConnection:
+    """
+    Connection with a recording `mav`.
+    """
+
+    def __init__(self) -> None:
+        self.mav = MockMav()
+
+
+@pytest.fixture()
+def command_instance() -> command.Command:  # type: ignore
+    """
+    Command with a mocked connection.
+    """
+    result, test_logger = logger.Logger.create("test_command", False)
+    assert result
+    assert test_logger is not None
+
+    result, instance = command.Command.create(
+        MockConnection(), command.Position(0, 0, 0), test_logger
+    )
+    assert result
+    yield instance  # type: ignore
+
+
+def random_states(count: int) -> "list[telemetry.TelemetryData]":
+    """
+    States around the target, including exact tolerance boundaries.
+    """
+    generator = random.Random(0)
+    states = []
+    for i in range(count):
+        z = generator.choice([0.5, -0.5, generator.uniform(-2, 2)])
+        yaw = generator.uniform(-math.pi, math.pi)
+        states.append(
+            telemetry.TelemetryData(
+                i,
+                generator.uniform(-10, 10),
+                generator.uniform(-10, 10),
+                z,
+                0.0,
+                0.0,
+                0.0,
+                0.0,
+                0.0,
+                yaw,
+            )
+        )
+
+    return states
+
+
+class TestRun:
+    """
+    Decisions on telemetry as it arrives.
+    """
+
+    def test_telemetry_batch(self, command_instance: command.Command) -> None:
+        """
+        A batch adds every sample to the statistics and decides on its latest sample.
+        """
+        # Setup
+        samples = [
+            telemetry.TelemetryData(100, 0.0, 0.0, 0.0, 1.0, 2.0, 3.0, yaw=1.0),
+            telemetry.TelemetryData(200, 0.0, 0.0, 0.0, 3.0, 4.0, 5.0, yaw=1.0),
+            telemetry.TelemetryData(300, 0.0, 0.0, 5.0, 5.0, 0.0, 1.0, yaw=1.0),
+        ]
+        batch = telemetry_batch.TelemetryBatch.from_samples(samples)
+
+        # Run
+        output = command_instance.run(command.Position(0, 0, 0), batch)
+
+        # Test
+        assert output == "CHANGE_ALTITUDE: -5.0"
+        assert len(command_instance.connection.mav.sent) == 1
+        assert command_instance.statistics.count == 3
+        assert command_instance.statistics.mean() == pytest.approx((3.0, 2.0, 3.0))
+
+
+class TestRunBatch:
+    """
+    Vectorized decisions match the scalar path.
+    """
+
+    def test_matches_run(self, command_instance: command.Command) -> None:
+        """
+        Each state gets the same decision and delta from run() and run_batch().
+        """
+        # Setup
+        target = command.Position(1.0, 2.0, 0.0)
+        states = random_states(500)
+        batch = telemetry_batch.TelemetryBatch.from_samples(states)
+
+        # Run
+        decisions = command_instance.run_batch(target, batch)
+        expected = [command_instance.run(target, state) for state in states]
+
+        # Test
+        for i, expected_output in enumerate(expected):
+            if expected_output is None:
+                assert decisions.decision[i] == command.Decision.NONE
+            elif expected_output.startswith("CHANGE_ALTITUDE"):
+                assert decisions.decision[i] == command.Decision.CHANGE_ALTITUDE
+                assert math.isclose(decisions.altitude_delta[i], float(expected_output.split()[1]))
+            else:
+                assert decisions.decision[i] == command.Decision.CHANGE_YAW
+                assert math.isclose(decisions.yaw_delta[i], float(expected_output.split()[1]))
+
+    def test_equals_run_with_wraparound(self, command_instance: command.Command) -> None:
+        """
+        run() and run_batch() give exactly the same output on random states, and on states
+        whose yaw and bearing to the target are on opposite sides of +-pi, where the shortest
+        rotation wraps around.
+        """
+        # Setup
+        target = command.Position(0.0, 0.0, 0.0)
+        generator = random.Random(1)
+        states = random_states(500)
+        for i in range(500):
+            # Target bearing just past +-pi, yaw just past the other side
+            bearing = math.pi - generator.uniform(0.0, 0.2)
+            yaw = -math.pi + generator.uniform(0.0, 0.2)
+            if i % 2 == 1:
+                bearing, yaw = -bearing, -yaw
+
+            states.append(
+                telemetry.TelemetryData(
+                    i, -math.cos(bearing), -math.sin(bearing), 0.0, yaw=yaw, yaw_speed=0.0
+                )
+            )
+
+        batch = telemetry_batch.TelemetryBatch.from_samples(states)
+
+        # Run
+        decisions = command_instance.run_batch(target, batch)
+        outputs = [command_instance.run(target, state) for state in states]
+
+        # Test
+        for i, output in enumerate(outputs):
+            if decisions.decision[i] == command.Decision.CHANGE_ALTITUDE:
+                assert output == f"CHANGE_ALTITUDE: {float(decisions.altitude_delta[i])}"
+            elif decisions.decision[i] == command.Decision.CHANGE_YAW:
+                assert output == f"CHANGING_YAW: {float(decisions.yaw_delta[i])}"
+            else:
+                assert output is None
+
+        # Shortest rotation, so the wrapped states turn by under 0.4 rad instead of nearly 2 pi
+        bearings = np.arctan2(-batch.y, -batch.x)
+        shortest = np.degrees((bearings - batch.yaw + math.pi) % (2 * math.pi) - math.pi)
+        assert np.allclose(decisions.yaw_delta, shortest)
+        assert np.all(np.abs(decisions.yaw_delta[500:]) < math.degrees(0.4))
+
+    def test_does_not_send(self, command_instance: command.Command) -> None:
+        """
+        Batch evaluation sends nothing and leaves the statistics alone.
+        """
+        # Setup
+        batch = telemetry_batch.TelemetryBatch.from_samples(random_states(10))
+
+        # Run
+        command_instance.run_batch(command.Position(0, 0, 10), batch)
+
+        # Test
+        assert len(command_instance.connection.mav.sent) == 0
+        assert command_instance.statistics.count == 0
+
+
+class TestCommandWorker:
+    """
+    Worker loop over the input queue.
+    """
+
+    def test_exits_on_closed_queue(self) -> None:
+        """
+        The worker waits for input without spinning and exits once its input queue is closed.
+        """
+        # Setup
+        input_queue = pipe_queue_wrapper.PipeQueueWrapper(5)
+        output_queue = pipe_queue_wrapper.PipeQueueWrapper(5)
+        controller = worker_controller.WorkerController()
+        worker = threading.Thread(
+            target=command_worker.command_worker,
+            args=(
+                MockConnection(),
+                command.Position(0, 0, 10),
+                input_queue,
+                output_queue,
+                controller,
+            ),
+        )
+        worker.start()
+
+        # Run
+        input_queue.put(random_states(1)[0])
+        output = output_queue.get(timeout=5)
+        start = time.monotonic()
+        input_queue.close()
+        worker.join(5)
+        elapsed = time.monotonic() - start
+
+        # Test
+        assert output.startswith("CHANGE_ALTITUDE")
+        assert not worker.is_alive()
+        assert elapsed < 0.5
@@ -0,0 +1,105 @@
+"""
+Test command deduplication and rate limiting.
+"""
+
+import multiprocessing as mp
+
+import pytest
+from pymavlink import mavutil
+
+from modules.command import command_governor
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CHANGE_ALTITUDE = mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT
+YAW = mavutil.mavlink.MAV_CMD_CONDITION_YAW
+
+
+def request_altitude(governor: command_governor.CommandGovernor, altitude: float) -> None:
+    """
+    Requests an altitude change from a copy of the governor, fails if it is suppressed.
+    """
+    assert governor.request(CHANGE_ALTITUDE, altitude)
+
+
+@pytest.fixture()
+def governor() -> command_governor.CommandGovernor:  # type: ignore
+    """
+    At most 2 sends per second, commands in flight for 1 second.
+    """
+    result, instance = command_governor.CommandGovernor.create(2, 1)
+    assert result
+    yield instance  # type: ignore
+
+
+class TestCommandGovernor:
+    """
+    Suppression rules and counters.
+    """
+
+    def test_duplicate_in_flight(self, governor: command_governor.CommandGovernor) -> None:
+        """
+        The same altitude is not resent while in flight, a different one is.
+        """
+        assert governor.request(CHANGE_ALTITUDE, 10.0, 0.0)
+        assert not governor.request(CHANGE_ALTITUDE, 10.05, 0.6)
+        assert governor.request(CHANGE_ALTITUDE, 12.0, 0.7)
+        assert governor.request(CHANGE_ALTITUDE, 12.0, 1.8)
+
+        assert governor.sent_counts == {CHANGE_ALTITUDE: 3}
+        assert governor.suppressed_counts == {CHANGE_ALTITUDE: 1}
+
+    def test_rate_limit(self, governor: command_governor.CommandGovernor) -> None:
+        """
+        Different commands of one type are still limited by rate, other types are independent.
+        """
+        assert governor.request(CHANGE_ALTITUDE, 10.0, 0.0)
+        assert not governor.request(CHANGE_ALTITUDE, 20.0, 0.1)
+        assert governor.request(YAW, 30.0, 0.1)
+        assert governor.request(CHANGE_ALTITUDE, 20.0, 0.5)
+
+    def test_yaw_suppression(self, governor: command_governor.CommandGovernor) -> None:
+        """
+        Same direction corrections are suppressed while one is in flight, reversals are sent,
+        and the next correction after the in flight time is sent.
+        """
+        assert governor.request(YAW, 30.0, 0.0)
+        assert not governor.request(YAW, 25.0, 0.5)
+        assert governor.request(YAW, -10.0, 0.6)
+        assert not governor.request(YAW, -8.0, 1.5)
+        assert governor.request(YAW, -6.0, 1.7)
+
+        assert governor.sent_counts == {YAW: 3}
+        assert governor.suppressed_counts == {YAW: 2}
+
+    def test_limits_per_copy(self, governor: command_governor.CommandGovernor) -> None:
+        """
+        A copy in a worker process keeps its own limits, but counts into the shared counters.
+        """
+        # Setup
+        worker = mp.Process(target=request_altitude, args=(governor, 10.0))
+
+        # Run
+        worker.start()
+        worker.join()
+        original_sent = governor.request(CHANGE_ALTITUDE, 10.0)
+
+        # Test
+        assert worker.exitcode == 0
+        # Not suppressed by the request of the copy
+        assert original_sent
+        assert governor.sent_counts == {CHANGE_ALTITUDE: 2}
+        assert governor.suppressed_counts == {}
+        assert governor.counters.snapshot()["MAV_CMD_CONDITION_CHANGE_ALT sent"] == 2
+
+    def test_invalid(self) -> None:
+        """
+        Non-positive rate is rejected.
+        """
+        result, instance = command_governor.CommandGovernor.create(0, 1)
+        assert not result
+        assert instance is None
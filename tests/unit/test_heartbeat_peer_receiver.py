@@ -0,0 +1,204 @@
+"""
+Test heartbeat liveness of many peers keyed by system and component id.
+"""
+
+import threading
+import time
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_peer_receiver
+from modules.heartbeat import heartbeat_peer_receiver_worker
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PERIOD = 0.02  # seconds
+DISCONNECT_THRESHOLD = 5
+
+
+def create_heartbeat(system_id: int, component_id: int) -> object:
+    """
+    Heartbeat with the header of the peer.
+    """
+    message = common.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3)
+    message.pack(common.MAVLink(None, srcSystem=system_id, srcComponent=component_id))
+    return message
+
+
+class MockLink:
+    """
+    Link shared by peers, each sending heartbeats until its silent time.
+    """
+
+    def __init__(self, silent_after: "dict[tuple[int, int], float]") -> None:
+        """
+        silent_after: Seconds after creation each peer stops sending.
+        """
+        start = time.monotonic()
+        self.silent_times = {peer: start + delay for peer, delay in silent_after.items()}
+        self.next_peer = 0
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Returns a heartbeat of the next peer still sending, round robin.
+        """
+        now = time.monotonic()
+        sending = [peer for peer, silent_time in self.silent_times.items() if now < silent_time]
+        if len(sending) == 0:
+            time.sleep(float(kwargs["timeout"]))  # type: ignore
+            return None
+
+        self.next_peer = (self.next_peer + 1) % len(sending)
+        # Spread the heartbeats of all peers over a period
+        time.sleep(PERIOD / len(sending))
+        return create_heartbeat(*sending[self.next_peer])
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the receiver.
+    """
+    result, test_logger = logger.Logger.create("test_heartbeat_peer_receiver", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def create_receiver(
+    connection: object, local_logger: logger.Logger
+) -> heartbeat_peer_receiver.HeartbeatPeerReceiver:
+    """
+    Receiver with the test period and threshold.
+    """
+    result, receiver = heartbeat_peer_receiver.HeartbeatPeerReceiver.create(
+        connection, local_logger, PERIOD, DISCONNECT_THRESHOLD
+    )
+    assert result
+    assert receiver is not None
+    return receiver
+
+
+def test_transitions_per_peer(local_logger: logger.Logger) -> None:
+    """
+    Each peer reports its own transitions, only when its state changes.
+    """
+    # Setup
+    receiver = create_receiver(MockLink({}), local_logger)
+    timeout = PERIOD * DISCONNECT_THRESHOLD
+    start = time.monotonic()
+
+    # Run
+    transitions = [
+        receiver.record_heartbeat((1, 1), start),
+        receiver.record_heartbeat((2, 1), start),
+        receiver.record_heartbeat((1, 1), start + timeout / 2),
+    ]
+    first_expiry = receiver.update(start + timeout + 1e-6)
+    second_expiry = receiver.update(start + timeout * 1.5 + 1e-6)
+    reconnect = receiver.record_heartbeat((2, 1), start + timeout * 2)
+
+    # Test
+    assert transitions == [((1, 1), "CONNECTED"), ((2, 1), "CONNECTED"), None]
+    assert first_expiry == [((2, 1), "DISCONNECTED")]
+    assert second_expiry == [((1, 1), "DISCONNECTED")]
+    assert reconnect == ((2, 1), "CONNECTED")
+    assert receiver.states == {(1, 1): "DISCONNECTED", (2, 1): "CONNECTED"}
+
+
+def test_many_peers(local_logger: logger.Logger) -> None:
+    """
+    Hundreds of peers are updated and expired without checking each on every update.
+    """
+    # Setup
+    receiver = create_receiver(MockLink({}), local_logger)
+    peers = [(system_id, component_id) for system_id in range(1, 51) for component_id in range(4)]
+    start = time.monotonic()
+    for peer in peers:
+        receiver.record_heartbeat(peer, start)
+
+    # Keep half sending
+    for peer in peers[::2]:
+        receiver.record_heartbeat(peer, start + PERIOD * 3)
+
+    # Run
+    expired = receiver.update(start + PERIOD * (DISCONNECT_THRESHOLD + 1))
+
+    # Test
+    assert sorted(peer for peer, _ in expired) == sorted(peers[1::2])
+    assert len(receiver._HeartbeatPeerReceiver__wheel) == len(peers) // 2
+
+
+def test_detection_latency(local_logger: logger.Logger) -> None:
+    """
+    A peer going silent is disconnected within a tick of its deadline while others stay.
+    """
+    # Setup
+    silent_after = 0.1
+    link = MockLink({(1, 1): silent_after, (2, 1): 1.0, (255, 190): 1.0})
+    receiver = create_receiver(link, local_logger)
+    end = time.monotonic() + silent_after + PERIOD * (DISCONNECT_THRESHOLD + 2)
+
+    # Run
+    transitions = []
+    latency = None
+    while time.monotonic() < end:
+        for peer, state in receiver.run(PERIOD):
+            transitions.append((peer, state))
+            if state == "DISCONNECTED":
+                latency = time.monotonic() - receiver.last_seen[peer]
+
+    # Test
+    assert sorted(transitions) == [
+        ((1, 1), "CONNECTED"),
+        ((1, 1), "DISCONNECTED"),
+        ((2, 1), "CONNECTED"),
+        ((255, 190), "CONNECTED"),
+    ]
+    assert latency is not None
+    assert PERIOD * DISCONNECT_THRESHOLD < latency < PERIOD * (DISCONNECT_THRESHOLD + 1)
+
+
+def test_worker_reports_missed_peers() -> None:
+    """
+    The worker reports every peer connecting, then exactly the peers that missed their deadlines.
+    """
+    # Setup
+    silent_peers = [(1, 1), (3, 1), (255, 190)]
+    sending_peers = [(2, 1), (4, 1), (5, 1)]
+    silent_after = 0.1
+    run_time = silent_after + PERIOD * (DISCONNECT_THRESHOLD + 4)
+    link = MockLink(
+        {peer: silent_after for peer in silent_peers}
+        | {peer: run_time * 2 for peer in sending_peers}
+    )
+    report_queue = pipe_queue_wrapper.PipeQueueWrapper(50)
+    controller = worker_controller.WorkerController()
+    worker = threading.Thread(
+        target=heartbeat_peer_receiver_worker.heartbeat_peer_receiver_worker,
+        args=(link, report_queue, controller, PERIOD, DISCONNECT_THRESHOLD),
+    )
+
+    # Run
+    worker.start()
+    time.sleep(run_time)
+    controller.request_exit()
+    worker.join(5)
+    transitions = []
+    while not report_queue.queue.empty():
+        transitions.append(report_queue.get())
+
+    # Test
+    assert not worker.is_alive()
+    connected = [peer for peer, state in transitions if state == "CONNECTED"]
+    disconnected = [peer for peer, state in transitions if state == "DISCONNECTED"]
+    assert sorted(connected) == sorted(silent_peers + sending_peers)
+    assert sorted(disconnected) == sorted(silent_peers)
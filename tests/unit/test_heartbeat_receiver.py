@@ -0,0 +1,284 @@
+"""
+Test heartbeat liveness from the time since the latest heartbeat.
+"""
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_receiver
+from tests.integration.mock_drones import heartbeat_receiver_drone
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PERIOD = 0.02  # seconds
+DISCONNECT_THRESHOLD = 5
+# Clock step of the mock drone test, a power of 2 so the heartbeat times and deadlines are exact
+STEP = 0.125  # seconds
+
+
+class SteppedClock:
+    """
+    Monotonic clock which advances in fixed steps, shared by the mock drone and the receiver.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """
+        Current time in seconds.
+        """
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Advances the clock, for the mock drone.
+        """
+        self.now += seconds
+
+
+class DroneConnection:
+    """
+    Connection of the mock drone, which records the time of each heartbeat it sends.
+    """
+
+    def __init__(self, clock: SteppedClock) -> None:
+        self.clock = clock
+        self.mav = self
+        self.send_times: "list[float]" = []
+
+    def wait_heartbeat(self) -> None:
+        """
+        The receiver is already connected.
+        """
+
+    # pylint: disable-next=unused-argument
+    def heartbeat_send(self, *args: object) -> None:
+        """
+        Records the send time.
+        """
+        self.send_times.append(self.clock.monotonic())
+
+
+class ReceiverConnection:
+    """
+    Connection of the receiver, on which the heartbeats arrive at their send times.
+    """
+
+    def __init__(self, clock: SteppedClock, send_times: "list[float]") -> None:
+        self.clock = clock
+        self.send_times = list(send_times)
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Returns a heartbeat that has arrived, otherwise steps the clock until one arrives
+        or the timeout passes. A read takes at least 1 step.
+        """
+        timeout = float(kwargs["timeout"])  # type: ignore
+        waited = 0.0
+        while True:
+            if len(self.send_times) > 0 and self.send_times[0] <= self.clock.now:
+                self.send_times.pop(0)
+                return common.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3)
+
+            if waited > 0.0 and waited >= timeout:
+                return None
+
+            self.clock.now += STEP
+            waited += STEP
+
+
+class MockDrone:
+    """
+    Sends heartbeats at scheduled times of a simulated clock, like the heartbeat receiver
+    mock drone, so waiting takes no real time.
+    """
+
+    # Shortest a read takes, so a read at the deadline moves past it
+    READ_TIME = 1e-6  # seconds
+
+    def __init__(self, send_times: "list[float]") -> None:
+        """
+        send_times: Seconds on the clock to send heartbeats at.
+        """
+        self.now = 0.0
+        self.send_times = list(send_times)
+
+    def clock(self) -> float:
+        """
+        Current simulated time.
+        """
+        return self.now
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Advances the clock to the next heartbeat or the timeout.
+        """
+        end = self.now + float(kwargs["timeout"]) + self.READ_TIME  # type: ignore
+        if len(self.send_times) == 0 or self.send_times[0] > end:
+            self.now = end
+            return None
+
+        self.now = max(self.send_times.pop(0), self.now + self.READ_TIME)
+        return common.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3)
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the receiver.
+    """
+    result, test_logger = logger.Logger.create("test_heartbeat_receiver", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def create_receiver(
+    connection: MockDrone, local_logger: logger.Logger
+) -> heartbeat_receiver.HeartbeatReceiver:
+    """
+    Receiver with the test period and threshold.
+    """
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        connection, local_logger, PERIOD, DISCONNECT_THRESHOLD, connection.clock
+    )
+    assert result
+    assert receiver is not None
+    return receiver
+
+
+def test_invalid_threshold(local_logger: logger.Logger) -> None:
+    """
+    A non-positive threshold is rejected.
+    """
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        MockDrone([]), local_logger, PERIOD, 0
+    )
+    assert not result
+    assert receiver is None
+
+
+def test_disconnect_deadline(local_logger: logger.Logger) -> None:
+    """
+    Disconnected only once strictly more than the threshold passed, and only transitions report.
+    """
+    # Setup
+    receiver = create_receiver(MockDrone([]), local_logger)
+    timeout = PERIOD * DISCONNECT_THRESHOLD
+
+    # Run
+    never_seen = receiver.update(0.0)
+    receiver.record_heartbeat(1.0)
+    connected = receiver.update(1.0)
+    still_connected = receiver.update(1.0 + timeout)
+    disconnected = receiver.update(1.0 + timeout + 1e-6)
+    still_disconnected = receiver.update(2.0 + timeout)
+
+    # Test
+    assert never_seen is None
+    assert connected == "CONNECTED"
+    assert still_connected is None
+    assert disconnected == "DISCONNECTED"
+    assert still_disconnected is None
+
+
+def test_detection_latency(local_logger: logger.Logger) -> None:
+    """
+    The drone sends, goes silent, then reconnects with a dropped heartbeat that is tolerated.
+    """
+    # Setup
+    first_trial = [i * PERIOD for i in range(5)]
+    silence = PERIOD * (DISCONNECT_THRESHOLD + 3)
+    second_start = first_trial[-1] + PERIOD + silence
+    second_trial = [second_start + i * PERIOD for i in range(5)]
+    # Drop 1 heartbeat
+    last = second_trial[-1] + 2 * PERIOD
+    drone = MockDrone(first_trial + second_trial + [last])
+    receiver = create_receiver(drone, local_logger)
+    end = last + PERIOD * (DISCONNECT_THRESHOLD + 2)
+
+    # Run
+    transitions = []
+    disconnect_latencies = []
+    while drone.clock() < end:
+        state = receiver.run(PERIOD)
+        if state is None:
+            continue
+
+        transitions.append(state)
+        if state == "DISCONNECTED":
+            # Get Pylance to stop complaining
+            assert receiver.last_seen is not None
+
+            disconnect_latencies.append(drone.clock() - receiver.last_seen)
+
+    # Test
+    assert transitions == ["CONNECTED", "DISCONNECTED", "CONNECTED", "DISCONNECTED"]
+    assert len(disconnect_latencies) == 2
+    for latency in disconnect_latencies:
+        assert latency == pytest.approx(PERIOD * DISCONNECT_THRESHOLD, abs=3 * MockDrone.READ_TIME)
+        assert latency > PERIOD * DISCONNECT_THRESHOLD
+
+
+def test_mock_drone_stepped_clock(
+    local_logger: logger.Logger, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    With the heartbeats of the mock drone, the drone is still connected at the disconnect
+    deadline and disconnected on the first step after it, and a dropped heartbeat is tolerated.
+    """
+    # Setup
+    clock = SteppedClock()
+    drone_connection = DroneConnection(clock)
+    monkeypatch.setattr(heartbeat_receiver_drone, "time", clock)
+    monkeypatch.setattr(
+        heartbeat_receiver_drone.mavutil,
+        "mavlink_connection",
+        lambda *args, **kwargs: drone_connection,
+    )
+    create_logger = logger.Logger.create
+    monkeypatch.setattr(
+        logger.Logger, "create", lambda name, log_to_file: create_logger(name, False)
+    )
+    assert heartbeat_receiver_drone.main() == 0
+    send_times = drone_connection.send_times
+    period = heartbeat_receiver_drone.HEARTBEAT_PERIOD
+    threshold = heartbeat_receiver_drone.DISCONNECT_THRESHOLD
+    # Last heartbeat before each silence: the disconnect, and the end of the test
+    last_times = [send_times[heartbeat_receiver_drone.NUM_TRIALS - 1], send_times[-1]]
+
+    clock.now = 0.0
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        ReceiverConnection(clock, send_times), local_logger, period, threshold, clock.monotonic
+    )
+    assert result
+    assert receiver is not None
+    end = send_times[-1] + period * (threshold + 2)
+
+    # Run
+    transitions = []
+    deadline_states = []
+    while clock.now < end:
+        state = receiver.run(period)
+        if clock.now in [last_time + period * threshold for last_time in last_times]:
+            deadline_states.append(receiver.state)
+
+        if state is not None:
+            transitions.append((state, clock.now))
+
+    # Test
+    assert transitions == [
+        ("CONNECTED", send_times[0]),
+        ("DISCONNECTED", last_times[0] + period * threshold + STEP),
+        ("CONNECTED", send_times[heartbeat_receiver_drone.NUM_TRIALS]),
+        ("DISCONNECTED", last_times[1] + period * threshold + STEP),
+    ]
+    assert deadline_states == ["CONNECTED", "CONNECTED"]
+    assert receiver.received_count == len(send_times)
@@ -0,0 +1,166 @@
+"""
+Test sending and monitoring heartbeats from one event loop.
+"""
+
+import asyncio
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_service
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PERIOD = 0.05  # seconds
+DISCONNECT_THRESHOLD = 3
+
+
+class MockMav:
+    """
+    Counts heartbeats sent.
+    """
+
+    def __init__(self) -> None:
+        self.send_times: "list[float]" = []
+
+    # pylint: disable-next=unused-argument
+    def heartbeat_send(self, *args: object) -> None:
+        """
+        Records the time of the heartbeat.
+        """
+        self.send_times.append(time.monotonic())
+
+
+class MockConnection:
+    """
+    Receives a heartbeat every period until the drone goes silent.
+    """
+
+    def __init__(self, silent_after: float) -> None:
+        self.mav = MockMav()
+        self.__silent_time = time.monotonic() + silent_after
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Blocks for a period, then returns a heartbeat or None once silent.
+        """
+        timeout = float(kwargs.get("timeout", PERIOD))  # type: ignore
+        time.sleep(min(PERIOD, timeout))
+        if time.monotonic() > self.__silent_time:
+            return None
+
+        return common.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3)
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the service.
+    """
+    result, test_logger = logger.Logger.create("test_heartbeat_service", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+@pytest.fixture()
+def report_queue() -> pipe_queue_wrapper.PipeQueueWrapper:  # type: ignore
+    """
+    Queue for the state transitions.
+    """
+    yield pipe_queue_wrapper.PipeQueueWrapper(10)  # type: ignore
+
+
+def test_invalid_period(
+    report_queue: pipe_queue_wrapper.PipeQueueWrapper, local_logger: logger.Logger
+) -> None:
+    """
+    A non-positive period is rejected.
+    """
+    connection = MockConnection(0.0)
+    controller = worker_controller.WorkerController()
+    result, service = heartbeat_service.HeartbeatService.create(
+        connection, connection, report_queue, controller, 0.0, DISCONNECT_THRESHOLD, local_logger
+    )
+    assert not result
+    assert service is None
+
+
+def test_connect_then_disconnect(
+    report_queue: pipe_queue_wrapper.PipeQueueWrapper, local_logger: logger.Logger
+) -> None:
+    """
+    Heartbeats keep being sent while the drone connects and then goes silent.
+    """
+    # Setup
+    connection = MockConnection(0.3)
+    controller = worker_controller.WorkerController()
+    result, service = heartbeat_service.HeartbeatService.create(
+        connection, connection, report_queue, controller, PERIOD, DISCONNECT_THRESHOLD, local_logger
+    )
+    assert result
+    assert service is not None
+
+    run_time = 0.8
+    threading.Timer(run_time, controller.request_exit).start()
+
+    # Run
+    start = time.monotonic()
+    asyncio.run(service.run())
+    elapsed = time.monotonic() - start
+
+    # Test
+    states = []
+    while not report_queue.queue.empty():
+        states.append(report_queue.get())
+
+    assert states == ["CONNECTED", "DISCONNECTED"]
+    assert service.state == "DISCONNECTED"
+    assert service.received_count > 0
+    # Exits promptly and sends on schedule the whole time
+    assert elapsed < run_time + 0.5
+    send_times = connection.mav.send_times
+    assert len(send_times) == pytest.approx(run_time / PERIOD, abs=3)
+    assert service.sent_count == len(send_times)
+    assert str(service).startswith(f"heartbeat: {len(send_times)} runs")
+
+
+def test_state_ahead_of_commands(local_logger: logger.Logger) -> None:
+    """
+    States go into the high priority lane of a queue shared with commands, so they come out first.
+    """
+    # Setup
+    mp_manager = mp.Manager()
+    output_queue = queue_proxy_wrapper.PriorityQueueProxyWrapper(
+        mp_manager, 5, 5, record_metrics=True
+    )
+    output_queue.put("CHANGE_ALTITUDE: 1.0")
+    connection = MockConnection(1.0)
+    controller = worker_controller.WorkerController()
+    result, service = heartbeat_service.HeartbeatService.create(
+        connection, connection, output_queue, controller, PERIOD, DISCONNECT_THRESHOLD, local_logger
+    )
+    assert result
+    assert service is not None
+
+    threading.Timer(PERIOD * 4, controller.request_exit).start()
+
+    # Run
+    asyncio.run(service.run())
+    readings = [output_queue.get(timeout=1), output_queue.get(timeout=1)]
+    mp_manager.shutdown()
+
+    # Test
+    assert readings == ["CONNECTED", "CHANGE_ALTITUDE: 1.0"]
+    assert output_queue.high_priority_metrics.snapshot().put_count == 1
@@ -0,0 +1,227 @@
+"""
+Test routing MAVLink messages by type.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.mavlink_router import mavlink_router
+from modules.telemetry import telemetry
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class MockConnection:
+    """
+    Returns prepared messages from recv_match().
+    """
+
+    def __init__(self, messages: "list[object]") -> None:
+        self.messages = messages
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Pops the next message.
+        """
+        if len(self.messages) == 0:
+            return None
+
+        return self.messages.pop(0)
+
+
+@pytest.fixture()
+def mp_manager() -> "mp.managers.SyncManager":  # type: ignore
+    """
+    Multiprocess manager for queues.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the router.
+    """
+    result, test_logger = logger.Logger.create("test_mavlink_router", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def heartbeat(sequence: int) -> common.MAVLink_heartbeat_message:
+    """
+    HEARTBEAT told apart by its custom mode.
+    """
+    return common.MAVLink_heartbeat_message(6, 8, 0, sequence, 0, 3)
+
+
+def test_route_by_type(mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger) -> None:
+    """
+    Each message only reaches the subscribers of its type, full queues drop.
+    """
+    # Setup
+    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 1)
+    telemetry_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 5)
+    connection = MockConnection(
+        [
+            heartbeat(0),
+            common.MAVLink_attitude_message(10, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0),
+            heartbeat(1),
+        ]
+    )
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection,
+        {"heartbeat": heartbeat_queue, "telemetry": telemetry_queue},
+        {"HEARTBEAT": ["heartbeat"], "ATTITUDE": ["telemetry"]},
+        local_logger,
+    )
+    assert result
+    assert router is not None
+
+    # Run
+    routed_types = [router.run() for _ in range(4)]
+
+    # Test
+    assert routed_types == ["HEARTBEAT", "ATTITUDE", "HEARTBEAT", None]
+    assert router.dropped_counts == {"heartbeat": 1, "telemetry": 0}
+    assert telemetry_queue.get_nowait().get_type() == "ATTITUDE"
+    assert heartbeat_queue.get_nowait().custom_mode == 0
+
+
+def test_overflow_policy_per_subscriber(
+    mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+) -> None:
+    """
+    Each full subscriber applies its own overflow policy, drops are counted by subscriber
+    and logged at most once per period.
+    """
+    # Setup
+    latest_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, 2, "drop_oldest", record_metrics=True
+    )
+    blocking_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 2)
+    spare_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 10)
+    connection = MockConnection([heartbeat(i) for i in range(5)])
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection,
+        {"latest": latest_queue, "blocking": blocking_queue, "spare": spare_queue},
+        {"HEARTBEAT": ["latest", "blocking", "spare"]},
+        local_logger,
+    )
+    assert result
+    assert router is not None
+    warnings = []
+    local_logger.warning = lambda message, *args: warnings.append(message)
+
+    # Run
+    for _ in range(5):
+        router.run()
+
+    # Test
+    assert [latest_queue.get_nowait().custom_mode for _ in range(2)] == [3, 4]
+    assert [blocking_queue.get_nowait().custom_mode for _ in range(2)] == [0, 1]
+    assert [spare_queue.get_nowait().custom_mode for _ in range(5)] == [0, 1, 2, 3, 4]
+    assert latest_queue.metrics.snapshot().dropped_count == 3
+    assert router.dropped_counts == {"latest": 0, "blocking": 3, "spare": 0}
+    # First drop logged, the rest within the period wait for the next log
+    assert len(warnings) == 1
+    assert "blocking: 1 (total 1)" in warnings[0]
+
+
+def test_unknown_subscriber(
+    mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+) -> None:
+    """
+    Routing a type to a subscriber without a queue fails creation.
+    """
+    # Setup
+    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 1)
+
+    # Run
+    result, router = mavlink_router.MavlinkRouter.create(
+        MockConnection([]),
+        {"heartbeat": heartbeat_queue},
+        {"HEARTBEAT": ["heartbeat"], "ATTITUDE": ["telemetry"]},
+        local_logger,
+    )
+
+    # Test
+    assert not result
+    assert router is None
+
+
+def test_routed_connection_filters(mp_manager: "mp.managers.SyncManager") -> None:
+    """
+    recv_match() skips other types and returns None once empty.
+    """
+    # Setup
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 5)
+    input_queue.queue.put(common.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3))
+    input_queue.queue.put(common.MAVLink_attitude_message(10, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0))
+    connection = mavlink_router.RoutedConnection(input_queue)
+
+    # Run
+    message = connection.recv_match(type="ATTITUDE", blocking=True, timeout=1)
+
+    # Test
+    assert message is not None
+    assert message.get_type() == "ATTITUDE"
+    assert not connection.select(0.01)
+    assert connection.recv_match(blocking=False) is None
+
+
+def test_routed_connection_closed(mp_manager: "mp.managers.SyncManager") -> None:
+    """
+    A closed input queue ends waits at once and marks the connection closed.
+    """
+    # Setup
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 5)
+    connection = mavlink_router.RoutedConnection(input_queue)
+    input_queue.close()
+
+    # Run
+    start = time.monotonic()
+    available = connection.select(1.0)
+    message = connection.recv_match(blocking=True, timeout=1.0)
+    elapsed = time.monotonic() - start
+
+    # Test
+    assert not available
+    assert message is None
+    assert connection.closed
+    assert elapsed < 0.5
+
+
+def test_telemetry_stops_on_closed(
+    mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+) -> None:
+    """
+    Telemetry returns at once from a closed routed connection instead of waiting out its timeout.
+    """
+    # Setup
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 5)
+    connection = mavlink_router.RoutedConnection(input_queue)
+    result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+    assert result
+    assert telemetry_instance is not None
+    input_queue.close()
+
+    # Run
+    start = time.monotonic()
+    value = telemetry_instance.run()
+    elapsed = time.monotonic() - start
+
+    # Test
+    assert value is None
+    assert telemetry_instance.is_closed()
+    assert elapsed < 0.1
@@ -0,0 +1,129 @@
+"""
+Test what producers do with a full queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAXSIZE = 3
+
+
+@pytest.fixture(params=["manager", "shared_memory", "pipe"])
+def create_wrapper(request: pytest.FixtureRequest) -> "(str) -> queue_proxy_wrapper.QueueProxyWrapper":  # type: ignore
+    """
+    Creates bounded queues with an overflow policy, for each transport.
+    """
+    mp_manager = mp.Manager() if request.param == "manager" else None
+    wrappers = []
+
+    def create(overflow_policy: str) -> queue_proxy_wrapper.QueueProxyWrapper:
+        if mp_manager is not None:
+            wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+                mp_manager, MAXSIZE, overflow_policy, record_metrics=True
+            )
+        elif request.param == "pipe":
+            wrapper = pipe_queue_wrapper.PipeQueueWrapper(
+                MAXSIZE, overflow_policy, record_metrics=True
+            )
+        else:
+            wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+                MAXSIZE, overflow_policy=overflow_policy, record_metrics=True
+            )
+
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield create  # type: ignore
+
+    for wrapper in wrappers:
+        if isinstance(wrapper, shared_memory_queue_wrapper.SharedMemoryQueueWrapper):
+            wrapper.release()
+
+    if mp_manager is not None:
+        mp_manager.shutdown()
+
+
+def drain(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> "list[object]":
+    """
+    Returns everything in the queue.
+    """
+    items = []
+    while True:
+        try:
+            items.append(wrapper.get_nowait())
+        except queue.Empty:
+            return items
+
+
+class TestOverflowPolicy:
+    """
+    Putting 5 items into a queue of 3 .
+    """
+
+    def test_block(
+        self, create_wrapper: "(str) -> queue_proxy_wrapper.QueueProxyWrapper"  # type: ignore
+    ) -> None:
+        """
+        Put waits for space.
+        """
+        wrapper = create_wrapper("block")
+        for i in range(MAXSIZE):
+            wrapper.put(i)
+
+        with pytest.raises(queue.Full):
+            wrapper.put(MAXSIZE, timeout=0.01)
+
+        assert drain(wrapper) == [0, 1, 2]
+
+    def test_drop_oldest(
+        self, create_wrapper: "(str) -> queue_proxy_wrapper.QueueProxyWrapper"  # type: ignore
+    ) -> None:
+        """
+        The queue keeps the newest items.
+        """
+        wrapper = create_wrapper("drop_oldest")
+        for i in range(5):
+            wrapper.put(i)
+
+        assert drain(wrapper) == [2, 3, 4]
+        assert wrapper.metrics.snapshot().dropped_count == 2
+
+    def test_drop_newest(
+        self, create_wrapper: "(str) -> queue_proxy_wrapper.QueueProxyWrapper"  # type: ignore
+    ) -> None:
+        """
+        The queue keeps the oldest items.
+        """
+        wrapper = create_wrapper("drop_newest")
+        for i in range(5):
+            wrapper.put_nowait(i)
+
+        assert drain(wrapper) == [0, 1, 2]
+        assert wrapper.metrics.snapshot().dropped_count == 2
+
+    def test_conflate(
+        self, create_wrapper: "(str) -> queue_proxy_wrapper.QueueProxyWrapper"  # type: ignore
+    ) -> None:
+        """
+        The queue keeps only the latest item.
+        """
+        wrapper = create_wrapper("conflate")
+        for i in range(5):
+            wrapper.put(i)
+
+        snapshot = wrapper.metrics.snapshot()
+        assert drain(wrapper) == [4]
+        assert snapshot.conflated_count == 4
+        assert snapshot.dropped_count == 0
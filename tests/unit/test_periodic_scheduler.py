@@ -0,0 +1,130 @@
+"""
+Test running periodic tasks on absolute deadlines.
+"""
+
+import threading
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import periodic_scheduler
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def scheduler() -> periodic_scheduler.PeriodicScheduler:  # type: ignore
+    """
+    Scheduler without tasks.
+    """
+    result, test_logger = logger.Logger.create("test_periodic_scheduler", False)
+    assert result
+    assert test_logger is not None
+    result, periodic = periodic_scheduler.PeriodicScheduler.create(test_logger)
+    assert result
+    assert periodic is not None
+    yield periodic  # type: ignore
+
+
+class TestPeriodicScheduler:
+    """
+    Deadlines, overruns, and statistics.
+    """
+
+    def test_invalid_tasks(self, scheduler: periodic_scheduler.PeriodicScheduler) -> None:
+        """
+        Non-positive periods and duplicate names are rejected.
+        """
+        assert not scheduler.add_task("zero", 0.0, lambda: None)
+        assert scheduler.add_task("heartbeat", 1.0, lambda: None)
+        assert not scheduler.add_task("heartbeat", 1.0, lambda: None)
+
+    def test_late_run_does_not_drift(self, scheduler: periodic_scheduler.PeriodicScheduler) -> None:
+        """
+        A late run keeps the next deadline on the original schedule.
+        """
+        # Setup
+        runs = []
+        assert scheduler.add_task("heartbeat", 1.0, lambda: runs.append(True), now=0.0)
+
+        # Run
+        first_delay = scheduler.run_pending(0.0)
+        early_delay = scheduler.run_pending(0.3)
+        late_delay = scheduler.run_pending(1.05)
+        on_time_delay = scheduler.run_pending(2.0)
+
+        # Test
+        assert len(runs) == 3
+        assert first_delay == 1.0
+        assert early_delay == pytest.approx(0.7)
+        assert late_delay == pytest.approx(0.95)
+        assert on_time_delay == 1.0
+        statistics = scheduler.get_statistics()["heartbeat"]
+        assert statistics.overrun_count == 0
+        assert statistics.max_lateness == pytest.approx(0.05)
+
+    def test_overrun_skips_missed_periods(
+        self, scheduler: periodic_scheduler.PeriodicScheduler
+    ) -> None:
+        """
+        Periods missed entirely are counted instead of run in a burst.
+        """
+        # Setup
+        runs = []
+        assert scheduler.add_task("heartbeat", 1.0, lambda: runs.append(True), now=0.0)
+        scheduler.run_pending(0.0)
+
+        # Run
+        delay = scheduler.run_pending(3.5)
+
+        # Test
+        assert len(runs) == 2
+        assert delay == pytest.approx(0.5)
+        assert scheduler.get_statistics()["heartbeat"].overrun_count == 2
+
+    def test_tasks_share_thread(self, scheduler: periodic_scheduler.PeriodicScheduler) -> None:
+        """
+        Tasks with different periods run in deadline order.
+        """
+        # Setup
+        runs = []
+        assert scheduler.add_task("slow", 2.0, lambda: runs.append("slow"), 0.5, now=0.0)
+        assert scheduler.add_task("fast", 1.0, lambda: runs.append("fast"), now=0.0)
+
+        # Run
+        for now in [0.0, 0.5, 1.0, 2.0, 2.5]:
+            scheduler.run_pending(now)
+
+        # Test
+        assert runs == ["fast", "slow", "fast", "fast", "slow"]
+
+    def test_run_until_exit(self, scheduler: periodic_scheduler.PeriodicScheduler) -> None:
+        """
+        Slow runs on the real clock do not shift later runs.
+        """
+        # Setup
+        period = 0.02
+        run_times = []
+
+        def slow_task() -> None:
+            run_times.append(time.monotonic())
+            time.sleep(0.005)
+
+        controller = worker_controller.WorkerController()
+        assert scheduler.add_task("slow", period, slow_task)
+        threading.Timer(0.5, controller.request_exit).start()
+
+        # Run
+        scheduler.run(controller)
+
+        # Test
+        run_count = len(run_times)
+        assert run_count >= 20
+        expected_span = (run_count - 1) * period
+        assert abs((run_times[-1] - run_times[0]) - expected_span) < 0.01
+        assert scheduler.get_statistics()["slow"].run_count == run_count
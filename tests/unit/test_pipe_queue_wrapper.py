@@ -0,0 +1,158 @@
+"""
+Test the pipe queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import pipeline
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def pipe_queue() -> pipe_queue_wrapper.PipeQueueWrapper:  # type: ignore
+    """
+    Creates a small pipe queue.
+    """
+    yield pipe_queue_wrapper.PipeQueueWrapper(3, record_metrics=True)  # type: ignore
+
+
+def producer(wrapper: pipe_queue_wrapper.PipeQueueWrapper, count: int) -> None:
+    """
+    Puts `count` integers then a sentinel, blocking while the queue is full.
+    """
+    for i in range(count):
+        wrapper.put(i)
+
+    wrapper.put(None)
+
+
+def consumer_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Placeholder stage that reads the queue.
+    """
+    assert input_queue is not None
+    assert controller is not None
+
+
+class TestPipeQueue:
+    """
+    Pipe channel behaviour.
+    """
+
+    def test_fifo_order(self, pipe_queue: pipe_queue_wrapper.PipeQueueWrapper) -> None:
+        """
+        Items of any picklable type come out in order.
+        """
+        # Setup
+        expected = [0, "one", {"two": 2}, None]
+
+        # Run
+        actual = []
+        for item in expected:
+            pipe_queue.put(item)
+            actual.append(pipe_queue.get())
+
+        # Test
+        assert actual == expected
+        assert pipe_queue.queue.empty()
+
+    def test_full_and_empty(self, pipe_queue: pipe_queue_wrapper.PipeQueueWrapper) -> None:
+        """
+        The queue is bounded by maxsize, not by the pipe buffer.
+        """
+        with pytest.raises(queue.Empty):
+            pipe_queue.get(timeout=0.01)
+
+        for i in range(pipe_queue.maxsize):
+            pipe_queue.put(i)
+
+        assert pipe_queue.queue.full()
+        assert pipe_queue.get_fill_ratio() == 1.0
+        with pytest.raises(queue.Full):
+            pipe_queue.put(0, timeout=0.01)
+
+    def test_get_batch(self, pipe_queue: pipe_queue_wrapper.PipeQueueWrapper) -> None:
+        """
+        Items already in the pipe are read at once, up to the maximum.
+        """
+        # Setup
+        for i in range(3):
+            pipe_queue.put(i)
+
+        # Run
+        first_batch = pipe_queue.get_batch(2)
+        second_batch = pipe_queue.get_batch(2)
+
+        # Test
+        assert first_batch == [0, 1]
+        assert second_batch == [2]
+        assert pipe_queue.queue.empty()
+        assert pipe_queue.metrics.snapshot().get_count == 3
+
+    def test_cross_process(self, pipe_queue: pipe_queue_wrapper.PipeQueueWrapper) -> None:
+        """
+        A worker process can produce more items than fit in the queue.
+        """
+        # Setup
+        count = 50
+        worker = mp.Process(target=producer, args=(pipe_queue, count))
+
+        # Run
+        worker.start()
+        actual = []
+        while True:
+            item = pipe_queue.get(timeout=5)
+            if item is None:
+                break
+            actual.append(item)
+        worker.join()
+
+        # Test
+        assert actual == list(range(count))
+        assert pipe_queue.metrics.snapshot().put_blocked_time > 0
+
+
+def test_pipeline_rejects_many_consumers() -> None:
+    """
+    A pipe queue read by a stage of several workers is invalid.
+    """
+    # Setup
+    result, test_logger = logger.Logger.create("test_pipe_queue_wrapper", False)
+    assert result
+    assert test_logger is not None
+    mp_manager = mp.Manager()
+    config = {
+        "queues": {"numbers": {"maxsize": 4, "transport": "pipe"}},
+        "stages": {
+            "producer": {"outputs": ["numbers"]},
+            "consumer": {"count": 2, "inputs": ["numbers"]},
+        },
+    }
+    result, worker_pipeline = pipeline.Pipeline.create(
+        mp_manager, worker_controller.WorkerController(), config, test_logger
+    )
+    assert result
+    assert worker_pipeline is not None
+    assert worker_pipeline.add_worker("producer", producer, ())
+    assert worker_pipeline.add_worker("consumer", consumer_worker, ())
+
+    # Run
+    result = worker_pipeline.build()
+
+    # Test
+    assert not result
+    mp_manager.shutdown()
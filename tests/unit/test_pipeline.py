@@ -0,0 +1,448 @@
+"""
+Test building pipelines of stages.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from utilities.workers import pipeline
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def producer_worker(
+    start: int,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts 3 numbers.
+    """
+    assert controller is not None
+    for i in range(start, start + 3):
+        output_queue.put(i)
+
+
+def doubler_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    factor: int = 2,
+) -> None:
+    """
+    Multiplies numbers until exit is requested.
+    """
+    while not controller.is_exit_requested():
+        try:
+            value = input_queue.get()
+        except queue_proxy_wrapper.QueueClosed:
+            break
+
+        if value is None:
+            continue
+
+        output_queue.put(value * factor)
+
+
+def flood_worker(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts numbers until exit is requested, blocking whenever the queue is full.
+    """
+    i = 0
+    while not controller.is_exit_requested():
+        output_queue.put(i)
+        i += 1
+
+
+def stuck_worker(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Ignores exit requests and never touches its queue.
+    """
+    assert output_queue is not None
+    assert controller is not None
+    while True:
+        time.sleep(1)
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the pipeline.
+    """
+    result, test_logger = logger.Logger.create("test_pipeline", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+@pytest.fixture()
+def mp_manager() -> "mp.managers.SyncManager":  # type: ignore
+    """
+    Manager for the queues.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+# Producer to doubler to main, stages declared out of order
+CONFIG = {
+    "queues": {
+        "numbers": {"maxsize": 10},
+        "results": {"maxsize": 10, "transport": "shared_memory"},
+    },
+    "stages": {
+        "doubler": {"inputs": ["numbers"], "outputs": ["results"]},
+        "producer": {"outputs": ["numbers"]},
+    },
+}
+
+
+def create_pipeline(
+    mp_manager: "mp.managers.SyncManager",
+    config: "dict | None",
+    local_logger: logger.Logger,
+) -> pipeline.Pipeline:
+    """
+    Creates the pipeline of the config with the producer and doubler workers.
+    """
+    result, worker_pipeline = pipeline.Pipeline.create(
+        mp_manager, worker_controller.WorkerController(), config, local_logger
+    )
+    assert result
+    assert worker_pipeline is not None
+
+    worker_pipeline.add_worker("doubler", doubler_worker, (), {"factor": 3})
+    worker_pipeline.add_worker("producer", producer_worker, (10,))
+    return worker_pipeline
+
+
+class TestPipeline:
+    """
+    Building, running, and stopping.
+    """
+
+    def test_run(self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger) -> None:
+        """
+        Items flow through the stages to main.
+        """
+        # Setup
+        worker_pipeline = create_pipeline(mp_manager, CONFIG, local_logger)
+
+        # Run
+        assert worker_pipeline.build()
+        worker_pipeline.start()
+        results_queue = worker_pipeline.get_output_queues()["results"]
+        results = [results_queue.get(timeout=10) for _ in range(3)]
+        worker_pipeline.stop()
+
+        # Test
+        assert worker_pipeline.get_stage_order() == ["producer", "doubler"]
+        assert results == [30, 33, 36]
+        for manager in worker_pipeline.get_managers():
+            for worker in manager.get_workers():
+                assert not worker.is_alive()
+
+    def test_stop_wakes_blocked_workers(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Workers blocked on full and empty queues stop within tens of milliseconds.
+        """
+        # Setup
+        config = {
+            "queues": {
+                "numbers": {"maxsize": 2},
+                "results": {"maxsize": 2, "transport": "shared_memory"},
+            },
+            "stages": {
+                "flood": {"outputs": ["numbers"]},
+                "doubler": {"count": 2, "inputs": ["numbers"], "outputs": ["results"]},
+            },
+        }
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager, worker_controller.WorkerController(), config, local_logger
+        )
+        assert result
+        assert worker_pipeline is not None
+        assert worker_pipeline.add_worker("flood", flood_worker, ())
+        assert worker_pipeline.add_worker("doubler", doubler_worker, ())
+        assert worker_pipeline.build()
+        worker_pipeline.start()
+
+        # Main does not read, so every worker ends up blocked
+        numbers_queue = worker_pipeline.get_queue("numbers")
+        assert numbers_queue is not None
+        while numbers_queue.get_fill_ratio() < 1.0:
+            time.sleep(0.01)
+
+        # Run
+        start = time.monotonic()
+        stop_times = worker_pipeline.stop()
+        total_time = time.monotonic() - start
+
+        # Test
+        assert set(stop_times.keys()) == {"flood", "doubler"}
+        assert max(stop_times.values()) <= total_time
+        assert total_time < 0.5
+        for manager in worker_pipeline.get_managers():
+            for worker in manager.get_workers():
+                assert not worker.is_alive()
+
+    def test_stop_terminates_stuck_workers(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Workers still running after the timeout are terminated instead of hanging the stop.
+        """
+        # Setup
+        config = {
+            "queues": {"numbers": {"maxsize": 2}},
+            "stages": {"stuck": {"outputs": ["numbers"]}},
+        }
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager, worker_controller.WorkerController(), config, local_logger
+        )
+        assert result
+        assert worker_pipeline is not None
+        assert worker_pipeline.add_worker("stuck", stuck_worker, ())
+        assert worker_pipeline.build()
+        worker_pipeline.start()
+
+        # Run
+        start = time.monotonic()
+        stop_times = worker_pipeline.stop(0.2)
+        total_time = time.monotonic() - start
+
+        # Test
+        assert stop_times["stuck"] >= 0.2
+        assert total_time < 2.0
+        for manager in worker_pipeline.get_managers():
+            for worker in manager.get_workers():
+                assert not worker.is_alive()
+
+    def test_config_graph(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        The config sets counts, queue sizes, transports, and edges, omitted keys take defaults.
+        """
+        # Setup
+        config = {
+            "queues": {
+                "numbers": {"maxsize": 4, "transport": "priority", "record_metrics": True},
+                "results": None,
+            },
+            "stages": {
+                "doubler": {"count": 2, "inputs": ["numbers"], "outputs": ["results"]},
+                "producer": {"outputs": ["numbers"]},
+            },
+        }
+        worker_pipeline = create_pipeline(mp_manager, config, local_logger)
+
+        # Run
+        assert worker_pipeline.build()
+
+        # Test
+        numbers_queue = worker_pipeline.get_queue("numbers")
+        results_queue = worker_pipeline.get_queue("results")
+        doubler_manager = worker_pipeline.get_manager("doubler")
+        producer_manager = worker_pipeline.get_manager("producer")
+        assert isinstance(numbers_queue, queue_proxy_wrapper.PriorityQueueProxyWrapper)
+        assert numbers_queue.maxsize == 4
+        assert numbers_queue.metrics is not None
+        assert results_queue is not None
+        assert not isinstance(results_queue, queue_proxy_wrapper.PriorityQueueProxyWrapper)
+        assert results_queue.maxsize == 0
+        assert results_queue.metrics is None
+        assert doubler_manager is not None
+        assert producer_manager is not None
+        assert doubler_manager.get_worker_count() == 2
+        assert producer_manager.get_worker_count() == 1
+        assert list(worker_pipeline.get_output_queues()) == ["results"]
+
+    def test_packed_types(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Packed types are given to the shared memory queue of the same name.
+        """
+        # Setup
+        config = {"queues": {"results": {"maxsize": 2, "transport": "shared_memory"}}}
+
+        # Run
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager,
+            worker_controller.WorkerController(),
+            config,
+            local_logger,
+            packed_types={"results": (telemetry.TelemetryData,)},
+        )
+
+        # Test
+        assert result
+        assert worker_pipeline is not None
+        results_queue = worker_pipeline.get_queue("results")
+        assert results_queue is not None
+        packed_types = results_queue._SharedMemoryQueueWrapper__packed_types  # type: ignore
+        results_queue.release()  # type: ignore
+        assert packed_types == (telemetry.TelemetryData,)
+
+    def test_unmapped_stages(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Workers of undeclared stages are unused, declared stages without a worker fail the build.
+        """
+        # Setup
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager, worker_controller.WorkerController(), CONFIG, local_logger
+        )
+        assert result
+        assert worker_pipeline is not None
+
+        # Run
+        declared = worker_pipeline.add_worker("producer", producer_worker, (10,))
+        undeclared = worker_pipeline.add_worker("tripler", doubler_worker, (), {"factor": 3})
+
+        # Test
+        assert declared
+        assert not undeclared
+        assert worker_pipeline.has_stage("doubler")
+        assert not worker_pipeline.has_stage("tripler")
+        assert not worker_pipeline.build()
+        worker_pipeline.get_queues()["results"].release()  # type: ignore
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            {"queues": {"results": {"transport": "pigeon"}}},
+            {"queues": {"results": {"overflow_policy": "shred"}}},
+            {"queues": {"results": {"maxsize": "5"}}},
+            {"queues": {"results": {"record_metrics": 1}}},
+            {"stages": {"doubler": {"count": 0}}},
+            {"stages": {"doubler": {"count": True}}},
+            {"stages": {"doubler": {"inputs": "numbers"}}},
+            {"stages": {"doubler": ["numbers"]}},
+            {"queues": ["results"]},
+        ],
+    )
+    def test_invalid_config(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger, config: "dict"
+    ) -> None:
+        """
+        Invalid values fail the creation.
+        """
+        # Run
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager, worker_controller.WorkerController(), config, local_logger
+        )
+
+        # Test
+        assert not result
+        assert worker_pipeline is None
+
+    def test_unknown_config_key(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        A misspelt key fails the creation instead of being ignored.
+        """
+        for config in [
+            {"queues": {"results": {"max_size": 4}}},
+            {"stages": {"doubler": {"workers": 2}}},
+        ]:
+            # Run
+            result, worker_pipeline = pipeline.Pipeline.create(
+                mp_manager, worker_controller.WorkerController(), config, local_logger
+            )
+
+            # Test
+            assert not result
+            assert worker_pipeline is None
+
+
+class TestValidation:
+    """
+    Topology errors.
+    """
+
+    def create_invalid_pipeline(
+        self,
+        mp_manager: "mp.managers.SyncManager",
+        local_logger: logger.Logger,
+        queue_names: "list[str]",
+        stages: "dict",
+    ) -> pipeline.Pipeline:
+        """
+        Creates the pipeline with every stage mapped to the doubler worker.
+        """
+        config = {"queues": {name: {"maxsize": 1} for name in queue_names}, "stages": stages}
+        result, worker_pipeline = pipeline.Pipeline.create(
+            mp_manager, worker_controller.WorkerController(), config, local_logger
+        )
+        assert result
+        assert worker_pipeline is not None
+        for name in stages:
+            assert worker_pipeline.add_worker(name, doubler_worker, ())
+
+        return worker_pipeline
+
+    def test_unknown_queue(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Stage uses a queue that was not declared.
+        """
+        worker_pipeline = self.create_invalid_pipeline(
+            mp_manager, local_logger, [], {"producer": {"outputs": ["missing"]}}
+        )
+
+        assert not worker_pipeline.build()
+
+    def test_queue_without_producer(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Nothing would ever fill the queue.
+        """
+        worker_pipeline = self.create_invalid_pipeline(
+            mp_manager,
+            local_logger,
+            ["numbers", "results"],
+            {"doubler": {"inputs": ["numbers"], "outputs": ["results"]}},
+        )
+
+        assert not worker_pipeline.build()
+
+    def test_cycle(
+        self, mp_manager: "mp.managers.SyncManager", local_logger: logger.Logger
+    ) -> None:
+        """
+        Stages feeding each other.
+        """
+        worker_pipeline = self.create_invalid_pipeline(
+            mp_manager,
+            local_logger,
+            ["a", "b"],
+            {
+                "first": {"inputs": ["a"], "outputs": ["b"]},
+                "second": {"inputs": ["b"], "outputs": ["a"]},
+            },
+        )
+
+        assert not worker_pipeline.build()
@@ -0,0 +1,174 @@
+"""
+Test the priority lanes of the queue wrapper.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+BULK_MAXSIZE = 16
+HIGH_PRIORITY_MAXSIZE = 4
+
+
+@pytest.fixture()
+def mp_manager() -> "mp.managers.SyncManager":  # type: ignore
+    """
+    Manager for the queues.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture()
+def wrapper(
+    mp_manager: "mp.managers.SyncManager",
+) -> queue_proxy_wrapper.PriorityQueueProxyWrapper:  # type: ignore
+    """
+    Bounded priority queue.
+    """
+    yield queue_proxy_wrapper.PriorityQueueProxyWrapper(  # type: ignore
+        mp_manager, BULK_MAXSIZE, HIGH_PRIORITY_MAXSIZE, record_metrics=True
+    )
+
+
+def delayed_high_priority_put(wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper) -> None:
+    """
+    Puts a high priority item after a delay.
+    """
+    time.sleep(0.2)
+    wrapper.put_high_priority("DISCONNECTED")
+
+
+class TestPriorityQueueProxyWrapper:
+    """
+    Lane ordering and capacity.
+    """
+
+    def test_high_priority_first(
+        self, wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        High priority items are taken before older normal items.
+        """
+        # Setup
+        wrapper.put("telemetry 1")
+        wrapper.put("telemetry 2")
+        wrapper.put_high_priority("DISCONNECTED")
+
+        # Run
+        items = [wrapper.get_nowait() for _ in range(3)]
+
+        # Test
+        assert items == ["DISCONNECTED", "telemetry 1", "telemetry 2"]
+        with pytest.raises(queue.Empty):
+            wrapper.get_nowait()
+
+    def test_reserved_capacity(
+        self, wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        A full normal lane does not block high priority items.
+        """
+        # Setup
+        for _ in range(BULK_MAXSIZE):
+            wrapper.put_nowait("telemetry")
+
+        # Run and test
+        with pytest.raises(queue.Full):
+            wrapper.put_nowait("telemetry")
+
+        for _ in range(HIGH_PRIORITY_MAXSIZE):
+            wrapper.put_high_priority("DISCONNECTED", block=False)
+
+        assert wrapper.get_fill_ratio() == 1.0
+        assert wrapper.get() == "DISCONNECTED"
+
+    def test_blocking_get_wakes_on_either_lane(
+        self, wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        A consumer waiting on both lanes wakes when a high priority item is put.
+        """
+        # Setup
+        producer = mp.Process(target=delayed_high_priority_put, args=(wrapper,))
+
+        # Run
+        producer.start()
+        start = time.monotonic()
+        item = wrapper.get(timeout=5)
+        wait_time = time.monotonic() - start
+        producer.join()
+
+        # Test
+        assert item == "DISCONNECTED"
+        assert wait_time < 1
+        with pytest.raises(queue.Empty):
+            wrapper.get(timeout=0.01)
+
+    def test_fill_and_drain(self, wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper) -> None:
+        """
+        Both lanes are drained, and stay usable.
+        """
+        # Setup
+        wrapper.put("telemetry")
+        wrapper.put_high_priority("DISCONNECTED")
+
+        # Run
+        wrapper.fill_and_drain_queue()
+        wrapper.put_high_priority("CONNECTED")
+
+        # Test
+        assert wrapper.queue.empty()
+        assert wrapper.get_nowait() == "CONNECTED"
+
+    def test_overtakes_full_normal_lane(
+        self, wrapper: queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        While the normal lane stays full, every high priority item is the next item taken.
+        """
+        # Setup
+        for i in range(BULK_MAXSIZE):
+            wrapper.put_nowait(f"telemetry {i}")
+
+        # Run
+        taken = []
+        for i in range(3 * BULK_MAXSIZE):
+            wrapper.put_high_priority(f"DISCONNECTED {i}", block=False)
+            taken.append(wrapper.get_nowait())
+            # Nothing was taken from the normal lane
+            assert wrapper.queue.full()
+
+        # Test
+        assert taken == [f"DISCONNECTED {i}" for i in range(3 * BULK_MAXSIZE)]
+        assert wrapper.high_priority_metrics.snapshot().put_count == 3 * BULK_MAXSIZE
+        assert [wrapper.get_nowait() for _ in range(BULK_MAXSIZE)] == [
+            f"telemetry {i}" for i in range(BULK_MAXSIZE)
+        ]
+
+    def test_without_lane(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Queues without a high priority lane accept high priority items like any other.
+        """
+        # Setup
+        plain_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 2, record_metrics=True)
+
+        # Run
+        plain_queue.put("CHANGE_ALTITUDE: 1.0")
+        plain_queue.put_high_priority("DISCONNECTED")
+
+        # Test
+        assert plain_queue.get_nowait() == "CHANGE_ALTITUDE: 1.0"
+        assert plain_queue.get_nowait() == "DISCONNECTED"
+        assert plain_queue.metrics.snapshot().put_count == 2
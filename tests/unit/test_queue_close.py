@@ -0,0 +1,280 @@
+"""
+Test closing queues for shutdown.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import pytest
+
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAXSIZE = 2
+# Generous bound on waking a process, which is expected to take about a millisecond
+WAKE_TIME_LIMIT = 0.05  # seconds
+
+
+@pytest.fixture(params=["manager", "shared_memory", "priority", "pipe"])
+def wrapper(request: pytest.FixtureRequest) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Bounded queue of each transport.
+    """
+    if request.param == "shared_memory":
+        shared_queue = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+            MAXSIZE, record_metrics=True
+        )
+        yield shared_queue  # type: ignore
+        shared_queue.release()
+        return
+
+    if request.param == "pipe":
+        yield pipe_queue_wrapper.PipeQueueWrapper(MAXSIZE, record_metrics=True)  # type: ignore
+        return
+
+    mp_manager = mp.Manager()
+    if request.param == "priority":
+        yield queue_proxy_wrapper.PriorityQueueProxyWrapper(  # type: ignore
+            mp_manager, MAXSIZE, MAXSIZE, record_metrics=True
+        )
+    else:
+        yield queue_proxy_wrapper.QueueProxyWrapper(  # type: ignore
+            mp_manager, MAXSIZE, record_metrics=True
+        )
+
+    mp_manager.shutdown()
+
+
+def blocked_consumer(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    wake_time: "mp.Value",  # type: ignore
+) -> None:
+    """
+    Waits on the empty queue and records when it was woken by the close.
+    """
+    try:
+        wrapper.get()
+    except queue_proxy_wrapper.QueueClosed:
+        wake_time.value = time.monotonic()
+
+
+def blocked_producer(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    wake_time: "mp.Value",  # type: ignore
+) -> None:
+    """
+    Waits on the full queue and records when it was woken by the close.
+    """
+    wrapper.put("late")
+    wake_time.value = time.monotonic()
+
+
+def sentinel_consumer(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    received: "mp.Value",  # type: ignore
+) -> None:
+    """
+    Waits on the empty queue and records whether it received a sentinel.
+    """
+    received.value = wrapper.get(timeout=5) is None
+
+
+def wait_for_blocked_time(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Gives the worker time to block.
+    """
+    time.sleep(0.2)
+    assert not wrapper.is_closed()
+
+
+class TestQueueClose:
+    """
+    Close and poison semantics.
+    """
+
+    def test_close_keeps_items(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Consumers receive the items left, then the close.
+        """
+        # Setup
+        wrapper.put(0)
+        wrapper.put(1)
+
+        # Run
+        wrapper.close()
+        wrapper.put(2)
+
+        # Test
+        assert wrapper.is_closed()
+        assert wrapper.get() == 0
+        assert wrapper.get_nowait() == 1
+        with pytest.raises(queue_proxy_wrapper.QueueClosed):
+            wrapper.get()
+
+        with pytest.raises(queue_proxy_wrapper.QueueClosed):
+            wrapper.get_nowait()
+
+        assert wrapper.metrics.snapshot().dropped_count == 1
+
+    def test_poison_discards_items(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Consumers stop at once.
+        """
+        # Setup
+        wrapper.put(0)
+        wrapper.put(1)
+
+        # Run
+        wrapper.poison()
+
+        # Test
+        with pytest.raises(queue.Empty):
+            wrapper.get(timeout=1)
+
+        assert wrapper.metrics.snapshot().dropped_count == 2
+
+    def test_close_wakes_consumer(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A consumer blocked without a timeout wakes immediately.
+        """
+        # Setup
+        wake_time = mp.Value("d", 0.0)
+        consumer = mp.Process(target=blocked_consumer, args=(wrapper, wake_time))
+        consumer.start()
+        wait_for_blocked_time(wrapper)
+
+        # Run
+        close_time = time.monotonic()
+        wrapper.close()
+        consumer.join(5)
+
+        # Test
+        assert consumer.exitcode == 0
+        assert 0.0 < wake_time.value - close_time < WAKE_TIME_LIMIT
+
+    def test_close_wakes_producer(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A producer blocked on a full queue wakes immediately and its item is dropped.
+        """
+        # Setup
+        for i in range(MAXSIZE):
+            wrapper.put(i)
+
+        wake_time = mp.Value("d", 0.0)
+        producer = mp.Process(target=blocked_producer, args=(wrapper, wake_time))
+        producer.start()
+        wait_for_blocked_time(wrapper)
+
+        # Run
+        close_time = time.monotonic()
+        wrapper.close()
+        producer.join(5)
+
+        # Test
+        assert producer.exitcode == 0
+        assert 0.0 < wake_time.value - close_time < WAKE_TIME_LIMIT
+        snapshot = wrapper.metrics.snapshot()
+        assert snapshot.put_count == MAXSIZE
+        assert snapshot.dropped_count == 1
+
+    def test_close_wakes_every_consumer(
+        self, wrapper: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        The close is passed on to every blocked consumer, not only the first.
+        """
+        # Setup
+        wake_times = [mp.Value("d", 0.0) for _ in range(3)]
+        consumers = [
+            mp.Process(target=blocked_consumer, args=(wrapper, wake_time))
+            for wake_time in wake_times
+        ]
+        for consumer in consumers:
+            consumer.start()
+
+        wait_for_blocked_time(wrapper)
+
+        # Run
+        close_time = time.monotonic()
+        wrapper.close()
+        for consumer in consumers:
+            consumer.join(5)
+
+        # Test
+        for consumer, wake_time in zip(consumers, wake_times):
+            assert consumer.exitcode == 0
+            assert 0.0 < wake_time.value - close_time < WAKE_TIME_LIMIT
+
+    def test_blocked_get_receives_item(
+        self, wrapper: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        An item put while a consumer waits wakes it, as before closing existed.
+        """
+        # Setup
+        wake_time = mp.Value("d", 0.0)
+        producer = mp.Process(target=blocked_producer, args=(wrapper, wake_time))
+
+        # Run
+        producer.start()
+        item = wrapper.get(timeout=5)
+        producer.join(5)
+
+        # Test
+        assert item == "late"
+        assert not wrapper.is_closed()
+
+
+def test_unbounded_queue_closes() -> None:
+    """
+    Closing does not depend on the queue size.
+    """
+    # Setup
+    mp_manager = mp.Manager()
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 0)
+    wake_time = mp.Value("d", 0.0)
+    consumer = mp.Process(target=blocked_consumer, args=(wrapper, wake_time))
+    consumer.start()
+    wait_for_blocked_time(wrapper)
+
+    # Run
+    close_time = time.monotonic()
+    wrapper.close()
+    consumer.join(5)
+
+    # Test
+    assert consumer.exitcode == 0
+    assert 0.0 < wake_time.value - close_time < WAKE_TIME_LIMIT
+    mp_manager.shutdown()
+
+
+def test_fill_and_drain_keeps_queue_usable(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    A waiting consumer receives a sentinel, and the queue is empty and open afterwards.
+    """
+    # Setup
+    received = mp.Value("b", 0)
+    consumer = mp.Process(target=sentinel_consumer, args=(wrapper, received))
+    consumer.start()
+    wait_for_blocked_time(wrapper)
+
+    # Run
+    wrapper.fill_and_drain_queue()
+    consumer.join(5)
+    wrapper.put("after")
+    item = wrapper.get(timeout=1)
+
+    # Test
+    assert received.value == 1
+    assert not wrapper.is_closed()
+    assert item == "after"
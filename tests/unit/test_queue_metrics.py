@@ -0,0 +1,257 @@
+"""
+Test queue metrics.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_metrics
+from utilities.workers import queue_metrics_reporter
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def wrapper() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Bounded shared memory queue, the metrics do not depend on the transport.
+    """
+    shared_queue = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(4, record_metrics=True)
+    yield shared_queue  # type: ignore
+    shared_queue.release()
+
+
+def delayed_producer(wrapper: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts items after a delay, so the consumer blocks.
+    """
+    time.sleep(0.1)
+    for i in range(count):
+        wrapper.put(i)
+
+
+class TestHistogram:
+    """
+    Log-linear latency buckets.
+    """
+
+    def test_bucket_bounds(self) -> None:
+        """
+        Every value falls into the bucket whose upper value is at least the value,
+        within the relative error.
+        """
+        previous_index = 0
+        for value in list(range(0, 5000)) + [10**6, 10**9, 2**35]:
+            index = queue_metrics.QueueMetrics.bucket_index(value)
+            upper = queue_metrics.QueueMetrics.bucket_upper_value(index)
+
+            assert index >= previous_index
+            assert value <= upper
+            assert upper - value <= value / 16
+            previous_index = index
+
+    def test_clamp(self) -> None:
+        """
+        Values above the range go into the last bucket.
+        """
+        index = queue_metrics.QueueMetrics.bucket_index(2**50)
+
+        assert index == queue_metrics.QueueMetrics.BUCKET_COUNT - 1
+
+    def test_percentiles(self) -> None:
+        """
+        Percentiles of recorded latencies.
+        """
+        # Setup
+        metrics = queue_metrics.QueueMetrics()
+        for latency_us in range(1, 101):
+            metrics.record_get(0, latency_us * 1000)
+
+        # Run
+        snapshot = metrics.snapshot()
+
+        # Test
+        assert snapshot.get_count == 100
+        assert snapshot.latency_max == 100
+        assert 50 <= snapshot.latency_percentile(50) <= 53  # type: ignore
+        assert 99 <= snapshot.latency_percentile(99) <= 103  # type: ignore
+        assert snapshot.latency_percentile(50, snapshot) is None
+
+
+class TestQueueProxyWrapperMetrics:
+    """
+    Counting through the wrapper.
+    """
+
+    def test_put_and_get(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items are unwrapped and counted.
+        """
+        # Run
+        wrapper.put("a")
+        wrapper.put_nowait("b")
+        first = wrapper.get()
+        second = wrapper.get_nowait()
+
+        # Test
+        snapshot = wrapper.metrics.snapshot()
+        assert first == "a"
+        assert second == "b"
+        assert snapshot.put_count == 2
+        assert snapshot.get_count == 2
+        assert sum(snapshot.latency_counts) == 2
+
+    def test_unstamped_item(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items put directly into the queue, like sentinels, are returned without latency.
+        """
+        # Run
+        wrapper.queue.put(None)
+        item = wrapper.get()
+
+        # Test
+        snapshot = wrapper.metrics.snapshot()
+        assert item is None
+        assert snapshot.get_count == 1
+        assert sum(snapshot.latency_counts) == 0
+
+    def test_full_and_empty(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Waiting on a full or empty queue counts as blocked time.
+        """
+        # Run
+        with pytest.raises(queue.Empty):
+            wrapper.get(timeout=0.05)
+
+        for i in range(wrapper.maxsize):
+            wrapper.put(i)
+
+        with pytest.raises(queue.Full):
+            wrapper.put(0, timeout=0.05)
+
+        with pytest.raises(queue.Full):
+            wrapper.put_nowait(0)
+
+        # Test
+        snapshot = wrapper.metrics.snapshot()
+        assert snapshot.put_count == wrapper.maxsize
+        assert snapshot.get_count == 0
+        assert snapshot.put_blocked_time >= 0.05e9
+        assert snapshot.get_blocked_time >= 0.05e9
+
+    def test_across_processes(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Counts from a producer process are visible in main.
+        """
+        # Setup
+        producer = mp.Process(target=delayed_producer, args=(wrapper, 3))
+
+        # Run
+        producer.start()
+        items = [wrapper.get(timeout=5) for _ in range(3)]
+        producer.join()
+
+        # Test
+        snapshot = wrapper.metrics.snapshot()
+        assert items == [0, 1, 2]
+        assert snapshot.put_count == 3
+        assert snapshot.get_count == 3
+        assert snapshot.get_blocked_time > 0
+
+
+def test_summarize(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Summary covers only the interval between snapshots.
+    """
+    # Setup
+    wrapper.put(0)
+    wrapper.get()
+    previous = wrapper.metrics.snapshot()
+    for i in range(2):
+        wrapper.put(i)
+        wrapper.get()
+
+    # Run
+    summary = queue_metrics_reporter.QueueMetricsReporter.summarize(
+        wrapper.metrics.snapshot(), previous, 2.0
+    )
+
+    # Test
+    assert summary.startswith("1.0 items/s")
+    assert "p99" in summary
+
+
+def increment_counters(counters: queue_metrics.SharedCounters, count: int) -> None:
+    """
+    Increments the first counter `count` times.
+    """
+    for _ in range(count):
+        counters.increment("first")
+
+
+class TestSharedCounters:
+    """
+    Named counters shared by processes.
+    """
+
+    def test_across_processes(self) -> None:
+        """
+        Counts from several processes add up in main.
+        """
+        # Setup
+        counters = queue_metrics.SharedCounters(["first", "second"])
+        workers = [mp.Process(target=increment_counters, args=(counters, 100)) for _ in range(3)]
+
+        # Run
+        for worker in workers:
+            worker.start()
+        counters.increment("second", 5)
+        for worker in workers:
+            worker.join()
+
+        # Test
+        assert counters.snapshot() == {"first": 300, "second": 5}
+
+    def test_reported(self) -> None:
+        """
+        Each report logs how much the counters grew since the previous one, with their totals.
+        """
+        # Setup
+        counters = queue_metrics.SharedCounters(["sent", "suppressed"])
+        result, test_logger = logger.Logger.create("test_queue_metrics", False)
+        assert result
+        assert test_logger is not None
+        messages = []
+        test_logger.info = lambda message, *args: messages.append(message)
+        result, reporter = queue_metrics_reporter.QueueMetricsReporter.create(
+            {}, 1.0, test_logger, {"governor": counters}
+        )
+        assert result
+        assert reporter is not None
+        start = time.monotonic()
+
+        # Run
+        counters.increment("sent", 3)
+        first_reported = reporter.run(start + 1.0)
+        counters.increment("sent")
+        counters.increment("suppressed", 2)
+        early_reported = reporter.run(start + 1.5)
+        second_reported = reporter.run(start + 2.0)
+
+        # Test
+        assert first_reported
+        assert not early_reported
+        assert second_reported
+        assert messages == [
+            "governor: sent 3 (total 3), suppressed 0 (total 0)",
+            "governor: sent 1 (total 4), suppressed 2 (total 2)",
+        ]
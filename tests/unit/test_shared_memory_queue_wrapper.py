@@ -0,0 +1,233 @@
+"""
+Test the shared memory queue.
+"""
+
+import multiprocessing as mp
+import pickle
+import queue
+
+import pytest
+
+from modules.telemetry import telemetry
+from utilities.workers import shared_memory_queue_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def shared_queue() -> shared_memory_queue_wrapper.SharedMemoryQueueWrapper:  # type: ignore
+    """
+    Creates a small shared memory queue.
+    """
+    wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(3, 256)
+    yield wrapper  # type: ignore
+    wrapper.release()
+
+
+def producer(wrapper: shared_memory_queue_wrapper.SharedMemoryQueueWrapper, count: int) -> None:
+    """
+    Puts `count` integers then a sentinel.
+    """
+    for i in range(count):
+        wrapper.queue.put(i)
+
+    wrapper.queue.put(None)
+
+
+def telemetry_producer(
+    wrapper: shared_memory_queue_wrapper.SharedMemoryQueueWrapper, count: int
+) -> None:
+    """
+    Puts `count` TelemetryData through the wrapper then a sentinel.
+    """
+    for i in range(count):
+        wrapper.put(telemetry.TelemetryData(time_since_boot=i, x=i / 2, yaw=-1.0))
+
+    wrapper.put(None)
+
+
+class TestSharedMemoryQueue:
+    """
+    Ring buffer behaviour.
+    """
+
+    def test_fifo_order_wraps_around(
+        self, shared_queue: shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ) -> None:
+        """
+        Items come out in order after the write index wraps around.
+        """
+        # Setup
+        expected = [0, "one", {"two": 2}, 3.0, None]
+
+        # Run
+        actual = []
+        for item in expected:
+            shared_queue.queue.put(item)
+            actual.append(shared_queue.queue.get())
+
+        # Test
+        assert actual == expected
+        assert shared_queue.queue.empty()
+
+    def test_full_and_empty(
+        self, shared_queue: shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ) -> None:
+        """
+        Non-blocking calls raise the standard queue exceptions.
+        """
+        with pytest.raises(queue.Empty):
+            shared_queue.queue.get(timeout=0.01)
+
+        for i in range(shared_queue.maxsize):
+            shared_queue.queue.put(i)
+
+        assert shared_queue.queue.full()
+        with pytest.raises(queue.Full):
+            shared_queue.queue.put(0, timeout=0.01)
+
+    def test_oversized_item(
+        self, shared_queue: shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ) -> None:
+        """
+        Items larger than a slot are rejected without consuming a slot.
+        """
+        assert shared_queue.fits(b"x" * 16)
+        assert not shared_queue.fits(b"x" * 1024)
+        with pytest.raises(ValueError):
+            shared_queue.queue.put(b"x" * 1024)
+
+        assert shared_queue.queue.qsize() == 0
+
+    def test_fill_and_drain(
+        self, shared_queue: shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ) -> None:
+        """
+        Same sentinel semantics as the manager queue.
+        """
+        shared_queue.fill_queue_with_sentinel()
+        assert shared_queue.queue.qsize() == shared_queue.maxsize
+        assert shared_queue.queue.get() is None
+
+        shared_queue.drain_queue()
+        assert shared_queue.queue.empty()
+
+    def test_cross_process(
+        self, shared_queue: shared_memory_queue_wrapper.SharedMemoryQueueWrapper
+    ) -> None:
+        """
+        A worker process can produce into the queue.
+        """
+        # Setup
+        count = 20
+        worker = mp.Process(target=producer, args=(shared_queue, count))
+
+        # Run
+        worker.start()
+        actual = []
+        while True:
+            item = shared_queue.queue.get(timeout=5)
+            if item is None:
+                break
+            actual.append(item)
+        worker.join()
+
+        # Test
+        assert actual == list(range(count))
+
+
+class TestPackedTypes:
+    """
+    Items sent in their fixed binary layout instead of pickled.
+    """
+
+    def test_packed_round_trip(self) -> None:
+        """
+        TelemetryData passes through a slot too small for its pickle, other items are pickled.
+        """
+        # Setup
+        slot_size = 8 + telemetry.TelemetryData.PACKED_SIZE
+        expected = telemetry.TelemetryData(1234, 1.0, 2.0, -3.0, yaw=3.1, yaw_speed=1.5)
+        assert len(pickle.dumps(expected, protocol=pickle.HIGHEST_PROTOCOL)) > slot_size
+        wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+            2, slot_size, packed_types=(telemetry.TelemetryData,), record_metrics=True
+        )
+
+        # Run
+        wrapper.put(expected)
+        wrapper.put("sentinel")
+        actual = wrapper.get(timeout=1)
+        sentinel = wrapper.get(timeout=1)
+        latency_count = sum(wrapper.metrics.snapshot().latency_counts)
+        wrapper.release()
+
+        # Test
+        assert isinstance(actual, telemetry.TelemetryData)
+        for name in telemetry.TelemetryData.__slots__:
+            assert getattr(actual, name) == getattr(expected, name), name
+        assert sentinel == "sentinel"
+        # Enqueue time is kept, so latency is still measured
+        assert latency_count == 2
+
+    def test_packed_without_metrics(self) -> None:
+        """
+        Items are packed without a stamp when the queue does not record metrics.
+        """
+        # Setup
+        slot_size = 8 + telemetry.TelemetryData.PACKED_SIZE
+        expected = telemetry.TelemetryData(1234, 1.0, 2.0, -3.0)
+        wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+            2, slot_size, packed_types=(telemetry.TelemetryData,)
+        )
+
+        # Run
+        fits = wrapper.fits(expected)
+        wrapper.put(expected)
+        actual = wrapper.get(timeout=1)
+        wrapper.release()
+
+        # Test
+        assert wrapper.metrics is None
+        assert fits
+        assert isinstance(actual, telemetry.TelemetryData)
+        for name in telemetry.TelemetryData.__slots__:
+            assert getattr(actual, name) == getattr(expected, name), name
+
+    def test_packed_type_too_large(self) -> None:
+        """
+        A packed type that does not fit in a slot fails when the queue is created.
+        """
+        with pytest.raises(AssertionError):
+            shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+                2, telemetry.TelemetryData.PACKED_SIZE, packed_types=(telemetry.TelemetryData,)
+            )
+
+    def test_packed_cross_process(self) -> None:
+        """
+        A worker process can produce packed items.
+        """
+        # Setup
+        count = 20
+        wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+            4, packed_types=(telemetry.TelemetryData,)
+        )
+        worker = mp.Process(target=telemetry_producer, args=(wrapper, count))
+
+        # Run
+        worker.start()
+        actual = []
+        while True:
+            item = wrapper.get(timeout=5)
+            if item is None:
+                break
+            actual.append(item)
+        worker.join()
+        wrapper.release()
+
+        # Test
+        assert [data.time_since_boot for data in actual] == list(range(count))
+        assert [data.x for data in actual] == [i / 2 for i in range(count)]
+        assert all(data.y is None for data in actual)
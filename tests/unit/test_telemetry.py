@@ -0,0 +1,381 @@
+"""
+Test receiving telemetry from a connection.
+"""
+
+import select
+import socket
+import threading
+import time
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.common.modules.logger import logger
+from modules.telemetry import message_id_filter
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+WANTED_IDS = {common.MAVLINK_MSG_ID_ATTITUDE, common.MAVLINK_MSG_ID_LOCAL_POSITION_NED}
+RECEIVE_TIMEOUT = 1.0  # seconds
+# Generous bound on waking a thread, which is expected to take about a millisecond
+WAKE_TIME_LIMIT = 0.05  # seconds
+
+
+class MockConnection:
+    """
+    Direct connection which parses prepared reads with a real MAVLink parser,
+    one read per call like a UDP mavfile.
+    """
+
+    def __init__(self, reads: "list[bytes]") -> None:
+        self.mav = common.MAVLink(None)
+        self.reads = reads
+        self.select_count = 0
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Parses the next read.
+        """
+        data = self.reads.pop(0) if len(self.reads) > 0 else b""
+        return self.mav.parse_char(data)
+
+    # pylint: disable-next=unused-argument
+    def select(self, timeout: float) -> bool:
+        """
+        Nothing more arrives.
+        """
+        self.select_count += 1
+        return False
+
+
+class MockClock:
+    """
+    Monotonic clock which only advances when told to.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """
+        Current time in seconds.
+        """
+        return self.now
+
+
+class SilentConnection:
+    """
+    Connection on which nothing arrives, select() waits on the mock clock.
+    """
+
+    def __init__(self, clock: MockClock, select_step: float) -> None:
+        self.clock = clock
+        self.select_step = select_step
+        self.select_timeouts = []
+        self.recv_count = 0
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> None:
+        """
+        Nothing was received.
+        """
+        self.recv_count += 1
+
+    def select(self, timeout: float) -> bool:
+        """
+        Records the timeout and advances the clock by at most the step,
+        as if a read woke it early.
+        """
+        self.select_timeouts.append(timeout)
+        self.clock.now += min(timeout, self.select_step)
+        return False
+
+
+class SocketConnection:
+    """
+    Connection reading from a socket, select() sleeps until it is readable.
+    """
+
+    def __init__(self, receiver: socket.socket) -> None:
+        self.mav = common.MAVLink(None)
+        self.receiver = receiver
+        self.receiver.setblocking(False)
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Parses what has been received, like mavfile.recv_msg().
+        """
+        try:
+            data = self.receiver.recv(1024)
+        except BlockingIOError:
+            data = b""
+
+        return self.mav.parse_char(data)
+
+    def select(self, timeout: float) -> bool:
+        """
+        Waits for the socket to become readable.
+        """
+        readable, _, _ = select.select([self.receiver], [], [], timeout)
+        return len(readable) > 0
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for telemetry.
+    """
+    result, test_logger = logger.Logger.create("test_telemetry", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def encode(*messages: common.MAVLink_message, mavlink1: bool = False) -> bytes:
+    """
+    Returns the frames of the messages, as sent by a drone.
+    """
+    sender = common.MAVLink(None, 1, 1)
+    return b"".join(message.pack(sender, force_mavlink1=mavlink1) for message in messages)
+
+
+def heartbeat() -> common.MAVLink_heartbeat_message:
+    """
+    Message telemetry does not want.
+    """
+    return common.MAVLink_heartbeat_message(2, 3, 0, 0, 4, 3)
+
+
+def attitude(time_ms: int) -> common.MAVLink_attitude_message:
+    """
+    ATTITUDE with angles from the time.
+    """
+    return common.MAVLink_attitude_message(time_ms, 0.1, 0.2, time_ms / 1000, 0.0, 0.0, 0.5)
+
+
+def local_position(time_ms: int) -> common.MAVLink_local_position_ned_message:
+    """
+    LOCAL_POSITION_NED with positions from the time.
+    """
+    return common.MAVLink_local_position_ned_message(
+        time_ms, time_ms / 100, 2.0, -3.0, 1.0, 0.0, 0.0
+    )
+
+
+class TestMessageIdFilter:
+    """
+    Skipping messages by ID before decoding.
+    """
+
+    @pytest.mark.parametrize("mavlink1", [False, True])
+    def test_skips_before_decoding(self, mavlink1: bool) -> None:
+        """
+        Only wanted messages are decoded, and those behind skipped ones are returned at once.
+        """
+        # Setup
+        mav = common.MAVLink(None)
+        decoded_ids = []
+        decode = mav.decode
+        mav.decode = lambda frame: (
+            decoded_ids.append(message_id_filter.MessageIdFilter.get_message_id(frame))
+            or decode(frame)
+        )
+        id_filter = message_id_filter.MessageIdFilter(mav, WANTED_IDS)
+        data = encode(
+            heartbeat(),
+            heartbeat(),
+            attitude(100),
+            heartbeat(),
+            local_position(110),
+            heartbeat(),
+            mavlink1=mavlink1,
+        )
+
+        # Run
+        first = mav.parse_char(data)
+        second = mav.parse_char(b"")
+        last = mav.parse_char(b"")
+
+        # Test
+        assert first.get_type() == "ATTITUDE"
+        assert second.get_type() == "LOCAL_POSITION_NED"
+        assert last is None
+        assert decoded_ids == [
+            common.MAVLINK_MSG_ID_ATTITUDE,
+            common.MAVLINK_MSG_ID_LOCAL_POSITION_NED,
+        ]
+        assert id_filter.skipped_count == 4
+
+    def test_partial_frame(self) -> None:
+        """
+        A wanted message split across reads is returned once complete.
+        """
+        # Setup
+        mav = common.MAVLink(None)
+        message_id_filter.MessageIdFilter(mav, WANTED_IDS)
+        data = encode(heartbeat(), attitude(100))
+        split = len(data) - 5
+
+        # Run
+        partial = mav.parse_char(data[:split])
+        complete = mav.parse_char(data[split:])
+
+        # Test
+        assert partial is None
+        assert complete.time_boot_ms == 100
+
+
+class TestTelemetryDispatch:
+    """
+    Dispatching received messages to their handlers by ID.
+    """
+
+    def test_combines_latest(self, local_logger: logger.Logger) -> None:
+        """
+        Each message goes to the handler of its ID, and other messages are ignored.
+        """
+        # Setup
+        connection = MockConnection(
+            [encode(heartbeat(), attitude(100), heartbeat(), attitude(120), local_position(110))]
+        )
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+        assert telemetry_instance is not None
+
+        # Run
+        data = telemetry_instance.run()
+
+        # Test
+        assert data is not None
+        assert data.time_since_boot == 120
+        assert data.x == pytest.approx(1.1)
+        assert data.z == pytest.approx(-3.0)
+        # From the latest ATTITUDE
+        assert data.yaw == pytest.approx(0.12)
+        assert data.yaw_speed == pytest.approx(0.5)
+        assert telemetry_instance._Telemetry__message_filter.skipped_count == 2
+
+    def test_skipped_reads(self, local_logger: logger.Logger) -> None:
+        """
+        Reads of skipped messages are followed by the next read without waiting.
+        """
+        # Setup
+        reads = [encode(heartbeat()), encode(attitude(100)), encode(heartbeat())] * 2
+        connection = MockConnection(reads + [encode(local_position(110))])
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+        assert telemetry_instance is not None
+
+        # Run
+        data = telemetry_instance.run()
+
+        # Test
+        assert data is not None
+        assert data.time_since_boot == 110
+        assert connection.select_count == 0
+
+    def test_handlers_by_id(self, local_logger: logger.Logger) -> None:
+        """
+        The handlers cover exactly the IDs the connection decodes.
+        """
+        # Setup
+        connection = MockConnection([])
+
+        # Run
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+
+        # Test
+        assert result
+        assert telemetry_instance is not None
+        assert set(telemetry_instance._Telemetry__handlers) == WANTED_IDS
+
+
+class TestTelemetryWait:
+    """
+    Waiting on the connection for messages until the deadline.
+    """
+
+    def test_select_remaining_deadline(
+        self, local_logger: logger.Logger, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Each wait is for the time left until the deadline, with one receive attempt per wake.
+        """
+        # Setup
+        clock = MockClock()
+        monkeypatch.setattr(telemetry, "time", clock)
+        connection = SilentConnection(clock, 0.3)
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+        assert telemetry_instance is not None
+
+        # Run
+        data = telemetry_instance.run()
+
+        # Test
+        assert data is None
+        assert connection.select_timeouts == pytest.approx([1.0, 0.7, 0.4, 0.1])
+        assert connection.recv_count == len(connection.select_timeouts)
+        # Gave up at the deadline, not a step later
+        assert clock.now == pytest.approx(RECEIVE_TIMEOUT)
+
+    def test_returns_on_time(self, local_logger: logger.Logger) -> None:
+        """
+        Without messages, run() sleeps until the deadline and returns right after it.
+        """
+        # Setup
+        receiver, sender = socket.socketpair()
+        connection = SocketConnection(receiver)
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+        assert telemetry_instance is not None
+
+        # Run
+        start = time.monotonic()
+        cpu_start = time.process_time()
+        data = telemetry_instance.run()
+        elapsed = time.monotonic() - start
+        cpu_time = time.process_time() - cpu_start
+        receiver.close()
+        sender.close()
+
+        # Test
+        assert data is None
+        assert RECEIVE_TIMEOUT <= elapsed < RECEIVE_TIMEOUT + WAKE_TIME_LIMIT
+        # Slept instead of polling
+        assert cpu_time < 0.1
+
+    def test_wakes_when_readable(self, local_logger: logger.Logger) -> None:
+        """
+        run() returns as soon as the messages arrive, not at its next check.
+        """
+        # Setup
+        delay = 0.2
+        receiver, sender = socket.socketpair()
+        connection = SocketConnection(receiver)
+        result, telemetry_instance = telemetry.Telemetry.create(connection, local_logger)
+        assert result
+        assert telemetry_instance is not None
+        timer = threading.Timer(
+            delay, sender.sendall, args=(encode(attitude(100), local_position(110)),)
+        )
+
+        # Run
+        start = time.monotonic()
+        timer.start()
+        data = telemetry_instance.run()
+        elapsed = time.monotonic() - start
+        timer.join()
+        receiver.close()
+        sender.close()
+
+        # Test
+        assert data is not None
+        assert data.time_since_boot == 110
+        assert delay <= elapsed < delay + WAKE_TIME_LIMIT
@@ -0,0 +1,201 @@
+"""
+Test the columnar telemetry batch.
+"""
+
+import math
+import queue
+
+import pytest
+from pymavlink.dialects.v20 import common
+
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_batch
+from modules.telemetry import telemetry_worker
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class MockClock:
+    """
+    Time of the worker, only advanced by the drone.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def time(self) -> float:
+        """
+        Returns the simulated time in seconds.
+        """
+        return self.now
+
+
+class MockDrone:
+    """
+    Sends a script of messages, a float in the script is a gap of that many seconds.
+    Closed once the script runs out, like a routed connection at shutdown.
+    """
+
+    def __init__(self, script: "list[object]", clock: MockClock) -> None:
+        self.script = script
+        self.clock = clock
+        self.closed = False
+
+    # pylint: disable-next=unused-argument
+    def recv_match(self, **kwargs: object) -> "object | None":
+        """
+        Returns the next message, None during a gap or once closed.
+        """
+        if len(self.script) == 0:
+            self.closed = True
+            return None
+
+        item = self.script.pop(0)
+        if isinstance(item, float):
+            self.clock.now += item
+            return None
+
+        return item
+
+    def select(self, timeout: float) -> bool:
+        """
+        Messages are always ready.
+        """
+        return timeout > 0
+
+
+def sample_messages(time_ms: int) -> "list[object]":
+    """
+    Attitude and position making up one sample.
+    """
+    return [
+        common.MAVLink_attitude_message(time_ms, 0.0, 0.0, 0.5, 0.0, 0.0, 0.0),
+        common.MAVLink_local_position_ned_message(time_ms, 1.0, 2.0, 3.0, 0.1, 0.2, 0.3),
+    ]
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> MockClock:  # type: ignore
+    """
+    Replaces the time of the worker.
+    """
+    mock_clock = MockClock()
+    monkeypatch.setattr(telemetry_worker, "time", mock_clock)
+    yield mock_clock  # type: ignore
+
+
+def run_worker(
+    script: "list[object]",
+    clock: MockClock,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    batch_size: int,
+    batch_window: float,
+) -> "list[telemetry_batch.TelemetryBatch]":
+    """
+    Runs the worker until the script runs out.
+
+    Returns the batches it sent.
+    """
+    telemetry_worker.telemetry_worker(
+        MockDrone(script, clock),
+        output_queue,
+        worker_controller.WorkerController(),
+        batch_size=batch_size,
+        batch_window=batch_window,
+    )
+
+    batches = []
+    while True:
+        try:
+            batches.append(output_queue.get_nowait())
+        except queue.Empty:
+            return batches
+
+
+class TestTelemetryBatch:
+    """
+    Conversion between samples and columns.
+    """
+
+    def test_columns_and_latest(self) -> None:
+        """
+        Columns are in sample order and the latest sample is the last one.
+        """
+        # Setup
+        samples = [
+            telemetry.TelemetryData(100, 0.0, 0.0, 0.0, 1.0, 2.0, 3.0),
+            telemetry.TelemetryData(200, 1.0, 0.0, 0.0, 3.0, 4.0, 5.0, yaw=0.5),
+        ]
+
+        # Run
+        batch = telemetry_batch.TelemetryBatch.from_samples(samples)
+        latest = batch.latest()
+
+        # Test
+        assert len(batch) == 2
+        assert list(batch.x_velocity) == [1.0, 3.0]
+        assert math.isnan(batch.yaw[0])
+        assert latest.time_since_boot == 200
+        assert isinstance(latest.time_since_boot, int)
+        assert math.isclose(latest.yaw, 0.5)
+        assert latest.roll is None
+
+
+class TestTelemetryWorkerBatching:
+    """
+    Batches sent by the worker.
+    """
+
+    def test_full_batches_and_flush_on_exit(self, clock: MockClock) -> None:
+        """
+        Full batches are sent as they fill, and the partial batch when the connection closes.
+        """
+        # Setup
+        script = []
+        for i in range(7):
+            script += sample_messages(i * 100)
+
+        # Run
+        batches = run_worker(script, clock, pipe_queue_wrapper.PipeQueueWrapper(10), 3, 0.0)
+
+        # Test
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert [batch.latest().time_since_boot for batch in batches] == [200, 500, 600]
+
+    def test_window(self, clock: MockClock) -> None:
+        """
+        A partial batch is sent once its oldest sample has waited for the window.
+        """
+        # Setup
+        script = sample_messages(0) + sample_messages(100) + [0.5] + sample_messages(600)
+        script += sample_messages(700) + sample_messages(800)
+
+        # Run
+        batches = run_worker(script, clock, pipe_queue_wrapper.PipeQueueWrapper(10), 100, 0.25)
+
+        # Test
+        assert [len(batch) for batch in batches] == [3, 2]
+        assert [batch.latest().time_since_boot for batch in batches] == [600, 800]
+
+    def test_batch_larger_than_slot(self, clock: MockClock) -> None:
+        """
+        The worker does not start if a batch would not fit in a shared memory slot.
+        """
+        # Setup
+        script = sample_messages(0)
+        output_queue = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(4)
+
+        # Run
+        batches = run_worker(script, clock, output_queue, 100, 0.0)
+        output_queue.release()
+
+        # Test
+        assert len(batches) == 0
+        assert len(script) == 2
@@ -0,0 +1,87 @@
+"""
+Test the binary encoding of TelemetryData.
+"""
+
+import pickle
+
+import pytest
+
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def full_data() -> telemetry.TelemetryData:  # type: ignore
+    """
+    TelemetryData with every field set.
+    """
+    data = telemetry.TelemetryData(
+        1234, 1.0, 2.0, -3.0, 0.5, 0.0, -0.5, 0.1, 0.2, 3.1, 0.0, 0.0, 1.5
+    )
+    yield data  # type: ignore
+
+
+def assert_same(actual: telemetry.TelemetryData, expected: telemetry.TelemetryData) -> None:
+    """
+    Compares every field.
+    """
+    for name in telemetry.TelemetryData.__slots__:
+        assert getattr(actual, name) == getattr(expected, name), name
+
+
+class TestTelemetryDataEncoding:
+    """
+    Round trips through the fixed binary layout.
+    """
+
+    def test_round_trip(self, full_data: telemetry.TelemetryData) -> None:
+        """
+        All fields survive encoding.
+        """
+        # Run
+        encoded = full_data.to_bytes()
+        actual = telemetry.TelemetryData.from_buffer(encoded)
+
+        # Test
+        assert len(encoded) == telemetry.TelemetryData.PACKED_SIZE
+        assert_same(actual, full_data)
+
+    def test_none_fields(self) -> None:
+        """
+        None is preserved, including a None timestamp.
+        """
+        # Setup
+        expected = telemetry.TelemetryData(x=0.0, yaw=-1.0)
+
+        # Run
+        actual = telemetry.TelemetryData.from_buffer(expected.to_bytes())
+
+        # Test
+        assert_same(actual, expected)
+        assert actual.time_since_boot is None
+        assert actual.x == 0.0
+
+    def test_from_memoryview_offset(self, full_data: telemetry.TelemetryData) -> None:
+        """
+        Decodes from a memoryview at an offset, as done for shared memory slots.
+        """
+        # Setup
+        offset = 16
+        buffer = bytearray(offset + telemetry.TelemetryData.PACKED_SIZE)
+        full_data.pack_into(memoryview(buffer), offset)
+
+        # Run
+        actual = telemetry.TelemetryData.from_buffer(memoryview(buffer), offset)
+
+        # Test
+        assert_same(actual, full_data)
+
+    def test_smaller_than_pickle(self, full_data: telemetry.TelemetryData) -> None:
+        """
+        Binary encoding is more compact than pickling the object.
+        """
+        assert len(full_data.to_bytes()) < len(pickle.dumps(full_data))
@@ -0,0 +1,106 @@
+"""
+Test time alignment of attitude and position.
+"""
+
+import math
+
+from pymavlink.dialects.v20 import common
+
+from modules.telemetry import telemetry_fusion
+
+
+def attitude(time_ms: int, yaw: float, yaw_speed: float = 0.0) -> common.MAVLink_attitude_message:
+    """
+    ATTITUDE message with only yaw set.
+    """
+    return common.MAVLink_attitude_message(time_ms, 0.0, 0.0, yaw, 0.0, 0.0, yaw_speed)
+
+
+def position(
+    time_ms: int, x: float, x_velocity: float
+) -> common.MAVLink_local_position_ned_message:
+    """
+    LOCAL_POSITION_NED message moving along x.
+    """
+    return common.MAVLink_local_position_ned_message(time_ms, x, 0.0, 0.0, x_velocity, 0.0, 0.0)
+
+
+class TestTelemetryFusion:
+    """
+    Interpolation, extrapolation and output rate.
+    """
+
+    def test_interpolates_slower_stream(self) -> None:
+        """
+        Position (slower) is interpolated to the attitude (faster) timestamp.
+        """
+        # Setup
+        fusion = telemetry_fusion.TelemetryFusion(0)
+        fusion.add_local_position(position(0, 0.0, 1.0))
+        fusion.add_local_position(position(500, 0.5, 1.0))
+        for time_ms in [0, 100, 200, 300]:
+            fusion.add_attitude(attitude(time_ms, 0.0))
+
+        # Run
+        fused = fusion.fuse()
+
+        # Test
+        assert fused is not None
+        output_time, fused_position, _ = fused
+        assert output_time == 300
+        assert math.isclose(fused_position[0], 0.3)
+
+    def test_extrapolates_with_velocity(self) -> None:
+        """
+        Past the newest position sample, position moves with the reported velocity.
+        """
+        # Setup
+        fusion = telemetry_fusion.TelemetryFusion(0)
+        fusion.add_local_position(position(0, 0.0, 2.0))
+        fusion.add_attitude(attitude(250, 0.0))
+
+        # Run
+        fused = fusion.fuse()
+
+        # Test
+        assert fused is not None
+        _, fused_position, _ = fused
+        assert math.isclose(fused_position[0], 0.5)
+
+    def test_yaw_shortest_arc(self) -> None:
+        """
+        Yaw across +-pi interpolates through pi rather than through 0.
+        """
+        # Setup
+        fusion = telemetry_fusion.TelemetryFusion(0)
+        fusion.add_attitude(attitude(0, math.pi - 0.1))
+        fusion.add_attitude(attitude(1000, -math.pi + 0.1))
+        for time_ms in [0, 100, 200, 300, 400, 500]:
+            fusion.add_local_position(position(time_ms, 0.0, 0.0))
+
+        # Run
+        fused = fusion.fuse()
+
+        # Test
+        assert fused is not None
+        _, _, fused_attitude = fused
+        assert math.isclose(abs(fused_attitude[2]), math.pi, abs_tol=1e-9)
+
+    def test_output_rate(self) -> None:
+        """
+        Outputs are at least one output period apart in drone time.
+        """
+        # Setup
+        fusion = telemetry_fusion.TelemetryFusion(5)  # 200 ms period
+        fusion.add_local_position(position(0, 0.0, 0.0))
+
+        # Run
+        output_times = []
+        for time_ms in range(0, 1000, 50):
+            fusion.add_attitude(attitude(time_ms, 0.0))
+            fused = fusion.fuse()
+            if fused is not None:
+                output_times.append(fused[0])
+
+        # Test
+        assert output_times == [0, 200, 400, 600, 800]
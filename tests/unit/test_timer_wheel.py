@@ -0,0 +1,103 @@
+"""
+Test expiring deadlines with a hashed timer wheel.
+"""
+
+import pytest
+
+from modules.heartbeat import timer_wheel
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def wheel() -> timer_wheel.TimerWheel:  # type: ignore
+    """
+    Wheel of 8 slots of 0.1 s, starting at 0.
+    """
+    result, test_wheel = timer_wheel.TimerWheel.create(0.1, 8, 0.0)
+    assert result
+    assert test_wheel is not None
+    yield test_wheel  # type: ignore
+
+
+def test_invalid_wheel() -> None:
+    """
+    A non-positive tick or slot count is rejected.
+    """
+    result, test_wheel = timer_wheel.TimerWheel.create(0.0, 8, 0.0)
+    assert not result
+    assert test_wheel is None
+
+
+def test_expire_after_deadline(wheel: timer_wheel.TimerWheel) -> None:
+    """
+    Keys expire once the time passes their deadline, within the same tick.
+    """
+    # Setup
+    wheel.schedule("a", 0.25)
+    wheel.schedule("b", 0.55)
+
+    # Run
+    before = wheel.advance(0.25)
+    first = wheel.advance(0.26)
+    second = wheel.advance(0.6)
+
+    # Test
+    assert before == []
+    assert first == ["a"]
+    assert second == ["b"]
+    assert len(wheel) == 0
+
+
+def test_reschedule_and_cancel(wheel: timer_wheel.TimerWheel) -> None:
+    """
+    Rescheduling replaces the deadline, cancelling removes it.
+    """
+    # Setup
+    wheel.schedule("a", 0.15)
+    wheel.schedule("b", 0.15)
+    wheel.schedule("a", 0.45)
+    wheel.cancel("b")
+
+    # Run
+    early = wheel.advance(0.3)
+    late = wheel.advance(0.5)
+
+    # Test
+    assert early == []
+    assert late == ["a"]
+
+
+def test_deadline_past_revolution(wheel: timer_wheel.TimerWheel) -> None:
+    """
+    A deadline more than a revolution away stays until its revolution.
+    """
+    # Setup
+    wheel.schedule("far", 1.25)
+
+    # Run
+    first_revolution = wheel.advance(0.9)
+    second_revolution = wheel.advance(1.3)
+
+    # Test
+    assert first_revolution == []
+    assert second_revolution == ["far"]
+
+
+def test_deadline_already_passed(wheel: timer_wheel.TimerWheel) -> None:
+    """
+    A deadline in a tick already advanced past expires on the next advance, even after a jump.
+    """
+    # Setup
+    wheel.advance(0.5)
+    wheel.schedule("late", 0.1)
+    wheel.schedule("other", 0.75)
+
+    # Run
+    expired = wheel.advance(5.0)
+
+    # Test
+    assert sorted(expired) == ["late", "other"]  # type: ignore
@@ -0,0 +1,110 @@
+"""
+Test the streaming velocity statistics.
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from modules.command import velocity_statistics
+
+
+def random_velocities(count: int) -> np.ndarray:
+    """
+    Velocities with a large offset, where naive sums lose precision.
+    """
+    generator = random.Random(0)
+    return np.array(
+        [[1e6 + generator.uniform(-1, 1) for _ in range(3)] for _ in range(count)],
+        dtype=np.float64,
+    )
+
+
+def test_base_is_abstract() -> None:
+    """
+    The base class cannot be used without update() and mean().
+    """
+    with pytest.raises(TypeError):
+        # pylint: disable-next=abstract-class-instantiated
+        velocity_statistics.VelocityStatistics()  # type: ignore
+
+
+class TestWelfordStatistics:
+    """
+    Lifetime mean and variance.
+    """
+
+    def test_matches_numpy(self) -> None:
+        """
+        Sample by sample and batched updates agree with the two pass result.
+        """
+        # Setup
+        velocities = random_velocities(1000)
+        single = velocity_statistics.WelfordStatistics()
+        batched = velocity_statistics.WelfordStatistics()
+
+        # Run
+        for velocity in velocities[:500]:
+            single.update(tuple(velocity))
+        batched.update_batch(velocities[:500])
+        for velocity in velocities[500:]:
+            single.update(tuple(velocity))
+        batched.update_batch(velocities[500:])
+
+        # Test
+        expected_mean = velocities.mean(axis=0)
+        expected_variance = velocities.var(axis=0, ddof=1)
+        for statistics in [single, batched]:
+            assert statistics.count == 1000
+            for actual, expected in zip(statistics.mean(), expected_mean):
+                assert math.isclose(actual, expected, rel_tol=1e-12)
+            for actual, expected in zip(statistics.variance(), expected_variance):
+                assert math.isclose(actual, expected, rel_tol=1e-6)
+
+
+class TestExponentialStatistics:
+    """
+    Exponentially weighted mean.
+    """
+
+    def test_converges_to_step(self) -> None:
+        """
+        After a step change the mean approaches the new value.
+        """
+        # Setup
+        statistics = velocity_statistics.ExponentialStatistics(0.5)
+
+        # Run
+        statistics.update((0.0, 0.0, 0.0))
+        for _ in range(20):
+            statistics.update((1.0, 2.0, 3.0))
+
+        # Test
+        for actual, expected in zip(statistics.mean(), (1.0, 2.0, 3.0)):
+            assert math.isclose(actual, expected, rel_tol=1e-5)
+
+
+class TestWindowedStatistics:
+    """
+    Mean of the most recent samples.
+    """
+
+    def test_window_mean(self) -> None:
+        """
+        Only the last `window` samples count, including before the window is full.
+        """
+        # Setup
+        statistics = velocity_statistics.WindowedStatistics(3)
+
+        # Run and test
+        assert statistics.mean() == (0.0, 0.0, 0.0)
+
+        statistics.update((3.0, 0.0, 0.0))
+        assert statistics.mean() == (3.0, 0.0, 0.0)
+
+        for x in [6.0, 9.0, 12.0, 15.0]:
+            statistics.update((x, 0.0, 0.0))
+
+        assert math.isclose(statistics.mean()[0], 12.0)
@@ -0,0 +1,91 @@
+"""
+Test scaling workers with queue depth.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def idle_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Does nothing until asked to exit, leaving the input queue as it is.
+    """
+    assert input_queue is not None
+    while not controller.is_exit_requested():
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the managers.
+    """
+    result, test_logger = logger.Logger.create("test_worker_autoscaler", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def test_scale_up_and_down(local_logger: logger.Logger) -> None:
+    """
+    Workers are added while the queue is full and retired once it empties.
+    """
+    # Setup
+    mp_manager = mp.Manager()
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 4)
+    controller = worker_controller.WorkerController()
+    result, properties = worker_manager.WorkerProperties.create(
+        1, idle_worker, (), [input_queue], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+    manager.start_workers()
+    result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+        manager, 1, 3, 0.75, 0.25, 1.0, local_logger
+    )
+    assert result
+    assert autoscaler is not None
+
+    # Run and test
+    for _ in range(4):
+        input_queue.queue.put(0)
+
+    assert autoscaler.run(0.0) == 1
+    assert autoscaler.run(0.5) == 0  # Cooldown
+    assert autoscaler.run(1.0) == 1
+    assert autoscaler.run(2.0) == 0  # Maximum
+    assert manager.get_worker_count() == 3
+
+    input_queue.drain_queue()
+    assert autoscaler.run(3.0) == -1
+    assert autoscaler.run(4.0) == -1
+    assert autoscaler.run(5.0) == 0  # Minimum
+
+    deadline = time.monotonic() + 5
+    while manager.get_worker_count() > 1 and time.monotonic() < deadline:
+        manager.remove_retired_workers()
+        time.sleep(0.05)
+
+    assert manager.get_worker_count() == 1
+
+    controller.request_exit()
+    manager.join_workers()
+    mp_manager.shutdown()
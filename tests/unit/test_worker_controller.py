@@ -0,0 +1,116 @@
+"""
+Test the worker controller.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Fresh controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+def idle_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Sleeps until exit is requested.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        controller.wait_for_exit(10)
+
+
+class TestWorkerController:
+    """
+    Exit and pause requests.
+    """
+
+    def test_exit_request(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Exit can be requested and cleared.
+        """
+        assert not controller.is_exit_requested()
+        assert not controller.wait_for_exit(0.01)
+
+        controller.request_exit()
+        assert controller.is_exit_requested()
+        assert controller.wait_for_exit(0)
+
+        controller.clear_exit()
+        assert not controller.is_exit_requested()
+
+    def test_idle_worker_wakes_on_exit(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        A worker sleeping in wait_for_exit() stops promptly.
+        """
+        # Setup
+        worker = mp.Process(target=idle_worker, args=(controller,))
+        worker.start()
+        time.sleep(0.2)
+
+        # Run
+        start = time.monotonic()
+        controller.request_exit()
+        worker.join(5)
+        shutdown_time = time.monotonic() - start
+
+        # Test
+        assert worker.exitcode == 0
+        assert shutdown_time < 1
+
+    def test_pause_blocks_until_resume(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        check_pause() blocks while paused.
+        """
+        # Setup
+        controller.request_pause()
+        worker = mp.Process(target=controller.check_pause)
+
+        # Run
+        worker.start()
+        worker.join(0.2)
+        blocked = worker.is_alive()
+        controller.request_resume()
+        worker.join(5)
+
+        # Test
+        assert blocked
+        assert worker.exitcode == 0
+
+    def test_exit_after_waiting_worker_killed(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        A worker killed while waiting does not block the exit request of main.
+        """
+        # Setup
+        worker = mp.Process(target=idle_worker, args=(controller,))
+        worker.start()
+        time.sleep(0.2)
+        worker.kill()
+        worker.join()
+
+        # Run
+        start = time.monotonic()
+        controller.request_exit()
+        request_time = time.monotonic() - start
+
+        # Test
+        assert controller.wait_for_exit(0)
+        assert request_time < 1
@@ -0,0 +1,148 @@
+"""
+Test restarting crashed workers.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_supervisor
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def crashing_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Crashes immediately.
+    """
+    assert controller is not None
+    raise RuntimeError("Crash")
+
+
+def idle_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Sleeps until exit is requested.
+    """
+    while not controller.is_exit_requested():
+        controller.wait_for_exit(10)
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the managers.
+    """
+    result, test_logger = logger.Logger.create("test_worker_supervisor", False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Creates a manager with a single worker.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, (), [], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+    return manager
+
+
+def wait_until(condition: "() -> bool", timeout: float) -> bool:  # type: ignore
+    """
+    Polls the condition until it is true or the timeout passes.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+
+        time.sleep(0.01)
+
+    return condition()
+
+
+class TestWorkerSupervisor:
+    """
+    Restarts, backoff, and crash loop detection.
+    """
+
+    def test_invalid_settings(self, local_logger: logger.Logger) -> None:
+        """
+        Maximum delay below base delay.
+        """
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [], 1.0, 0.5, 3, 10.0, local_logger
+        )
+        assert not result
+        assert supervisor is None
+
+    def test_killed_worker_is_restarted(self, local_logger: logger.Logger) -> None:
+        """
+        A killed worker is replaced by a new running one.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        manager = create_manager(idle_worker, controller, local_logger)
+        manager.start_workers()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], 0.0, 1.0, 3, 10.0, local_logger
+        )
+        assert result
+        assert supervisor is not None
+        supervisor.start()
+
+        # Run
+        original_worker = manager.get_workers()[0]
+        original_worker.kill()
+        restarted = wait_until(lambda: supervisor.restart_counts.get("idle_worker", 0) == 1, 5)
+        supervisor.stop()
+
+        # Test
+        assert restarted
+        new_worker = manager.get_workers()[0]
+        assert new_worker is not original_worker
+        assert new_worker.is_alive()
+        assert len(supervisor.recovery_times["idle_worker"]) == 1
+        assert supervisor.recovery_times["idle_worker"][0] < 1
+
+        controller.request_exit()
+        manager.join_workers()
+
+    def test_crash_loop_stops_restarts(self, local_logger: logger.Logger) -> None:
+        """
+        A worker that always crashes is restarted up to the limit, then given up on.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        manager = create_manager(crashing_worker, controller, local_logger)
+        manager.start_workers()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], 0.01, 0.04, 3, 10.0, local_logger
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        supervisor.start()
+        failed = wait_until(lambda: supervisor.is_stage_failed(manager), 10)
+        supervisor.stop()
+
+        # Test
+        assert failed
+        assert supervisor.restart_counts["crashing_worker"] == 3
+        manager.join_workers()
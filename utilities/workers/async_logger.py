@@ -0,0 +1,275 @@
+"""
+For logging from worker hot loops without waiting on file writes.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+from modules.common.modules.logger import logger
+
+
+class LogRecord:
+    """
+    Message waiting to be written.
+    """
+
+    __slots__ = ("level", "message", "location")
+
+    def __init__(self, level: str, message: str, location: "tuple[str, str, int] | None") -> None:
+        """
+        level: Name of the Logger method to write with, e.g. "info".
+        message: Message without frame info.
+        location: File name, function name, and line number of the caller, None for no frame info.
+        """
+        self.level = level
+        self.message = message
+        self.location = location
+
+    def format(self) -> str:
+        """
+        Returns the message with the frame info of the caller.
+        """
+        if self.location is None:
+            return self.message
+
+        filename, function_name, line_number = self.location
+        return f"[{os.path.basename(filename)} | {function_name} | {line_number}] {self.message}"
+
+
+class AsyncLogger:  # pylint: disable=too-many-instance-attributes
+    """
+    Logger for hot loops, with the same methods as Logger.
+
+    Asynchronous (QueueHandler/QueueListener style): a call puts a record into a bounded buffer
+    of the process and returns, and a writer thread writes the buffer with the Logger in batches.
+    A record that does not fit in a full buffer is dropped and counted instead of waiting.
+    Debug and info records from the same call site (or with the same message, without frame info)
+    beyond `sample_burst` per `sample_window` seconds are suppressed and counted.
+    Warnings and errors are never suppressed.
+
+    Synchronous, it writes with the Logger directly, for comparison or debugging.
+
+    stop() writes the rest of the buffer and the drop and suppressed counts.
+    """
+
+    __create_key = object()
+    # Written with warning, error, and critical, so never suppressed
+    __SAMPLED_LEVELS = ("debug", "info")
+
+    @classmethod
+    def create(
+        cls,
+        local_logger: logger.Logger,
+        asynchronous: bool = True,
+        buffer_size: int = 1000,
+        batch_size: int = 50,
+        flush_period: float = 0.5,
+        sample_window: float = 1.0,
+        sample_burst: int = 10,
+    ) -> "tuple[bool, AsyncLogger | None]":
+        """
+        Creates the logger, and starts the writer thread if asynchronous.
+
+        local_logger: Existing logger from process, the records are written with it.
+        asynchronous: Whether to buffer records, otherwise they are written immediately.
+        buffer_size: Most records waiting to be written, must be greater than 0 .
+        batch_size: Most records written per wake up of the writer, must be greater than 0 .
+        flush_period: Longest seconds the writer sleeps while the buffer is empty.
+        sample_window: Seconds per window of debug and info records from the same call site.
+        sample_burst: Records per window written before the rest are suppressed, <= 0 for all.
+
+        Returns the AsyncLogger object.
+        """
+        if buffer_size <= 0 or batch_size <= 0 or flush_period <= 0.0 or sample_window <= 0.0:
+            local_logger.error("Async logger buffer, batch, and periods must be positive", True)
+            return False, None
+
+        return True, AsyncLogger(
+            cls.__create_key,
+            local_logger,
+            asynchronous,
+            buffer_size,
+            batch_size,
+            flush_period,
+            sample_window,
+            sample_burst,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        local_logger: logger.Logger,
+        asynchronous: bool,
+        buffer_size: int,
+        batch_size: int,
+        flush_period: float,
+        sample_window: float,
+        sample_burst: int,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is AsyncLogger.__create_key, "Use create() method"
+
+        self.__local_logger = local_logger
+        self.__batch_size = batch_size
+        self.__flush_period = flush_period
+        self.__sample_window = sample_window
+        self.__sample_burst = sample_burst
+
+        self.__buffer: "queue.Queue[LogRecord | None]" = queue.Queue(buffer_size)
+        # Window start time, record count, and latest message of each call site
+        self.__windows: "dict[object, list]" = {}
+        self.dropped_count = 0
+        self.suppressed_count = 0
+        self.written_count = 0
+
+        self.__writer: "threading.Thread | None" = None
+        if asynchronous:
+            self.__writer = threading.Thread(target=self.__write_until_stopped, daemon=True)
+            self.__writer.start()
+
+    def debug(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Logs a debug message.
+        """
+        self.__log("debug", message, log_with_frame_info)
+
+    def info(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Logs an info message.
+        """
+        self.__log("info", message, log_with_frame_info)
+
+    def warning(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Logs a warning message.
+        """
+        self.__log("warning", message, log_with_frame_info)
+
+    def error(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Logs an error message.
+        """
+        self.__log("error", message, log_with_frame_info)
+
+    def critical(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Logs a critical message.
+        """
+        self.__log("critical", message, log_with_frame_info)
+
+    def __log(self, level: str, message: str, log_with_frame_info: bool) -> None:
+        """
+        Samples and buffers the record, or writes it if synchronous.
+        """
+        location = None
+        if log_with_frame_info:
+            # Frame of the caller of debug(), info(), ...
+            frame = sys._getframe(2)  # pylint: disable=protected-access
+            code = frame.f_code
+            location = (code.co_filename, code.co_name, frame.f_lineno)
+
+        if level in self.__SAMPLED_LEVELS and not self.__sample(location or message, message):
+            self.suppressed_count += 1
+            return
+
+        self.__put(LogRecord(level, message, location))
+
+    def __sample(self, key: object, message: str) -> bool:
+        """
+        Returns whether to keep the record, records beyond the burst of its window are not.
+        """
+        if self.__sample_burst <= 0:
+            return True
+
+        now = time.monotonic()
+        window = self.__windows.get(key)
+        if window is None or now - window[0] >= self.__sample_window:
+            if window is not None:
+                self.__put_suppressed_note(window)
+
+            self.__windows[key] = [now, 1, message]
+            return True
+
+        window[1] += 1
+        window[2] = message
+        return window[1] <= self.__sample_burst
+
+    def __put_suppressed_note(self, window: list) -> None:
+        """
+        Buffers the number of records suppressed in the window, if any.
+        """
+        _, count, message = window
+        suppressed = count - self.__sample_burst
+        if suppressed > 0:
+            self.__put(LogRecord("info", f"{suppressed} similar suppressed, last: {message}", None))
+
+    def __put(self, record: LogRecord) -> None:
+        """
+        Buffers the record without waiting, or writes it if synchronous.
+        """
+        if self.__writer is None:
+            self.__write([record])
+            return
+
+        try:
+            self.__buffer.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def __write(self, records: "list[LogRecord]") -> None:
+        for record in records:
+            getattr(self.__local_logger, record.level)(record.format(), False)
+
+        self.written_count += len(records)
+
+    def __write_until_stopped(self) -> None:
+        """
+        Writer thread: writes the buffer in batches until the stop sentinel (None).
+        """
+        while True:
+            try:
+                record = self.__buffer.get(timeout=self.__flush_period)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= self.__batch_size:
+                    break
+
+                try:
+                    record = self.__buffer.get_nowait()
+                except queue.Empty:
+                    break
+
+            self.__write(batch)
+            if record is None:
+                return
+
+    def stop(self) -> None:
+        """
+        Writes the rest of the buffer, then the suppressed and dropped counts.
+        Only call once, from the thread that logs.
+        """
+        for window in self.__windows.values():
+            self.__put_suppressed_note(window)
+
+        self.__windows.clear()
+
+        if self.__writer is not None:
+            # Waits for space, unlike logging calls
+            self.__buffer.put(None)
+            self.__writer.join()
+            self.__writer = None
+
+        self.__local_logger.info(
+            f"Log records written: {self.written_count}, "
+            f"suppressed: {self.suppressed_count}, dropped: {self.dropped_count}",
+            True,
+        )
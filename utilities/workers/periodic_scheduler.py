@@ -0,0 +1,232 @@
+"""
+For running periodic tasks on absolute deadlines.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+
+
+class TaskStatistics:
+    """
+    Timing of a periodic task.
+    """
+
+    __slots__ = (
+        "run_count",
+        "overrun_count",
+        "mean_lateness",
+        "max_lateness",
+        "max_duration",
+    )
+
+    def __init__(
+        self,
+        run_count: int,
+        overrun_count: int,
+        mean_lateness: float,
+        max_lateness: float,
+        max_duration: float,
+    ) -> None:
+        """
+        run_count: Number of runs.
+        overrun_count: Number of periods skipped because the task ran too late.
+        mean_lateness: Mean seconds between the deadline and the start of a run (jitter).
+        max_lateness: Largest seconds between the deadline and the start of a run.
+        max_duration: Largest seconds a run took.
+        """
+        self.run_count = run_count
+        self.overrun_count = overrun_count
+        self.mean_lateness = mean_lateness
+        self.max_lateness = max_lateness
+        self.max_duration = max_duration
+
+    def __str__(self) -> str:
+        return (
+            f"{self.run_count} runs, {self.overrun_count} overruns, "
+            f"lateness mean {self.mean_lateness * 1000:.2f} ms "
+            f"max {self.max_lateness * 1000:.2f} ms, "
+            f"duration max {self.max_duration * 1000:.2f} ms"
+        )
+
+
+class PeriodicTask:  # pylint: disable=too-many-instance-attributes
+    """
+    Callback with its next deadline and timing statistics.
+    """
+
+    __slots__ = (
+        "name",
+        "period",
+        "callback",
+        "next_deadline",
+        "run_count",
+        "overrun_count",
+        "total_lateness",
+        "max_lateness",
+        "max_duration",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        period: float,
+        callback: "() -> object",  # type: ignore
+        first_deadline: float,
+    ) -> None:
+        """
+        name: Unique name of the task.
+        period: Seconds between runs.
+        callback: Function run every period.
+        first_deadline: Monotonic time of the first run.
+        """
+        self.name = name
+        self.period = period
+        self.callback = callback
+        self.next_deadline = first_deadline
+        self.run_count = 0
+        self.overrun_count = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.max_duration = 0.0
+
+    def get_statistics(self) -> TaskStatistics:
+        """
+        Returns a copy of the timing statistics.
+        """
+        mean_lateness = self.total_lateness / self.run_count if self.run_count > 0 else 0.0
+        return TaskStatistics(
+            self.run_count,
+            self.overrun_count,
+            mean_lateness,
+            self.max_lateness,
+            self.max_duration,
+        )
+
+
+class PeriodicScheduler:
+    """
+    Runs periodic tasks from a single thread, e.g. sending MAVLink heartbeats,
+    instead of a process sleeping for each.
+
+    Each task runs on absolute deadlines (first deadline + n * period) of the monotonic clock,
+    so the time spent running tasks and logging does not add up as drift.
+    A task that runs a full period late or more, behind another task or because it is slower
+    than its period, skips the periods it missed instead of running in a burst to catch up.
+    The skipped periods are counted as overruns.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(cls, local_logger: logger.Logger) -> "tuple[bool, PeriodicScheduler | None]":
+        """
+        Creates a scheduler without tasks.
+
+        local_logger: Existing logger from process.
+
+        Returns the PeriodicScheduler object.
+        """
+        return True, PeriodicScheduler(cls.__create_key, local_logger)
+
+    def __init__(self, class_private_create_key: object, local_logger: logger.Logger) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is PeriodicScheduler.__create_key, "Use create() method"
+
+        self.__local_logger = local_logger
+        self.__tasks: "dict[str, PeriodicTask]" = {}
+
+    def add_task(
+        self,
+        name: str,
+        period: float,
+        callback: "() -> object",  # type: ignore
+        start_delay: float = 0.0,
+        now: "float | None" = None,
+    ) -> bool:
+        """
+        Adds a task.
+
+        name: Unique name of the task.
+        period: Seconds between runs, must be greater than 0 .
+        callback: Function run every period.
+        start_delay: Seconds before the first run, 0 to run at the next run_pending().
+        now: Monotonic time, None for the current time.
+
+        Returns whether the task was added.
+        """
+        if name in self.__tasks:
+            self.__local_logger.error(f"Task {name} already exists", True)
+            return False
+
+        if period <= 0.0 or start_delay < 0.0:
+            self.__local_logger.error(f"Task {name} has an invalid period or delay", True)
+            return False
+
+        if now is None:
+            now = time.monotonic()
+
+        self.__tasks[name] = PeriodicTask(name, period, callback, now + start_delay)
+        return True
+
+    def run_pending(self, now: "float | None" = None) -> "float | None":
+        """
+        Runs the tasks that are due, earliest deadline first.
+
+        now: Monotonic time to use throughout, None for the clock.
+
+        Returns the seconds until the next deadline, or None if there are no tasks.
+        """
+
+        def get_time() -> float:
+            return time.monotonic() if now is None else now
+
+        current_time = get_time()
+        due_tasks = sorted(
+            (task for task in self.__tasks.values() if task.next_deadline <= current_time),
+            key=lambda task: task.next_deadline,
+        )
+        for task in due_tasks:
+            start = get_time()
+            task.callback()
+            end = get_time()
+
+            lateness = start - task.next_deadline
+            task.run_count += 1
+            task.total_lateness += lateness
+            task.max_lateness = max(task.max_lateness, lateness)
+            task.max_duration = max(task.max_duration, end - start)
+
+            # From the deadline rather than the end of the run, so the next run does not drift
+            missed_count = int((end - task.next_deadline) // task.period)
+            task.overrun_count += missed_count
+            task.next_deadline += (missed_count + 1) * task.period
+
+        if len(self.__tasks) == 0:
+            return None
+
+        next_deadline = min(task.next_deadline for task in self.__tasks.values())
+        return max(next_deadline - get_time(), 0.0)
+
+    def run(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Runs tasks until exit is requested, sleeping until the next deadline in between.
+        """
+        while not controller.is_exit_requested():
+            controller.check_pause()
+            delay = self.run_pending()
+            controller.wait_for_exit(delay)
+
+    def get_statistics(self) -> "dict[str, TaskStatistics]":
+        """
+        Returns the timing statistics of each task by name.
+        """
+        return {name: task.get_statistics() for name, task in self.__tasks.items()}
+
+    def __str__(self) -> str:
+        return "; ".join(
+            f"{name}: {statistics}" for name, statistics in self.get_statistics().items()
+        )
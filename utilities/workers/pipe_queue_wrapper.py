@@ -0,0 +1,182 @@
+"""
+Pipe queue.
+"""
+
+import multiprocessing as mp
+import pickle
+import queue
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+class PipeChannel:
+    """
+    Queue over a one-way pipe with a `queue.Queue`-like interface, for a single consumer.
+    Items are pickled and sent as length-prefixed frames, so a transfer is a write and a read
+    of the pipe instead of a round trip to the SyncManager server process for each.
+
+    Locks keep frames whole when there are several producers, or when main also reads
+    (e.g. to drain). A semaphore of free slots bounds the queue, since the pipe buffer
+    alone would block producers after an unknown number of items.
+    """
+
+    # Indices of the counters
+    __SENT_COUNT = 0
+    __RECEIVED_COUNT = 1
+
+    def __init__(self, maxsize: int) -> None:
+        """
+        maxsize: Number of items the pipe can hold, must be greater than 0 .
+        """
+        assert maxsize > 0, "Max size must be greater than 0"
+
+        self.maxsize = maxsize
+
+        self.__receiver, self.__sender = mp.Pipe(duplex=False)
+        self.__send_lock = mp.Lock()
+        self.__receive_lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(maxsize)
+        # Each written under its lock, the difference is the number of items in the pipe
+        self.__counts = mp.RawArray("Q", 2)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the pipe.
+
+        item: Any picklable object.
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds before raising `queue.Full`, None waits forever.
+        """
+        payload = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        with self.__send_lock:
+            # Counted before sending, so the count is never below the items in the pipe
+            self.__counts[self.__SENT_COUNT] += 1
+            self.__sender.send_bytes(payload)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the pipe.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            payloads = self.__receive(1)
+            if len(payloads) > 0:
+                return pickle.loads(payloads[0])
+
+            if not block:
+                raise queue.Empty
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    raise queue.Empty
+
+            # Waits outside the lock, another reader may still take the item first
+            self.__receiver.poll(remaining)
+
+    def get_many(self, max_count: int) -> "list[object]":
+        """
+        Removes and returns up to max_count items without waiting, in one read of the pipe.
+        """
+        return [pickle.loads(payload) for payload in self.__receive(max_count)]
+
+    def __receive(self, max_count: int) -> "list[bytes]":
+        """
+        Reads the frames already in the pipe, up to max_count.
+        """
+        payloads = []
+        with self.__receive_lock:
+            while len(payloads) < max_count and self.__receiver.poll():
+                payloads.append(self.__receiver.recv_bytes())
+
+            self.__counts[self.__RECEIVED_COUNT] += len(payloads)
+
+        for _ in payloads:
+            self.__free_slots.release()
+
+        return payloads
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts an item without blocking.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the pipe.
+        """
+        return max(self.__counts[self.__SENT_COUNT] - self.__counts[self.__RECEIVED_COUNT], 0)
+
+    def empty(self) -> bool:
+        """
+        Returns whether the pipe is empty (racy, like `queue.Queue.empty()`).
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the pipe is full (racy, like `queue.Queue.full()`).
+        """
+        return self.qsize() >= self.maxsize
+
+
+class PipeQueueWrapper(queue_proxy_wrapper.QueueProxyWrapper):
+    """
+    Drop-in alternative to QueueProxyWrapper over a pipe instead of the SyncManager server
+    process, for links with a single consumer process (a stage of 1 worker, or main).
+    There may be several producers.
+
+    `maxsize <= 0` means the default size, since the pipe buffer cannot hold infinite items.
+    """
+
+    __DEFAULT_MAXSIZE = 64
+
+    def __init__(
+        self, maxsize: int = 0, overflow_policy: str = "block", record_metrics: bool = False
+    ) -> None:
+        """
+        maxsize: Number of items, <= 0 for the default.
+        overflow_policy: What put() does with a full queue, see QueueProxyWrapper.
+        record_metrics: Whether to record metrics, see QueueProxyWrapper.
+        """
+        if maxsize <= 0:
+            maxsize = self.__DEFAULT_MAXSIZE
+
+        super().__init__(None, maxsize, overflow_policy, record_metrics)
+
+    def _create_queue(
+        self, mp_manager: "mp.managers.SyncManager | None", maxsize: int
+    ) -> PipeChannel:
+        return PipeChannel(maxsize)
+
+    def get_batch(
+        self, max_count: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Removes and returns up to max_count items, waiting for the first like get()
+        and reading the rest already in the pipe at once.
+
+        max_count: Maximum number of items, must be greater than 0 .
+        block: Whether to wait for the first item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+        """
+        items = [self.get(block, timeout)]
+        for item in self.queue.get_many(max_count - 1):
+            items.append(self._unstamp(item, self.metrics, 0))
+
+        return items
@@ -0,0 +1,652 @@
+"""
+For building a pipeline of worker stages connected by queues.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import pipe_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+class StageProperties:  # pylint: disable=too-many-instance-attributes
+    """
+    Declaration of a stage, turned into worker properties once the pipeline is built.
+    """
+
+    __slots__ = (
+        "name",
+        "count",
+        "target",
+        "work_arguments",
+        "work_keyword_arguments",
+        "input_queues",
+        "output_queues",
+        "indirect_input_queues",
+        "indirect_output_queues",
+        "controller",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        count: int,
+        target: "((...) -> object) | None",  # type: ignore
+        work_arguments: "tuple",
+        work_keyword_arguments: "dict",
+        input_queues: "list[str]",
+        output_queues: "list[str]",
+        indirect_input_queues: "list[str]",
+        indirect_output_queues: "list[str]",
+        controller: worker_controller.WorkerController,
+    ) -> None:
+        self.name = name
+        self.count = count
+        self.target = target
+        self.work_arguments = work_arguments
+        self.work_keyword_arguments = work_keyword_arguments
+        self.input_queues = input_queues
+        self.output_queues = output_queues
+        self.indirect_input_queues = indirect_input_queues
+        self.indirect_output_queues = indirect_output_queues
+        self.controller = controller
+
+    def get_all_input_queues(self) -> "list[str]":
+        """
+        Returns the names of all queues the stage reads from.
+        """
+        return self.input_queues + self.indirect_input_queues
+
+    def get_all_output_queues(self) -> "list[str]":
+        """
+        Returns the names of all queues the stage writes to.
+        """
+        return self.output_queues + self.indirect_output_queues
+
+
+class Pipeline:  # pylint: disable=too-many-instance-attributes
+    """
+    Graph of stages connected by named queues, declared by a config such as pipeline.yaml.
+
+    The config declares every queue with its size, transport, overflow policy, and metrics,
+    and every stage with its worker count and the queues it reads and writes. Code only maps
+    stage names to worker functions with add_worker(). The worker receives the queues it reads
+    then the queues it writes positionally after its work arguments, the same as
+    WorkerProperties. Queues a stage only uses through its work arguments (e.g. inside a routed
+    connection) are declared as indirect, so they still count as edges of the graph.
+    The transport of a queue is "manager", "shared_memory", "priority" for a manager queue with
+    a high priority lane of the same size, or "pipe" for a queue with a single consumer.
+    Omitted keys take the defaults in QUEUE_DEFAULTS and STAGE_DEFAULTS:
+
+    queues:
+      numbers:
+        maxsize: 5
+        transport: "shared_memory"
+        overflow_policy: "drop_oldest"
+        record_metrics: true
+      results:
+    stages:
+      producer:
+        outputs: ["numbers"]
+      doubler:
+        count: 2
+        inputs: ["numbers"]
+        outputs: ["results"]
+
+    The queues are created with the pipeline, so work arguments can use them.
+    Queues that no stage reads from are outputs to main.
+    Pipe queues must have a single consumer worker, or be read by main, so do not autoscale
+    their consumer stage.
+    """
+
+    __create_key = object()
+
+    QUEUE_TRANSPORTS = ("manager", "shared_memory", "priority", "pipe")
+    QUEUE_DEFAULTS = {
+        "maxsize": 0,
+        "transport": "manager",
+        "overflow_policy": "block",
+        "record_metrics": False,
+    }
+    STAGE_DEFAULTS = {
+        "count": 1,
+        "inputs": [],
+        "outputs": [],
+        "indirect_inputs": [],
+        "indirect_outputs": [],
+    }
+
+    @classmethod
+    def create(
+        cls,
+        mp_manager: "mp.managers.SyncManager",
+        controller: worker_controller.WorkerController,
+        config: "dict | None",
+        local_logger: logger.Logger,
+        packed_types: "dict[str, tuple[type, ...]] | None" = None,
+    ) -> "tuple[bool, Pipeline | None]":
+        """
+        Creates the queues and declares the stages of the config.
+
+        mp_manager: Manager for synchronized queues.
+        controller: Default worker controller of the stages.
+        config: Queues and stages, None for an empty pipeline.
+        local_logger: Existing logger from process.
+        packed_types: Types a shared memory queue sends in their fixed binary layout
+            instead of pickled, by queue name, see SharedMemoryRingBuffer.
+            Ignored by other transports.
+
+        Returns the Pipeline object.
+        """
+        if config is None:
+            config = {}
+
+        try:
+            queue_config = dict(config.get("queues") or {})
+            stage_config = dict(config.get("stages") or {})
+        except (AttributeError, TypeError, ValueError) as e:
+            local_logger.error(f"Pipeline config is malformed: {e}", True)
+            return False, None
+
+        if packed_types is None:
+            packed_types = {}
+
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]" = {}
+        for name, properties in queue_config.items():
+            result, wrapper = cls.__create_queue(
+                name, properties, packed_types.get(name, ()), mp_manager, local_logger
+            )
+            if not result:
+                cls.__release_queues(queues)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert wrapper is not None
+
+            queues[name] = wrapper
+
+        stages: "dict[str, StageProperties]" = {}
+        for name, properties in stage_config.items():
+            result, stage = cls.__create_stage(name, properties, controller, local_logger)
+            if not result:
+                cls.__release_queues(queues)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert stage is not None
+
+            stages[name] = stage
+
+        return True, Pipeline(cls.__create_key, queues, stages, local_logger)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        stages: "dict[str, StageProperties]",
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Pipeline.__create_key, "Use create() method"
+
+        self.__local_logger = local_logger
+
+        self.__queues = queues
+        self.__stages = stages
+        # Filled by build(), stages are in dependency order
+        self.__stage_order: "list[str]" = []
+        self.__managers: "dict[str, worker_manager.WorkerManager]" = {}
+
+    @staticmethod
+    def __read_properties(
+        owner: str, defaults: "dict", config: "dict | None", local_logger: logger.Logger
+    ) -> "dict | None":
+        """
+        Returns the properties of a queue or stage with the defaults filled in,
+        or None if the config has unknown keys or values of the wrong type.
+
+        owner: Queue or stage, e.g. "Queue telemetry_queue".
+        defaults: Value of each key when it is omitted.
+        config: Config of the queue or stage, None for all defaults.
+        local_logger: Existing logger from process.
+        """
+        if config is None:
+            config = {}
+
+        if not isinstance(config, dict):
+            local_logger.error(f"{owner} config must be a mapping", True)
+            return None
+
+        unknown_keys = set(config) - set(defaults)
+        if unknown_keys:
+            local_logger.error(f"{owner} config has unknown keys: {sorted(unknown_keys)}", True)
+            return None
+
+        properties = dict(defaults)
+        # An empty key takes its default
+        properties.update({key: value for key, value in config.items() if value is not None})
+        for key, value in properties.items():
+            default = defaults[key]
+            # bool is an int, but a count of True is a mistake
+            if not isinstance(value, type(default)) or isinstance(value, bool) != isinstance(
+                default, bool
+            ):
+                local_logger.error(
+                    f"{owner} {key} must be a {type(default).__name__}, got {value!r}", True
+                )
+                return None
+
+        return properties
+
+    @classmethod
+    def __create_queue(
+        cls,
+        name: str,
+        config: "dict | None",
+        packed_types: "tuple[type, ...]",
+        mp_manager: "mp.managers.SyncManager",
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, queue_proxy_wrapper.QueueProxyWrapper | None]":
+        """
+        Creates a queue from its config.
+        """
+        properties = cls.__read_properties(
+            f"Queue {name}", cls.QUEUE_DEFAULTS, config, local_logger
+        )
+        if properties is None:
+            return False, None
+
+        maxsize = properties["maxsize"]
+        transport = properties["transport"]
+        overflow_policy = properties["overflow_policy"]
+        record_metrics = properties["record_metrics"]
+        if transport not in cls.QUEUE_TRANSPORTS:
+            local_logger.error(f"Queue {name} has unknown transport: {transport}", True)
+            return False, None
+
+        if overflow_policy not in queue_proxy_wrapper.QueueProxyWrapper.OVERFLOW_POLICIES:
+            local_logger.error(f"Queue {name} has unknown overflow policy: {overflow_policy}", True)
+            return False, None
+
+        if transport == "shared_memory":
+            wrapper = shared_memory_queue_wrapper.SharedMemoryQueueWrapper(
+                maxsize,
+                overflow_policy=overflow_policy,
+                packed_types=packed_types,
+                record_metrics=record_metrics,
+            )
+        elif transport == "pipe":
+            wrapper = pipe_queue_wrapper.PipeQueueWrapper(maxsize, overflow_policy, record_metrics)
+        elif transport == "priority":
+            wrapper = queue_proxy_wrapper.PriorityQueueProxyWrapper(
+                mp_manager, maxsize, maxsize, overflow_policy, record_metrics
+            )
+        else:
+            wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+                mp_manager, maxsize, overflow_policy, record_metrics
+            )
+
+        return True, wrapper
+
+    @classmethod
+    def __create_stage(
+        cls,
+        name: str,
+        config: "dict | None",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, StageProperties | None]":
+        """
+        Declares a stage from its config, its worker is added by add_worker().
+        """
+        properties = cls.__read_properties(
+            f"Stage {name}", cls.STAGE_DEFAULTS, config, local_logger
+        )
+        if properties is None:
+            return False, None
+
+        if properties["count"] <= 0:
+            local_logger.error(f"Stage {name} count must be greater than 0", True)
+            return False, None
+
+        return True, StageProperties(
+            name,
+            properties["count"],
+            None,
+            (),
+            {},
+            list(properties["inputs"]),
+            list(properties["outputs"]),
+            list(properties["indirect_inputs"]),
+            list(properties["indirect_outputs"]),
+            controller,
+        )
+
+    def add_worker(
+        self,
+        name: str,
+        target: "(...) -> object",  # type: ignore
+        work_arguments: "tuple",
+        work_keyword_arguments: "dict | None" = None,
+        controller: "worker_controller.WorkerController | None" = None,
+    ) -> bool:
+        """
+        Maps a stage to its worker function.
+        Stages the config does not declare have no workers, so code can map every stage it knows.
+
+        name: Name of the stage.
+        target: Worker function.
+        work_arguments: Arguments for worker internals, before the queues.
+        work_keyword_arguments: Keyword arguments for worker internals after the controller.
+        controller: Worker controller, None for the default of the pipeline.
+
+        Returns whether the config declares the stage.
+        """
+        stage = self.__stages.get(name)
+        if stage is None:
+            return False
+
+        stage.target = target
+        stage.work_arguments = work_arguments
+        stage.work_keyword_arguments = (
+            work_keyword_arguments if work_keyword_arguments is not None else {}
+        )
+        if controller is not None:
+            stage.controller = controller
+
+        return True
+
+    def has_stage(self, name: str) -> bool:
+        """
+        Returns whether the config declares the stage.
+        """
+        return name in self.__stages
+
+    def build(self) -> bool:
+        """
+        Validates the topology and creates the workers of every stage.
+
+        Returns whether the pipeline is valid and every stage was created.
+        """
+        if not self.__validate():
+            return False
+
+        for name in self.__stage_order:
+            stage = self.__stages[name]
+            # Get Pylance to stop complaining
+            assert stage.target is not None
+
+            result, properties = worker_manager.WorkerProperties.create(
+                count=stage.count,
+                target=stage.target,
+                work_arguments=stage.work_arguments,
+                input_queues=[self.__queues[queue_name] for queue_name in stage.input_queues],
+                output_queues=[self.__queues[queue_name] for queue_name in stage.output_queues],
+                controller=stage.controller,
+                local_logger=self.__local_logger,
+                work_keyword_arguments=stage.work_keyword_arguments,
+            )
+            if not result:
+                self.__local_logger.error(f"Failed to create properties of stage {name}", True)
+                return False
+
+            # Get Pylance to stop complaining
+            assert properties is not None
+
+            result, manager = worker_manager.WorkerManager.create(
+                worker_properties=properties,
+                local_logger=self.__local_logger,
+            )
+            if not result:
+                self.__local_logger.error(f"Failed to create workers of stage {name}", True)
+                return False
+
+            # Get Pylance to stop complaining
+            assert manager is not None
+
+            self.__managers[name] = manager
+
+        return True
+
+    def __validate(self) -> bool:
+        """
+        Checks that every stage has a worker, all names exist, every queue has a producer,
+        and there are no cycles.
+        Sorts the stages so every stage comes after the stages it reads from.
+        """
+        for stage in self.__stages.values():
+            if stage.target is None:
+                self.__local_logger.error(f"Stage {stage.name} has no worker function", True)
+                return False
+
+        producers: "dict[str, list[str]]" = {name: [] for name in self.__queues}
+        consumers: "dict[str, list[str]]" = {name: [] for name in self.__queues}
+        for stage in self.__stages.values():
+            for queue_name in stage.get_all_input_queues() + stage.get_all_output_queues():
+                if queue_name not in self.__queues:
+                    self.__local_logger.error(
+                        f"Stage {stage.name} uses unknown queue {queue_name}", True
+                    )
+                    return False
+
+            for queue_name in stage.get_all_input_queues():
+                consumers[queue_name].append(stage.name)
+
+            for queue_name in stage.get_all_output_queues():
+                producers[queue_name].append(stage.name)
+
+        for queue_name, queue_producers in producers.items():
+            if len(queue_producers) == 0:
+                self.__local_logger.error(f"Queue {queue_name} has no producer stage", True)
+                return False
+
+        for queue_name, queue_consumers in consumers.items():
+            wrapper = self.__queues[queue_name]
+            consumer_count = sum(self.__stages[name].count for name in queue_consumers)
+            if isinstance(wrapper, pipe_queue_wrapper.PipeQueueWrapper) and consumer_count > 1:
+                self.__local_logger.error(
+                    f"Queue {queue_name} is a pipe but has {consumer_count} consumer workers", True
+                )
+                return False
+
+        # Kahn's algorithm
+        upstream_counts = {name: 0 for name in self.__stages}
+        downstream: "dict[str, set[str]]" = {name: set() for name in self.__stages}
+        for queue_name, queue_consumers in consumers.items():
+            for producer in producers[queue_name]:
+                for consumer in queue_consumers:
+                    if consumer not in downstream[producer]:
+                        downstream[producer].add(consumer)
+                        upstream_counts[consumer] += 1
+
+        ready = [name for name, count in upstream_counts.items() if count == 0]
+        order = []
+        while len(ready) > 0:
+            name = ready.pop(0)
+            order.append(name)
+            for consumer in sorted(downstream[name]):
+                upstream_counts[consumer] -= 1
+                if upstream_counts[consumer] == 0:
+                    ready.append(consumer)
+
+        if len(order) != len(self.__stages):
+            cycle = [name for name, count in upstream_counts.items() if count > 0]
+            self.__local_logger.error(f"Pipeline has a cycle through stages: {cycle}", True)
+            return False
+
+        self.__stage_order = order
+        return True
+
+    def start(self) -> None:
+        """
+        Starts the workers, each stage after the stages it reads from.
+        """
+        for name in self.__stage_order:
+            self.__managers[name].start_workers()
+
+    def request_exit(self) -> None:
+        """
+        Requests the workers of every stage to exit.
+        """
+        controllers = []
+        for stage in self.__stages.values():
+            if stage.controller not in controllers:
+                controllers.append(stage.controller)
+
+        for controller in controllers:
+            controller.request_exit()
+
+    def drain(self) -> None:
+        """
+        Poisons the queues from the end of the pipeline to the start,
+        discarding their items and waking workers blocked on them.
+        """
+        for queue_name in self.__get_queue_order()[::-1]:
+            self.__queues[queue_name].poison()
+
+    def stop(self, timeout: float = 5.0) -> "dict[str, float]":
+        """
+        Requests exit, drains the queues, joins the workers, and frees shared memory.
+
+        timeout: Seconds to wait for the workers, then the rest are terminated.
+
+        Returns the time in seconds each stage took to stop, by name.
+        """
+        start = time.monotonic()
+        self.request_exit()
+        self.drain()
+
+        stop_times = self.__wait_for_stages(start, timeout)
+        for name in self.__stage_order:
+            self.__managers[name].join_workers()
+            self.__local_logger.info(
+                f"Stage {name} stopped in {stop_times[name] * 1000:.1f} ms", True
+            )
+
+        self.__release_queues(self.__queues)
+        return stop_times
+
+    @staticmethod
+    def __release_queues(queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Frees the shared memory of the queues.
+        """
+        for wrapper in queues.values():
+            if isinstance(wrapper, shared_memory_queue_wrapper.SharedMemoryQueueWrapper):
+                wrapper.release()
+
+    def __wait_for_stages(self, start: float, timeout: float) -> "dict[str, float]":
+        """
+        Waits for every worker to exit, recording when the last worker of each stage did.
+        Terminates the workers still running after the timeout.
+
+        start: Monotonic time the stop was requested.
+        timeout: Seconds from start to wait for.
+        """
+        stages: "dict[object, tuple[str, mp.Process]]" = {}
+        remaining_counts = {}
+        for name in self.__stage_order:
+            remaining_counts[name] = 0
+            for worker in self.__managers[name].get_workers():
+                try:
+                    stages[worker.sentinel] = (name, worker)
+                # Not started yet
+                except ValueError:
+                    continue
+
+                remaining_counts[name] += 1
+
+        stop_times = {name: 0.0 for name, count in remaining_counts.items() if count == 0}
+
+        def record_stopped(sentinel: object) -> None:
+            name, _ = stages.pop(sentinel)
+            remaining_counts[name] -= 1
+            if remaining_counts[name] == 0:
+                stop_times[name] = time.monotonic() - start
+
+        deadline = start + timeout
+        while len(stages) > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0.0:
+                break
+
+            for sentinel in multiprocessing.connection.wait(list(stages), remaining):
+                record_stopped(sentinel)
+
+        # Stuck, e.g. blocked on something other than the pipeline queues
+        for sentinel, (name, worker) in list(stages.items()):
+            self.__local_logger.warning(
+                f"Worker {worker.pid} of stage {name} did not stop in {timeout} s, terminating",
+                True,
+            )
+            worker.terminate()
+            worker.join()
+            record_stopped(sentinel)
+
+        return stop_times
+
+    def clear_exit(self) -> None:
+        """
+        Clears the exit request of every stage, so the controllers can be reused.
+        """
+        for stage in self.__stages.values():
+            stage.controller.clear_exit()
+
+    def __get_queue_order(self) -> "list[str]":
+        """
+        Returns the names of the queues in the order of their first producer stage.
+        """
+        order = []
+        for name in self.__stage_order:
+            for queue_name in self.__stages[name].get_all_output_queues():
+                if queue_name not in order:
+                    order.append(queue_name)
+
+        return order
+
+    def get_queue(self, name: str) -> "queue_proxy_wrapper.QueueProxyWrapper | None":
+        """
+        Returns the queue with the name, or None if there is none.
+        """
+        return self.__queues.get(name)
+
+    def get_queues(self) -> "dict[str, queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns all queues by name.
+        """
+        return dict(self.__queues)
+
+    def get_output_queues(self) -> "dict[str, queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the queues that no stage reads from, which main reads, by name.
+        """
+        consumed = set()
+        for stage in self.__stages.values():
+            consumed.update(stage.get_all_input_queues())
+
+        return {name: wrapper for name, wrapper in self.__queues.items() if name not in consumed}
+
+    def get_manager(self, name: str) -> "worker_manager.WorkerManager | None":
+        """
+        Returns the manager of the stage with the name, or None if there is none.
+        """
+        return self.__managers.get(name)
+
+    def get_managers(self) -> "list[worker_manager.WorkerManager]":
+        """
+        Returns the managers of all stages in dependency order.
+        """
+        return [self.__managers[name] for name in self.__stage_order]
+
+    def get_stage_order(self) -> "list[str]":
+        """
+        Returns the names of the stages in dependency order.
+        """
+        return list(self.__stage_order)
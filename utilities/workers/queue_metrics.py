@@ -0,0 +1,272 @@
+"""
+For measuring the flow of items through queues.
+"""
+
+import multiprocessing as mp
+
+
+class StampedItem:
+    """
+    Item wrapped with the time it was put into a queue, so the consumer can measure latency.
+    """
+
+    __slots__ = ("enqueue_time", "item")
+
+    def __init__(self, enqueue_time: int, item: object) -> None:
+        """
+        enqueue_time: Monotonic time in nanoseconds.
+        item: Item put into the queue.
+        """
+        self.enqueue_time = enqueue_time
+        self.item = item
+
+
+class MetricsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Copy of the counters of a QueueMetrics at one point in time.
+    """
+
+    __slots__ = (
+        "put_count",
+        "get_count",
+        "put_blocked_time",
+        "get_blocked_time",
+        "latency_counts",
+        "latency_max",
+        "dropped_count",
+        "conflated_count",
+    )
+
+    def __init__(
+        self,
+        put_count: int,
+        get_count: int,
+        put_blocked_time: int,
+        get_blocked_time: int,
+        latency_counts: "list[int]",
+        latency_max: int,
+        dropped_count: int,
+        conflated_count: int,
+    ) -> None:
+        """
+        put_count: Number of items put.
+        get_count: Number of items taken.
+        put_blocked_time: Nanoseconds producers waited on a full queue.
+        get_blocked_time: Nanoseconds consumers waited on an empty queue.
+        latency_counts: Latency histogram bucket counts.
+        latency_max: Largest latency recorded in microseconds.
+        dropped_count: Number of items discarded because the queue was full.
+        conflated_count: Number of items replaced by a newer item.
+        """
+        self.put_count = put_count
+        self.get_count = get_count
+        self.put_blocked_time = put_blocked_time
+        self.get_blocked_time = get_blocked_time
+        self.latency_counts = latency_counts
+        self.latency_max = latency_max
+        self.dropped_count = dropped_count
+        self.conflated_count = conflated_count
+
+    def latency_percentile(
+        self, percentile: float, previous: "MetricsSnapshot | None" = None
+    ) -> "int | None":
+        """
+        Latency which the given percentage of items did not exceed.
+
+        percentile: Percentage from 0 to 100 .
+        previous: Earlier snapshot to only consider the latencies recorded since, None for all.
+
+        Returns the latency in microseconds, rounded up to its bucket,
+        or None if no latency was recorded.
+        """
+        counts = self.latency_counts
+        if previous is not None:
+            counts = [
+                count - previous_count
+                for count, previous_count in zip(counts, previous.latency_counts)
+            ]
+
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        # Rank of the item at the percentile, 1 indexed
+        rank = max(int(total * percentile / 100 + 0.5), 1)
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return QueueMetrics.bucket_upper_value(index)
+
+        return QueueMetrics.bucket_upper_value(len(counts) - 1)
+
+
+class QueueMetrics:
+    """
+    Counters and latency histogram of a queue in shared memory,
+    so every process using the queue records into the same place.
+
+    The histogram has HDR-style log-linear buckets over microseconds:
+    values below 2^SUB_BUCKET_BITS have a bucket each, larger values are split into
+    buckets 2^(SUB_BUCKET_BITS - 1) per power of 2, keeping the relative error below 1/16 .
+    """
+
+    SUB_BUCKET_BITS = 5
+    MAX_VALUE_BITS = 36  # About 19 hours in microseconds, larger values are clamped
+
+    __SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    __HALF_SUB_BUCKET_COUNT = __SUB_BUCKET_COUNT // 2
+    BUCKET_COUNT = __SUB_BUCKET_COUNT + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * __HALF_SUB_BUCKET_COUNT
+
+    # Indices of the counters
+    __PUT_COUNT = 0
+    __GET_COUNT = 1
+    __PUT_BLOCKED_TIME = 2
+    __GET_BLOCKED_TIME = 3
+    __LATENCY_MAX = 4
+    __DROPPED_COUNT = 5
+    __CONFLATED_COUNT = 6
+    __COUNTER_COUNT = 7
+
+    def __init__(self) -> None:
+        """
+        Constructor creates the shared counters, call from main before starting workers.
+        """
+        self.__counters = mp.RawArray("Q", self.__COUNTER_COUNT)
+        self.__latency_counts = mp.RawArray("Q", self.BUCKET_COUNT)
+        self.__lock = mp.Lock()
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        """
+        Returns the histogram bucket of a value in microseconds.
+        """
+        if value < cls.__SUB_BUCKET_COUNT:
+            return max(value, 0)
+
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        index = (
+            cls.__SUB_BUCKET_COUNT
+            + (shift - 1) * cls.__HALF_SUB_BUCKET_COUNT
+            + (value >> shift)
+            - cls.__HALF_SUB_BUCKET_COUNT
+        )
+        return min(index, cls.BUCKET_COUNT - 1)
+
+    @classmethod
+    def bucket_upper_value(cls, index: int) -> int:
+        """
+        Returns the largest value in microseconds that falls into the histogram bucket.
+        """
+        if index < cls.__SUB_BUCKET_COUNT:
+            return index
+
+        shift, sub_index = divmod(index - cls.__SUB_BUCKET_COUNT, cls.__HALF_SUB_BUCKET_COUNT)
+        return ((sub_index + cls.__HALF_SUB_BUCKET_COUNT + 1) << (shift + 1)) - 1
+
+    def record_put(self, blocked_time: int) -> None:
+        """
+        Records an item put into the queue.
+
+        blocked_time: Nanoseconds waited on a full queue.
+        """
+        with self.__lock:
+            self.__counters[self.__PUT_COUNT] += 1
+            self.__counters[self.__PUT_BLOCKED_TIME] += blocked_time
+
+    def record_get(self, blocked_time: int, latency: "int | None") -> None:
+        """
+        Records an item taken from the queue.
+
+        blocked_time: Nanoseconds waited on an empty queue.
+        latency: Nanoseconds since the item was put, None if unknown.
+        """
+        with self.__lock:
+            self.__counters[self.__GET_COUNT] += 1
+            self.__counters[self.__GET_BLOCKED_TIME] += blocked_time
+            if latency is None:
+                return
+
+            latency_us = max(latency, 0) // 1000
+            self.__latency_counts[QueueMetrics.bucket_index(latency_us)] += 1
+            if latency_us > self.__counters[self.__LATENCY_MAX]:
+                self.__counters[self.__LATENCY_MAX] = latency_us
+
+    def record_blocked_put(self, blocked_time: int) -> None:
+        """
+        Records waiting on a full queue that ended without putting an item.
+
+        blocked_time: Nanoseconds waited.
+        """
+        with self.__lock:
+            self.__counters[self.__PUT_BLOCKED_TIME] += blocked_time
+
+    def record_blocked_get(self, blocked_time: int) -> None:
+        """
+        Records waiting on an empty queue that ended without taking an item.
+
+        blocked_time: Nanoseconds waited.
+        """
+        with self.__lock:
+            self.__counters[self.__GET_BLOCKED_TIME] += blocked_time
+
+    def record_dropped(self, count: int = 1) -> None:
+        """
+        Records items discarded because the queue was full.
+        """
+        with self.__lock:
+            self.__counters[self.__DROPPED_COUNT] += count
+
+    def record_conflated(self, count: int = 1) -> None:
+        """
+        Records items replaced by a newer item.
+        """
+        with self.__lock:
+            self.__counters[self.__CONFLATED_COUNT] += count
+
+    def snapshot(self) -> MetricsSnapshot:
+        """
+        Returns a consistent copy of the counters.
+        """
+        with self.__lock:
+            return MetricsSnapshot(
+                self.__counters[self.__PUT_COUNT],
+                self.__counters[self.__GET_COUNT],
+                self.__counters[self.__PUT_BLOCKED_TIME],
+                self.__counters[self.__GET_BLOCKED_TIME],
+                list(self.__latency_counts),
+                self.__counters[self.__LATENCY_MAX],
+                self.__counters[self.__DROPPED_COUNT],
+                self.__counters[self.__CONFLATED_COUNT],
+            )
+
+
+class SharedCounters:
+    """
+    Named counters in shared memory, so every process holding a copy counts into the same place,
+    e.g. decisions of a component copied into each worker process.
+    """
+
+    def __init__(self, names: "list[str]") -> None:
+        """
+        Constructor creates the shared counters, call from main before starting workers.
+
+        names: Unique names of the counters.
+        """
+        self.__indices = {name: index for index, name in enumerate(names)}
+        self.__counters = mp.RawArray("Q", len(names))
+        self.__lock = mp.Lock()
+
+    def increment(self, name: str, count: int = 1) -> None:
+        """
+        Adds to the counter with the name.
+        """
+        with self.__lock:
+            self.__counters[self.__indices[name]] += count
+
+    def snapshot(self) -> "dict[str, int]":
+        """
+        Returns a consistent copy of the counters by name.
+        """
+        with self.__lock:
+            return {name: self.__counters[index] for name, index in self.__indices.items()}
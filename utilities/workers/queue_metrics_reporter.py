@@ -0,0 +1,158 @@
+"""
+For reporting the flow of items through queues.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_metrics
+from utilities.workers import queue_proxy_wrapper
+
+
+class QueueMetricsReporter:
+    """
+    Periodically logs the throughput, depth, blocked time, and latency of queues,
+    and how much shared counters (e.g. of a component in every worker) grew.
+    Queues that do not record metrics are skipped.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        period: float,
+        local_logger: logger.Logger,
+        counters: "dict[str, queue_metrics.SharedCounters] | None" = None,
+    ) -> "tuple[bool, QueueMetricsReporter | None]":
+        """
+        Creates a reporter.
+
+        queues: Queue wrappers to report by name.
+        period: Seconds between reports, must be greater than 0 .
+        local_logger: Existing logger from process.
+        counters: Shared counters to report by name, None for none.
+
+        Returns the QueueMetricsReporter object.
+        """
+        if period <= 0.0:
+            local_logger.error(f"Report period must be greater than 0, got {period}", True)
+            return False, None
+
+        if counters is None:
+            counters = {}
+
+        return True, QueueMetricsReporter(cls.__create_key, queues, period, local_logger, counters)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        period: float,
+        local_logger: logger.Logger,
+        counters: "dict[str, queue_metrics.SharedCounters]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is QueueMetricsReporter.__create_key, "Use create() method"
+
+        self.__queues = {
+            name: wrapper for name, wrapper in queues.items() if wrapper.metrics is not None
+        }
+        self.__period = period
+        self.__local_logger = local_logger
+
+        self.__last_report_time = time.monotonic()
+        self.__previous_snapshots = {
+            name: wrapper.metrics.snapshot()  # type: ignore
+            for name, wrapper in self.__queues.items()
+        }
+        self.__counters = counters
+        self.__previous_counts = {name: shared.snapshot() for name, shared in counters.items()}
+
+    def run(self, now: "float | None" = None) -> bool:
+        """
+        Logs a summary of each queue if the period has passed. Call periodically from main.
+
+        now: Monotonic time in seconds, defaults to the current time.
+
+        Returns whether a summary was logged.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        elapsed = now - self.__last_report_time
+        if elapsed < self.__period:
+            return False
+
+        for name, wrapper in self.__queues.items():
+            # Get Pylance to stop complaining
+            assert wrapper.metrics is not None
+
+            snapshot = wrapper.metrics.snapshot()
+            self.__local_logger.info(
+                f"{name}: {self.summarize(snapshot, self.__previous_snapshots[name], elapsed)}, "
+                f"depth {wrapper.queue.qsize()}",
+                True,
+            )
+            self.__previous_snapshots[name] = snapshot
+
+        for name, shared in self.__counters.items():
+            counts = shared.snapshot()
+            self.__local_logger.info(
+                f"{name}: {self.summarize_counts(counts, self.__previous_counts[name])}", True
+            )
+            self.__previous_counts[name] = counts
+
+        self.__last_report_time = now
+        return True
+
+    @staticmethod
+    def summarize(
+        current: queue_metrics.MetricsSnapshot,
+        previous: queue_metrics.MetricsSnapshot,
+        elapsed: float,
+    ) -> str:
+        """
+        Describes the activity of a queue between two snapshots.
+
+        current: Later snapshot.
+        previous: Earlier snapshot.
+        elapsed: Seconds between the snapshots, must be greater than 0 .
+
+        Returns the summary.
+        """
+        throughput = (current.get_count - previous.get_count) / elapsed
+        put_blocked = (current.put_blocked_time - previous.put_blocked_time) / 1e9
+        get_blocked = (current.get_blocked_time - previous.get_blocked_time) / 1e9
+        summary = (
+            f"{throughput:.1f} items/s, blocked put {put_blocked:.3f} s get {get_blocked:.3f} s"
+        )
+
+        dropped = current.dropped_count - previous.dropped_count
+        conflated = current.conflated_count - previous.conflated_count
+        if dropped > 0 or conflated > 0:
+            summary = f"{summary}, dropped {dropped} conflated {conflated}"
+
+        median = current.latency_percentile(50, previous)
+        if median is None:
+            return summary
+
+        tail = current.latency_percentile(99, previous)
+        return f"{summary}, latency p50 {median} us p99 {tail} us max (all time) {current.latency_max} us"
+
+    @staticmethod
+    def summarize_counts(current: "dict[str, int]", previous: "dict[str, int]") -> str:
+        """
+        Describes how much each counter grew between two snapshots, with its total.
+
+        current: Later snapshot.
+        previous: Earlier snapshot.
+
+        Returns the summary.
+        """
+        return ", ".join(
+            f"{name} {count - previous[name]} (total {count})" for name, count in current.items()
+        )
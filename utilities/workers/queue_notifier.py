@@ -0,0 +1,61 @@
+"""
+For waking a process when items are put into queues.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+
+
+class QueueNotifier:
+    """
+    Pipe that becomes readable when a queue changes, so a waiting consumer or producer
+    sleeps until an item or space arrives instead of polling the queue.
+
+    At most one notification is in the pipe at a time, so producers never block on it
+    however long the consumer does not read. The consumer must clear() before checking
+    the queues, then any item put after the check notifies again.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor creates the shared pipe, call from main before starting workers.
+        """
+        self.__receiver, self.__sender = mp.Pipe(duplex=False)
+        self.__pending = mp.RawValue("b", 0)
+        self.__lock = mp.Lock()
+
+    def notify(self) -> None:
+        """
+        Wakes the consumer, called by producers after putting an item.
+        """
+        # Fast path, the consumer has not cleared the last notification yet
+        if self.__pending.value:
+            return
+
+        with self.__lock:
+            if self.__pending.value:
+                return
+
+            self.__pending.value = 1
+            self.__sender.send_bytes(b"")
+
+    def clear(self) -> None:
+        """
+        Removes the pending notification, called by the consumer before checking the queues.
+        """
+        with self.__lock:
+            if not self.__pending.value:
+                return
+
+            self.__receiver.recv_bytes()
+            self.__pending.value = 0
+
+    def wait(self, timeout: "float | None" = None) -> bool:
+        """
+        Blocks until notified or the timeout passes.
+
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether there is a notification.
+        """
+        return len(multiprocessing.connection.wait([self.__receiver], timeout)) > 0
@@ -2,24 +2,438 @@
 Queue.
 """
 
+import multiprocessing as mp
 import multiprocessing.managers
 import queue
 import time
 
+from utilities.workers import queue_metrics
+from utilities.workers import queue_notifier
 
-class QueueProxyWrapper:
+
+class QueueClosed(queue.Empty):
+    """
+    Raised by get() when the queue is closed and has no items left.
+
+    Subclass of `queue.Empty`, so consumers that already handle an empty queue keep working.
+    """
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+
+    put() and get() are a single put_nowait() and get_nowait() of the underlying queue
+    when there is space or an item. Only a put() or get() that has to wait uses the notifiers,
+    and an item is only notified while a consumer is waiting.
+
+    With `record_metrics`, items passed through put() and get() are counted in `metrics` and
+    stamped with the time they were put, so get() can record their latency. The counters are
+    shared by every process, so each record takes a lock. Without it, `metrics` is None.
+    Items put directly into `queue` are returned by get() as they are, without latency,
+    and do not wake a blocked get().
+
+    `overflow_policy` decides what put() does with a full queue:
+    "block": Wait for space (default).
+    "drop_oldest": Discard the oldest items to make space, so the queue holds the newest items.
+    "drop_newest": Discard the item being put.
+    "conflate": Replace everything in the queue with the item, regardless of space,
+        for consumers that only want the latest value.
+    Discarded items are counted in `metrics`. Only "block" can stall the producer.
+
+    For shutdown, close() stops the queue accepting items and immediately wakes every
+    producer and consumer blocked in put() or get(). Consumers still receive the items left,
+    then get() raises `QueueClosed`. poison() also discards the items left, so consumers
+    stop at once. Items put into a closed queue are discarded and counted as dropped.
+    Closing cannot be undone, unlike fill_and_drain_queue().
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
+    # Indices of the waiting counts
+    __WAITING_CONSUMERS = 0
+    __WAITING_PRODUCERS = 1
+
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest", "conflate")
+
+    def __init__(
+        self,
+        mp_manager: "multiprocessing.managers.SyncManager | None",
+        maxsize: int = 0,
+        overflow_policy: str = "block",
+        record_metrics: bool = False,
+    ) -> None:
+        """
+        mp_manager: Manager for synchronized queues, None for subclasses with another transport.
+        maxsize: Queue max size, <= 0 for infinity.
+        overflow_policy: What put() does with a full queue.
+        record_metrics: Whether to count items and measure their latency in `metrics`.
+        """
+        assert (
+            overflow_policy in self.OVERFLOW_POLICIES
+        ), f"Unknown overflow policy: {overflow_policy}"
+
+        self.queue = self._create_queue(mp_manager, maxsize)
         self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.metrics = queue_metrics.QueueMetrics() if record_metrics else None
+
+        self.__closed = mp.RawValue("b", 0)
+        # Consumers waiting for an item and producers waiting for space, read without the lock
+        self.__waiting_counts = mp.RawArray("i", 2)
+        self.__waiting_lock = mp.Lock()
+        # Wake consumers waiting for an item and producers waiting for space
+        self.__item_notifier = queue_notifier.QueueNotifier()
+        self.__space_notifier = queue_notifier.QueueNotifier()
+
+    def _create_queue(
+        self, mp_manager: "multiprocessing.managers.SyncManager | None", maxsize: int
+    ) -> "queue.Queue":
+        """
+        Returns the underlying queue.
+        For subclasses with another transport.
+        """
+        # Get Pylance to stop complaining
+        assert mp_manager is not None
+
+        return mp_manager.Queue(maxsize)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue, recording how long it waited for space.
+
+        item: Item to put.
+        block: Whether to wait for space.
+        timeout: Time waiting in seconds before raising `queue.Full`, None waits forever.
+        """
+        self._put_into(self.queue, self.metrics, item, block, timeout)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts an item into the queue without waiting, raises `queue.Full` if there is no space.
+        """
+        self.put(item, False)
+
+    def put_high_priority(
+        self, item: object, block: bool = True, timeout: "float | None" = None
+    ) -> None:
+        """
+        Puts a control-critical item, same arguments as put().
+        Queues without a high priority lane put it like any other item, so producers do not
+        depend on the transport.
+        """
+        self.put(item, block, timeout)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue, recording how long it waited for one
+        and how long the item spent in the queue.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+
+        Raises `QueueClosed` if the queue is closed and empty.
+        """
+        taken = self.__take()
+        if taken is not None:
+            return self._unstamp(taken[0], taken[1], 0)
+
+        if not block:
+            if self.is_closed():
+                raise QueueClosed
+
+            raise queue.Empty
+
+        start = time.monotonic_ns()
+        deadline = None if timeout is None else start + int(timeout * 1e9)
+        self.__add_waiting(self.__WAITING_CONSUMERS, 1)
+        try:
+            while True:
+                # Clear before checking, so an item put after the check notifies again
+                self.__item_notifier.clear()
+                taken = self.__take()
+                if taken is not None:
+                    break
+
+                if self.is_closed():
+                    self.__record_blocked_get(start)
+                    raise QueueClosed
+
+                wait_time = None
+                if deadline is not None:
+                    wait_time = (deadline - time.monotonic_ns()) / 1e9
+                    if wait_time <= 0.0:
+                        self.__record_blocked_get(start)
+                        raise queue.Empty
+
+                self.__item_notifier.wait(wait_time)
+        finally:
+            self.__add_waiting(self.__WAITING_CONSUMERS, -1)
+            # Pass the notification on, another consumer may be waiting for the next item,
+            # or for the close
+            self.__notify_waiting(self.__WAITING_CONSUMERS, self.__item_notifier)
+
+        return self._unstamp(taken[0], taken[1], time.monotonic_ns() - start)
+
+    def get_nowait(self) -> object:
+        """
+        Removes and returns an item without waiting, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def __take(self) -> "tuple[object, queue_metrics.QueueMetrics | None] | None":
+        """
+        Removes an item from the first lane that has one, waking a producer waiting for space.
+
+        Returns the item and the metrics of its lane, or None if every lane is empty.
+        """
+        for lane, _, metrics in self._get_lanes():
+            try:
+                item = lane.get_nowait()
+            except queue.Empty:
+                continue
+
+            self.__notify_waiting(self.__WAITING_PRODUCERS, self.__space_notifier)
+            return item, metrics
+
+        return None
+
+    def __record_blocked_get(self, start: int) -> None:
+        if self.metrics is not None:
+            self.metrics.record_blocked_get(time.monotonic_ns() - start)
+
+    def __add_waiting(self, index: int, count: int) -> None:
+        """
+        Counts a consumer or producer starting or stopping to wait.
+        """
+        with self.__waiting_lock:
+            self.__waiting_counts[index] += count
+
+    def __notify_waiting(self, index: int, notifier: queue_notifier.QueueNotifier) -> None:
+        """
+        Notifies only if a consumer or producer is waiting, which it counted before checking
+        the queue, so nothing is written to the notifier pipe on the fast path.
+        """
+        if self.__waiting_counts[index] > 0:
+            notifier.notify()
+
+    def _put_into(
+        self,
+        target_queue: "queue.Queue",
+        metrics: "queue_metrics.QueueMetrics | None",
+        item: object,
+        block: bool,
+        timeout: "float | None",
+    ) -> None:
+        """
+        Stamps and puts an item following the overflow policy,
+        recording it in the metrics and notifying waiting consumers.
+        For subclasses with more than one underlying queue.
+        """
+        if self.is_closed():
+            if metrics is not None:
+                metrics.record_dropped()
+            return
+
+        if metrics is not None:
+            item = queue_metrics.StampedItem(time.monotonic_ns(), item)
+
+        if self.overflow_policy == "conflate":
+            conflated_count = QueueProxyWrapper.__discard_all(target_queue)
+            if metrics is not None:
+                metrics.record_conflated(conflated_count)
+
+        try:
+            target_queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow_policy == "drop_newest":
+                if metrics is not None:
+                    metrics.record_dropped()
+                return
+
+            if self.overflow_policy in ("drop_oldest", "conflate"):
+                self.__put_discarding(target_queue, metrics, item)
+                return
+
+            if not block:
+                raise
+
+            if not self.__put_waiting(target_queue, metrics, item, timeout):
+                return
+        else:
+            if metrics is not None:
+                metrics.record_put(0)
+
+        self.__notify_put()
+
+    def __put_waiting(
+        self,
+        target_queue: "queue.Queue",
+        metrics: "queue_metrics.QueueMetrics | None",
+        item: object,
+        timeout: "float | None",
+    ) -> bool:
+        """
+        Waits for space and puts the item, raises `queue.Full` if the timeout passes.
+
+        Returns whether the item was put, False if the queue was closed while waiting.
+        """
+        start = time.monotonic_ns()
+        deadline = None if timeout is None else start + int(timeout * 1e9)
+        self.__add_waiting(self.__WAITING_PRODUCERS, 1)
+        try:
+            while True:
+                # Clear before checking, so space made after the check notifies again
+                self.__space_notifier.clear()
+                try:
+                    target_queue.put_nowait(item)
+                except queue.Full:
+                    pass
+                else:
+                    if metrics is not None:
+                        metrics.record_put(time.monotonic_ns() - start)
+                    return True
+
+                if self.is_closed():
+                    if metrics is not None:
+                        metrics.record_blocked_put(time.monotonic_ns() - start)
+                        metrics.record_dropped()
+                    return False
+
+                wait_time = None
+                if deadline is not None:
+                    wait_time = (deadline - time.monotonic_ns()) / 1e9
+                    if wait_time <= 0.0:
+                        if metrics is not None:
+                            metrics.record_blocked_put(time.monotonic_ns() - start)
+                        raise queue.Full
+
+                self.__space_notifier.wait(wait_time)
+        finally:
+            self.__add_waiting(self.__WAITING_PRODUCERS, -1)
+            # Pass the notification on, another producer may be waiting for space,
+            # or for the close
+            self.__notify_waiting(self.__WAITING_PRODUCERS, self.__space_notifier)
+
+    def __put_discarding(
+        self,
+        target_queue: "queue.Queue",
+        metrics: "queue_metrics.QueueMetrics | None",
+        item: object,
+    ) -> None:
+        """
+        Discards the oldest items until the item fits, other producers may fill the space first.
+        """
+        while True:
+            try:
+                target_queue.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                if metrics is None:
+                    pass
+                elif self.overflow_policy == "conflate":
+                    metrics.record_conflated()
+                else:
+                    metrics.record_dropped()
+
+            try:
+                target_queue.put_nowait(item)
+            except queue.Full:
+                continue
+
+            if metrics is not None:
+                metrics.record_put(0)
+            self.__notify_put()
+            return
+
+    def __notify_put(self) -> None:
+        """
+        Wakes consumers after an item is put.
+        """
+        self.__notify_waiting(self.__WAITING_CONSUMERS, self.__item_notifier)
+
+    @staticmethod
+    def __discard_all(target_queue: "queue.Queue") -> int:
+        """
+        Removes everything from the queue.
+
+        Returns the number of items removed.
+        """
+        count = 0
+        while True:
+            try:
+                target_queue.get_nowait()
+            except queue.Empty:
+                return count
+
+            count += 1
+
+    def _get_lanes(
+        self,
+    ) -> "list[tuple[queue.Queue, int, queue_metrics.QueueMetrics | None]]":
+        """
+        Returns the underlying queues with their max sizes and metrics, in the order get()
+        takes from them.
+        For subclasses with more than one underlying queue.
+        """
+        return [(self.queue, self.maxsize, self.metrics)]
+
+    @staticmethod
+    def _unstamp(
+        item: object, metrics: "queue_metrics.QueueMetrics | None", blocked_time: int
+    ) -> object:
+        """
+        Records a taken item in the metrics and returns it without its stamp.
+        For subclasses with more than one underlying queue.
+        """
+        if metrics is None:
+            return item
+
+        if not isinstance(item, queue_metrics.StampedItem):
+            metrics.record_get(blocked_time, None)
+            return item
+
+        metrics.record_get(blocked_time, time.monotonic_ns() - item.enqueue_time)
+        return item.item
+
+    def get_fill_ratio(self) -> float:
+        """
+        Returns the approximate fraction of the queue that is in use,
+        0 for an infinite queue since it cannot fill.
+        """
+        if self.maxsize <= 0:
+            return 0.0
+
+        return self.queue.qsize() / self.maxsize
+
+    def close(self) -> None:
+        """
+        Stops the queue accepting items and wakes every blocked producer and consumer.
+        Consumers receive the items left before get() raises `QueueClosed`.
+        """
+        self.__closed.value = 1
+        self.__item_notifier.notify()
+        self.__space_notifier.notify()
+
+    def poison(self) -> None:
+        """
+        Closes the queue and discards the items left, so consumers stop at once.
+        """
+        self.close()
+        for lane, _, metrics in self._get_lanes():
+            discarded_count = QueueProxyWrapper.__discard_all(lane)
+            if metrics is not None:
+                metrics.record_dropped(discarded_count)
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue has been closed.
+        """
+        return self.__closed.value != 0
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -30,11 +444,14 @@ class QueueProxyWrapper:
         if timeout <= 0.0:
             timeout = self.__QUEUE_TIMEOUT
 
-        try:
-            for _ in range(self.maxsize):
-                self.queue.put(None, timeout=timeout)
-        except queue.Full:
-            return
+        for lane, maxsize, _ in self._get_lanes():
+            try:
+                for _ in range(maxsize):
+                    lane.put(None, timeout=timeout)
+            except queue.Full:
+                continue
+
+        self.__item_notifier.notify()
 
     def drain_queue(self, timeout: float = 0.0) -> None:
         """
@@ -45,16 +462,91 @@ class QueueProxyWrapper:
         if timeout <= 0.0:
             timeout = self.__QUEUE_TIMEOUT
 
-        try:
-            for _ in range(self.maxsize):
-                self.queue.get(timeout=timeout)
-        except queue.Empty:
-            return
+        for lane, maxsize, _ in self._get_lanes():
+            try:
+                for _ in range(maxsize):
+                    lane.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+        self.__space_notifier.notify()
 
     def fill_and_drain_queue(self) -> None:
         """
         Fill with sentinel and then drain.
+        Consumers waiting for an item receive a sentinel, and the queue stays usable.
+        Use poison() to stop the queue for good.
         """
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+
+class PriorityQueueProxyWrapper(QueueProxyWrapper):
+    """
+    Queue with a high priority lane for control-critical items next to the normal lane.
+
+    High priority items are always taken first, and the lane has its own capacity,
+    so a normal lane full of bulk items never blocks or delays them.
+    `queue` and `metrics` are the normal lane, the high priority lane has its own.
+
+    `maxsize <= 0` means infinite size for either lane.
+    """
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int = 0,
+        high_priority_maxsize: int = 0,
+        overflow_policy: str = "block",
+        record_metrics: bool = False,
+    ) -> None:
+        """
+        mp_manager: Manager for synchronized queues.
+        maxsize: Capacity of the normal lane.
+        high_priority_maxsize: Capacity reserved for high priority items.
+        overflow_policy: Applies to both lanes.
+        record_metrics: Whether to record metrics for both lanes.
+        """
+        super().__init__(mp_manager, maxsize, overflow_policy, record_metrics)
+        self.high_priority_queue = mp_manager.Queue(high_priority_maxsize)
+        self.high_priority_maxsize = high_priority_maxsize
+        self.high_priority_metrics = queue_metrics.QueueMetrics() if record_metrics else None
+
+    def put(
+        self,
+        item: object,
+        block: bool = True,
+        timeout: "float | None" = None,
+        high_priority: bool = False,
+    ) -> None:
+        """
+        Puts an item into one of the lanes, recording how long it waited for space.
+
+        item: Item to put.
+        block: Whether to wait for space.
+        timeout: Time waiting in seconds before raising `queue.Full`, None waits forever.
+        high_priority: Whether to put the item into the high priority lane.
+        """
+        if high_priority:
+            self._put_into(
+                self.high_priority_queue, self.high_priority_metrics, item, block, timeout
+            )
+        else:
+            self._put_into(self.queue, self.metrics, item, block, timeout)
+
+    def put_high_priority(
+        self, item: object, block: bool = True, timeout: "float | None" = None
+    ) -> None:
+        """
+        Puts an item into the high priority lane, same arguments as put().
+        """
+        self.put(item, block, timeout, True)
+
+    def _get_lanes(
+        self,
+    ) -> "list[tuple[queue.Queue, int, queue_metrics.QueueMetrics | None]]":
+        return [
+            (self.high_priority_queue, self.high_priority_maxsize, self.high_priority_metrics),
+            (self.queue, self.maxsize, self.metrics),
+        ]
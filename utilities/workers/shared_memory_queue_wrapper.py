@@ -0,0 +1,274 @@
+"""
+Shared memory queue.
+"""
+
+import multiprocessing as mp
+import pickle
+import queue
+import struct
+import time
+from multiprocessing import shared_memory
+
+from utilities.workers import queue_metrics
+from utilities.workers import queue_proxy_wrapper
+
+
+class SharedMemoryRingBuffer:  # pylint: disable=too-many-instance-attributes
+    """
+    Fixed-slot ring buffer in shared memory with a `queue.Queue`-like interface.
+    Items are pickled into slots, so no manager process is involved in a transfer.
+
+    Items of a packed type, stamped or not (see QueueProxyWrapper), are not pickled: the stamp
+    and the fixed binary layout of the item are written straight into the slot with
+    `pack_into()`, and read straight out of it with `from_buffer()`. A packed type has:
+    `PACKED_SIZE`: Size of the layout in bytes.
+    `pack_into(buffer, offset)`: Encodes the item into a writable buffer.
+    `from_buffer(buffer, offset)`: Class method decoding an item from a buffer.
+
+    Layout: header (head index, tail index) followed by `slot_count` slots,
+    each slot is a payload length and encoding followed by the payload.
+    The encoding is 0 for a pickle, otherwise the index of the packed type plus 1 .
+    """
+
+    __HEADER_FORMAT = "=QQ"
+    __HEADER_SIZE = struct.calcsize(__HEADER_FORMAT)
+    __SLOT_HEADER_FORMAT = "=IB"
+    __SLOT_HEADER_SIZE = struct.calcsize(__SLOT_HEADER_FORMAT)
+    # Enqueue time before the layout of a packed item
+    __STAMP_FORMAT = "=q"
+    __STAMP_SIZE = struct.calcsize(__STAMP_FORMAT)
+    __NO_STAMP = -1
+    __PICKLED = 0
+
+    def __init__(
+        self, slot_count: int, slot_size: int, packed_types: "tuple[type, ...]" = ()
+    ) -> None:
+        """
+        slot_count: Number of items the buffer can hold, must be greater than 0 .
+        slot_size: Maximum size of a pickled item in bytes, must be greater than 0 .
+        packed_types: Types written in their fixed binary layout instead of pickled,
+            each must fit in a slot.
+        """
+        assert slot_count > 0, "Slot count must be greater than 0"
+        assert slot_size > 0, "Slot size must be greater than 0"
+        assert len(packed_types) < 255, "Too many packed types"
+        for packed_type in packed_types:
+            assert (
+                self.__STAMP_SIZE + packed_type.PACKED_SIZE <= slot_size
+            ), f"{packed_type.__name__} does not fit in slot of {slot_size} bytes"
+
+        self.maxsize = slot_count
+        self.slot_size = slot_size
+
+        self.__packed_types = tuple(packed_types)
+        self.__encodings = {packed_type: i + 1 for i, packed_type in enumerate(packed_types)}
+        self.__stride = self.__SLOT_HEADER_SIZE + slot_size
+        self.__memory = shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + slot_count * self.__stride,
+        )
+        struct.pack_into(self.__HEADER_FORMAT, self.__memory.buf, 0, 0, 0)
+
+        self.__lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(slot_count)
+        self.__filled_slots = mp.Semaphore(0)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the buffer.
+
+        item: Any picklable object.
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds before raising `queue.Full`, None waits forever.
+        """
+        encoding, payload = self.__encode(item)
+        if encoding == self.__PICKLED and len(payload) > self.slot_size:
+            raise ValueError(
+                f"Item of {len(payload)} bytes does not fit in slot of {self.slot_size} bytes"
+            )
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        with self.__lock:
+            head, tail = struct.unpack_from(self.__HEADER_FORMAT, self.__memory.buf, 0)
+            offset = self.__slot_offset(tail)
+            start = offset + self.__SLOT_HEADER_SIZE
+            if encoding == self.__PICKLED:
+                length = len(payload)
+                self.__memory.buf[start : start + length] = payload
+            else:
+                enqueue_time = self.__NO_STAMP
+                packed_item = item
+                if isinstance(item, queue_metrics.StampedItem):
+                    enqueue_time = item.enqueue_time
+                    packed_item = item.item
+
+                length = self.__STAMP_SIZE + packed_item.PACKED_SIZE  # type: ignore
+                struct.pack_into(self.__STAMP_FORMAT, self.__memory.buf, start, enqueue_time)
+                packed_item.pack_into(self.__memory.buf, start + self.__STAMP_SIZE)  # type: ignore
+
+            struct.pack_into(self.__SLOT_HEADER_FORMAT, self.__memory.buf, offset, length, encoding)
+            struct.pack_into(self.__HEADER_FORMAT, self.__memory.buf, 0, head, tail + 1)
+
+        self.__filled_slots.release()
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the buffer.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+        """
+        if not self.__filled_slots.acquire(block, timeout):
+            raise queue.Empty
+
+        item = None
+        with self.__lock:
+            head, tail = struct.unpack_from(self.__HEADER_FORMAT, self.__memory.buf, 0)
+            offset = self.__slot_offset(head)
+            length, encoding = struct.unpack_from(
+                self.__SLOT_HEADER_FORMAT, self.__memory.buf, offset
+            )
+            start = offset + self.__SLOT_HEADER_SIZE
+            if encoding == self.__PICKLED:
+                payload = bytes(self.__memory.buf[start : start + length])
+            else:
+                # Decoded before the slot is freed, so without copying the slot first
+                (enqueue_time,) = struct.unpack_from(self.__STAMP_FORMAT, self.__memory.buf, start)
+                packed_type = self.__packed_types[encoding - 1]
+                item = packed_type.from_buffer(self.__memory.buf, start + self.__STAMP_SIZE)
+                if enqueue_time != self.__NO_STAMP:
+                    item = queue_metrics.StampedItem(enqueue_time, item)
+
+            struct.pack_into(self.__HEADER_FORMAT, self.__memory.buf, 0, head + 1, tail)
+
+        self.__free_slots.release()
+
+        if encoding == self.__PICKLED:
+            return pickle.loads(payload)
+
+        return item
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts an item without blocking.
+        """
+        self.put(item, False)
+
+    def fits(self, item: object) -> bool:
+        """
+        Returns whether the item fits in a slot, otherwise put() raises `ValueError`.
+        """
+        encoding, payload = self.__encode(item)
+        return encoding != self.__PICKLED or len(payload) <= self.slot_size
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the buffer.
+        """
+        head, tail = struct.unpack_from(self.__HEADER_FORMAT, self.__memory.buf, 0)
+        return tail - head
+
+    def empty(self) -> bool:
+        """
+        Returns whether the buffer is empty (racy, like `queue.Queue.empty()`).
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the buffer is full (racy, like `queue.Queue.full()`).
+        """
+        return self.qsize() >= self.maxsize
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory.
+        """
+        self.__memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, call once from the creating process after all workers have joined.
+        """
+        self.__memory.close()
+        self.__memory.unlink()
+
+    def __encode(self, item: object) -> "tuple[int, bytes]":
+        """
+        Returns the encoding of the item, and its pickle if it is not packed.
+        """
+        packed_item = item.item if isinstance(item, queue_metrics.StampedItem) else item
+        encoding = self.__encodings.get(type(packed_item), self.__PICKLED)
+        if encoding != self.__PICKLED:
+            return encoding, b""
+
+        return self.__PICKLED, pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __slot_offset(self, index: int) -> int:
+        return self.__HEADER_SIZE + (index % self.maxsize) * self.__stride
+
+
+class SharedMemoryQueueWrapper(queue_proxy_wrapper.QueueProxyWrapper):
+    """
+    Drop-in alternative to QueueProxyWrapper which exchanges items through shared memory
+    instead of a round trip to the SyncManager server process.
+
+    `maxsize <= 0` means the default slot count, since a ring buffer cannot be infinite.
+    Items of `packed_types` are sent in their fixed binary layout, see SharedMemoryRingBuffer.
+    """
+
+    __DEFAULT_SLOT_COUNT = 64
+    __DEFAULT_SLOT_SIZE = 4096  # bytes
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        slot_size: int = 0,
+        overflow_policy: str = "block",
+        packed_types: "tuple[type, ...]" = (),
+        record_metrics: bool = False,
+    ) -> None:
+        """
+        maxsize: Number of slots, <= 0 for the default.
+        slot_size: Maximum size of a pickled item in bytes, <= 0 for the default.
+        overflow_policy: What put() does with a full queue, see QueueProxyWrapper.
+        packed_types: Types sent in their fixed binary layout instead of pickled.
+        record_metrics: Whether to record metrics, see QueueProxyWrapper.
+        """
+        if maxsize <= 0:
+            maxsize = self.__DEFAULT_SLOT_COUNT
+
+        if slot_size <= 0:
+            slot_size = self.__DEFAULT_SLOT_SIZE
+
+        self.__slot_size = slot_size
+        self.__packed_types = packed_types
+        super().__init__(None, maxsize, overflow_policy, record_metrics)
+
+    def _create_queue(
+        self, mp_manager: "mp.managers.SyncManager | None", maxsize: int
+    ) -> SharedMemoryRingBuffer:
+        return SharedMemoryRingBuffer(maxsize, self.__slot_size, self.__packed_types)
+
+    def fits(self, item: object) -> bool:
+        """
+        Returns whether put() can send the item, which must fit in a slot once stamped.
+        """
+        if self.metrics is None:
+            return self.queue.fits(item)
+
+        return self.queue.fits(queue_metrics.StampedItem(time.monotonic_ns(), item))
+
+    def release(self) -> None:
+        """
+        Frees the shared memory. Call from main after the workers have been joined.
+        """
+        self.queue.unlink()
@@ -0,0 +1,147 @@
+"""
+For scaling the number of workers with load.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class WorkerAutoscaler:  # pylint: disable=too-many-instance-attributes
+    """
+    Adds workers to a stage when its input queues are filling up,
+    and retires them again once the queues are mostly empty.
+
+    The gap between the two thresholds and the cooldown between changes provide hysteresis,
+    so the worker count does not oscillate on bursty input.
+    Retired workers claim an exit request from the stage's controller,
+    so the stage must not share its WorkerController with other stages.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        manager: worker_manager.WorkerManager,
+        min_count: int,
+        max_count: int,
+        scale_up_ratio: float,
+        scale_down_ratio: float,
+        cooldown: float,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerAutoscaler | None]":
+        """
+        Creates an autoscaler.
+
+        manager: Manager of the stage to scale, must have bounded input queues.
+        min_count: Minimum number of workers, must be greater than 0 .
+        max_count: Maximum number of workers.
+        scale_up_ratio: Add a worker when the fullest input queue is at least this full.
+        scale_down_ratio: Retire a worker when the fullest input queue is at most this full.
+        cooldown: Minimum time in seconds between changes.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerAutoscaler object.
+        """
+        if min_count <= 0 or max_count < min_count:
+            local_logger.error(f"Invalid worker range: {min_count} to {max_count}", True)
+            return False, None
+
+        if not 0.0 <= scale_down_ratio < scale_up_ratio <= 1.0:
+            local_logger.error(
+                f"Scale down ratio {scale_down_ratio} must be below scale up ratio {scale_up_ratio}",
+                True,
+            )
+            return False, None
+
+        if len(manager.get_worker_properties().get_input_queues()) == 0:
+            local_logger.error("Cannot autoscale a stage without input queues", True)
+            return False, None
+
+        return True, WorkerAutoscaler(
+            cls.__create_key,
+            manager,
+            min_count,
+            max_count,
+            scale_up_ratio,
+            scale_down_ratio,
+            cooldown,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        manager: worker_manager.WorkerManager,
+        min_count: int,
+        max_count: int,
+        scale_up_ratio: float,
+        scale_down_ratio: float,
+        cooldown: float,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerAutoscaler.__create_key, "Use create() method"
+
+        self.__manager = manager
+        self.__min_count = min_count
+        self.__max_count = max_count
+        self.__scale_up_ratio = scale_up_ratio
+        self.__scale_down_ratio = scale_down_ratio
+        self.__cooldown = cooldown
+        self.__local_logger = local_logger
+
+        self.__last_change_time = float("-inf")
+        # Count after the last change, unlike the manager's count it excludes retiring workers
+        self.__target_count = manager.get_worker_count()
+
+    def run(self, now: "float | None" = None) -> int:
+        """
+        Checks the input queues and adds or retires at most one worker.
+        Call periodically from main.
+
+        now: Monotonic time in seconds, defaults to the current time.
+
+        Returns the change in worker count (-1, 0, or 1).
+        """
+        if now is None:
+            now = time.monotonic()
+
+        self.__manager.remove_retired_workers()
+
+        if now - self.__last_change_time < self.__cooldown:
+            return 0
+
+        fill_ratio = max(
+            input_queue.get_fill_ratio()
+            for input_queue in self.__manager.get_worker_properties().get_input_queues()
+        )
+        target_name = self.__manager.get_worker_properties().get_target_name()
+
+        if fill_ratio >= self.__scale_up_ratio and self.__target_count < self.__max_count:
+            if not self.__manager.add_worker():
+                return 0
+
+            self.__target_count += 1
+            self.__last_change_time = now
+            self.__local_logger.info(
+                f"Scaled {target_name} up to {self.__target_count}, queue {fill_ratio:.0%} full",
+                True,
+            )
+            return 1
+
+        if fill_ratio <= self.__scale_down_ratio and self.__target_count > self.__min_count:
+            self.__manager.retire_worker()
+            self.__target_count -= 1
+            self.__last_change_time = now
+            self.__local_logger.info(
+                f"Scaled {target_name} down to {self.__target_count}, queue {fill_ratio:.0%} full",
+                True,
+            )
+            return -1
+
+        return 0
@@ -3,65 +3,84 @@ For controlling workers.
 """
 
 import multiprocessing as mp
-import time
+import multiprocessing.connection
 
 
-class WorkerController:
+class WorkerController:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
-    """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    The requests are flags in shared memory, so the per-iteration checks in a worker loop
+    are a single memory read. Workers that block waiting wait on a pipe that is readable
+    while the request is active. Unlike an Event, a pipe is not left in a broken state
+    when a waiting worker is killed, so main can still request exit after a crash.
+    """
 
     def __init__(self) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Constructor creates shared flags and pipes.
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        # Written by main only, so no lock is needed
+        self.__exit_flag = mp.RawValue("b", 0)
+        self.__pause_flag = mp.RawValue("b", 0)
+        # Readable while exit is requested, workers only wait and never read
+        self.__exit_receiver, self.__exit_sender = mp.Pipe(duplex=False)
+        # Readable while not paused
+        self.__resume_receiver, self.__resume_sender = mp.Pipe(duplex=False)
+        self.__resume_sender.send_bytes(b"")
+        # Number of workers asked to exit early, each worker claims at most one
+        self.__retire_count = mp.RawValue("i", 0)
+        self.__retire_lock = mp.Lock()
 
     def request_pause(self) -> None:
         """
         Requests worker processes to pause.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        if self.__pause_flag.value:
+            return
+
+        self.__pause_flag.value = 1
+        WorkerController.__drain(self.__resume_receiver)
 
     def request_resume(self) -> None:
         """
         Requests worker processes to resume.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        if not self.__pause_flag.value:
+            return
+
+        self.__pause_flag.value = 0
+        self.__resume_sender.send_bytes(b"")
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        if self.__pause_flag.value:
+            multiprocessing.connection.wait([self.__resume_receiver])
 
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        if self.__exit_flag.value:
+            return
+
+        self.__exit_flag.value = 1
+        self.__exit_sender.send_bytes(b"")
 
     def clear_exit(self) -> None:
         """
         Clears the exit request condition.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        if not self.__exit_flag.value:
+            return
+
+        WorkerController.__drain(self.__exit_receiver)
+        self.__exit_flag.value = 0
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +88,46 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        if self.__exit_flag.value != 0:
+            return True
+
+        # Fast path, only lock if a retirement is pending
+        if self.__retire_count.value == 0:
+            return False
+
+        return self.__claim_retirement()
+
+    def request_retire(self) -> None:
+        """
+        Requests a single worker process to exit, whichever checks first.
+        Every worker sharing this controller may claim it, so a stage that is scaled
+        should have its own controller.
+        """
+        with self.__retire_lock:
+            self.__retire_count.value += 1
+
+    def __claim_retirement(self) -> bool:
+        with self.__retire_lock:
+            if self.__retire_count.value == 0:
+                return False
+
+            self.__retire_count.value -= 1
+            return True
+
+    def wait_for_exit(self, timeout: "float | None" = None) -> bool:
+        """
+        Blocks until main requests exit or the timeout passes, for workers with nothing to do.
+
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether exit was requested.
+        """
+        return len(multiprocessing.connection.wait([self.__exit_receiver], timeout)) > 0
+
+    @staticmethod
+    def __drain(receiver: "multiprocessing.connection.Connection") -> None:
+        """
+        Reads everything from the pipe so it is no longer readable.
+        """
+        while receiver.poll():
+            receiver.recv_bytes()
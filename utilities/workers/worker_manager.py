@@ -3,6 +3,7 @@ For managing workers.
 """
 
 import multiprocessing as mp
+import threading
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
@@ -26,6 +27,7 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        work_keyword_arguments: "dict | None" = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +39,7 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        work_keyword_arguments: Keyword arguments for worker internals after the controller.
 
         Returns the WorkerProperties object.
         """
@@ -55,6 +58,7 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            work_keyword_arguments if work_keyword_arguments is not None else {},
         )
 
     def __init__(
@@ -66,6 +70,7 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        work_keyword_arguments: "dict",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,6 +83,7 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__work_keyword_arguments = work_keyword_arguments
 
     def get_worker_arguments(self) -> "tuple":
         """
@@ -92,6 +98,12 @@ class WorkerProperties:
             + (self.__controller,)
         )
 
+    def get_worker_keyword_arguments(self) -> "dict":
+        """
+        Returns the keyword arguments of the worker.
+        """
+        return self.__work_keyword_arguments
+
     def get_worker_count(self) -> int:
         """
         Returns the worker count.
@@ -110,6 +122,18 @@ class WorkerProperties:
         """
         return self.__input_queues
 
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues.
+        """
+        return self.__output_queues
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+        """
+        return self.__controller
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -144,6 +168,7 @@ class WorkerManager:
             result, worker = WorkerManager.__create_single_worker(
                 worker_properties.get_worker_target(),
                 worker_properties.get_worker_arguments(),
+                worker_properties.get_worker_keyword_arguments(),
                 local_logger,
             )
             if not result:
@@ -174,20 +199,25 @@ class WorkerManager:
         self.__workers = workers
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
+        # Workers asked to exit by retire_worker() that have not exited yet
+        self.__pending_retirements = 0
+        # The worker list is changed by main and by the supervisor thread
+        self.__lock = threading.RLock()
 
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_single_worker(target: "(...) -> object", args: "tuple", kwargs: "dict", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
         """
         Creates a single worker.
 
         target: Function.
         args: Target function arguments.
+        kwargs: Target function keyword arguments.
         local_logger: Existing logger from process.
 
         Returns whether a worker was created and the worker.
         """
         try:
-            worker = mp.Process(target=target, args=args)
+            worker = mp.Process(target=target, args=args, kwargs=kwargs)
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -200,26 +230,132 @@ class WorkerManager:
         """
         Start workers.
         """
-        for worker in self.__workers:
-            worker.start()
+        with self.__lock:
+            for worker in self.__workers:
+                worker.start()
 
     def join_workers(self) -> None:
         """
         Join workers.
         """
-        for worker in self.__workers:
+        for worker in self.get_workers():
             worker.join()
 
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers, including those asked to retire that have not exited yet.
+        """
+        return len(self.__workers)
+
+    def get_workers(self) -> "list[mp.Process]":
+        """
+        Returns a copy of the list of workers.
+        """
+        with self.__lock:
+            return list(self.__workers)
+
+    def get_worker_properties(self) -> WorkerProperties:
+        """
+        Returns the worker properties.
+        """
+        return self.__worker_properties
+
+    def add_worker(self) -> bool:
+        """
+        Creates and starts one more worker.
+
+        Returns whether the worker was started.
+        """
+        result, worker = WorkerManager.__create_single_worker(
+            self.__worker_properties.get_worker_target(),
+            self.__worker_properties.get_worker_arguments(),
+            self.__worker_properties.get_worker_keyword_arguments(),
+            self.__local_logger,
+        )
+        if not result:
+            self.__local_logger.error("Failed to add worker", True)
+            return False
+
+        # Get Pylance to stop complaining
+        assert worker is not None
+
+        with self.__lock:
+            worker.start()
+            self.__workers.append(worker)
+
+        return True
+
+    def retire_worker(self) -> None:
+        """
+        Asks one worker to exit once it finishes its current iteration.
+        The worker is removed from the manager once it has exited.
+        """
+        with self.__lock:
+            self.__pending_retirements += 1
+            self.__worker_properties.get_controller().request_retire()
+
+    def remove_retired_workers(self) -> None:
+        """
+        Removes workers which exited after retire_worker(), so they are not restarted.
+        """
+        with self.__lock:
+            if self.__pending_retirements == 0:
+                return
+
+            remaining_workers = []
+            for worker in self.__workers:
+                if self.__pending_retirements > 0 and worker.exitcode == 0:
+                    worker.join()
+                    self.__pending_retirements -= 1
+                    continue
+
+                remaining_workers.append(worker)
+
+            self.__workers = remaining_workers
+
+    def restart_worker(self, worker: mp.Process) -> bool:
+        """
+        Replaces a dead worker with a new started one.
+
+        worker: Dead worker of this manager.
+
+        Returns whether the worker was restarted.
+        """
+        target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+
+        result, new_worker = WorkerManager.__create_single_worker(
+            self.__worker_properties.get_worker_target(),
+            self.__worker_properties.get_worker_arguments(),
+            self.__worker_properties.get_worker_keyword_arguments(),
+            self.__local_logger,
+        )
+        if not result:
+            self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+            return False
+
+        # Get Pylance to stop complaining
+        assert new_worker is not None
+
+        with self.__lock:
+            if worker not in self.__workers:
+                self.__local_logger.error(f"{target_and_worker_name} is not managed", True)
+                return False
+
+            new_worker.start()
+            self.__workers[self.__workers.index(worker)] = new_worker
+
+        return True
+
     def check_and_restart_dead_workers(self) -> bool:
         """
         Check and restart dead workers.
 
         Returns whether the dead workers were able to be restarted.
         """
-        new_workers = []
-        for worker in self.__workers:
+        self.remove_retired_workers()
+
+        for worker in self.get_workers():
             if worker.is_alive():
-                new_workers.append(worker)
                 continue
 
             # Log dead worker
@@ -229,19 +365,7 @@ class WorkerManager:
                 True,
             )
 
-            # Create a new worker
-            result, new_worker = WorkerManager.__create_single_worker(
-                self.__worker_properties.get_worker_target(),
-                self.__worker_properties.get_worker_arguments(),
-                self.__local_logger,
-            )
-            if not result:
-                self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+            if not self.restart_worker(worker):
                 return False
 
-            # Append the new worker
-            new_workers.append(new_worker)
-
-        self.__workers = new_workers
-
         return True
@@ -0,0 +1,228 @@
+"""
+For restarting workers that crash.
+"""
+
+import collections
+import multiprocessing as mp
+import multiprocessing.connection
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class WorkerSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Watches worker process sentinels from a background thread in main
+    and restarts workers as soon as they die.
+
+    Repeated crashes of a stage are delayed with exponential backoff.
+    A stage crashing more than `max_crashes` times within `crash_window` seconds is in a
+    crash loop and is no longer restarted.
+
+    Stop the supervisor before requesting workers to exit, otherwise it restarts them.
+    """
+
+    __create_key = object()
+    __POLL_PERIOD = 0.5  # seconds, to pick up workers added by the autoscaler
+
+    @classmethod
+    def create(
+        cls,
+        managers: "list[worker_manager.WorkerManager]",
+        base_delay: float,
+        max_delay: float,
+        max_crashes: int,
+        crash_window: float,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerSupervisor | None]":
+        """
+        Creates a supervisor.
+
+        managers: Worker managers to supervise.
+        base_delay: Seconds before restarting after the first crash in the window, can be 0 .
+        max_delay: Upper limit of the backoff in seconds.
+        max_crashes: Crashes allowed within the window before giving up on the stage.
+        crash_window: Seconds a crash counts towards backoff and crash loop detection.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerSupervisor object.
+        """
+        if base_delay < 0 or max_delay < base_delay or max_crashes <= 0 or crash_window <= 0:
+            local_logger.error("Invalid supervisor backoff settings", True)
+            return False, None
+
+        return True, WorkerSupervisor(
+            cls.__create_key,
+            managers,
+            base_delay,
+            max_delay,
+            max_crashes,
+            crash_window,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        managers: "list[worker_manager.WorkerManager]",
+        base_delay: float,
+        max_delay: float,
+        max_crashes: int,
+        crash_window: float,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerSupervisor.__create_key, "Use create() method"
+
+        self.__managers = managers
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__max_crashes = max_crashes
+        self.__crash_window = crash_window
+        self.__local_logger = local_logger
+
+        # Stage name to monotonic times of recent crashes
+        self.__crash_times: "dict[str, collections.deque[float]]" = {}
+        self.__failed_stages: "set[str]" = set()
+        # (restart time, detection time, manager, dead worker)
+        self.__pending_restarts: (
+            "list[tuple[float, float, worker_manager.WorkerManager, mp.Process]]"
+        ) = []
+
+        self.restart_counts: "dict[str, int]" = {}
+        self.recovery_times: "dict[str, list[float]]" = {}  # seconds
+
+        self.__wake_receiver, self.__wake_sender = mp.Pipe(duplex=False)
+        self.__stop_event = threading.Event()
+        self.__thread: "threading.Thread | None" = None
+
+    def start(self) -> None:
+        """
+        Starts supervising in a background thread. Call after the workers have started.
+        """
+        if self.__thread is not None:
+            return
+
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__run, name="worker_supervisor", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops supervising and waits for the thread to finish.
+        """
+        if self.__thread is None:
+            return
+
+        self.__stop_event.set()
+        self.__wake_sender.send(None)
+        self.__thread.join()
+        self.__thread = None
+
+        # Discard the wake up message if the thread did not read it
+        while self.__wake_receiver.poll():
+            self.__wake_receiver.recv()
+
+    def is_stage_failed(self, manager: worker_manager.WorkerManager) -> bool:
+        """
+        Returns whether the stage was given up on because of a crash loop.
+        """
+        return manager.get_worker_properties().get_target_name() in self.__failed_stages
+
+    def __run(self) -> None:
+        while not self.__stop_event.is_set():
+            self.__restart_due_workers()
+
+            sentinels = self.__get_live_sentinels()
+            timeout = self.__POLL_PERIOD
+            if len(self.__pending_restarts) > 0:
+                next_restart = min(restart[0] for restart in self.__pending_restarts)
+                timeout = min(timeout, max(next_restart - time.monotonic(), 0.0))
+
+            # Sleeps until a worker exits, a restart is due, or stop() is called
+            ready = multiprocessing.connection.wait(
+                list(sentinels.keys()) + [self.__wake_receiver], timeout
+            )
+
+            now = time.monotonic()
+            for sentinel in ready:
+                if sentinel in sentinels:
+                    manager, worker = sentinels[sentinel]
+                    self.__on_worker_exit(manager, worker, now)
+
+    def __get_live_sentinels(
+        self,
+    ) -> "dict[int, tuple[worker_manager.WorkerManager, mp.Process]]":
+        pending_workers = {id(restart[3]) for restart in self.__pending_restarts}
+        sentinels = {}
+        for manager in self.__managers:
+            manager.remove_retired_workers()
+            for worker in manager.get_workers():
+                if id(worker) in pending_workers:
+                    continue
+
+                try:
+                    sentinels[worker.sentinel] = (manager, worker)
+                # Not started yet
+                except ValueError:
+                    continue
+
+        return sentinels
+
+    def __on_worker_exit(
+        self, manager: worker_manager.WorkerManager, worker: mp.Process, now: float
+    ) -> None:
+        # A retired worker exits normally and is not restarted
+        worker.join()
+        manager.remove_retired_workers()
+        if worker not in manager.get_workers():
+            return
+
+        stage = manager.get_worker_properties().get_target_name()
+        if stage in self.__failed_stages:
+            return
+
+        crash_times = self.__crash_times.setdefault(stage, collections.deque())
+        crash_times.append(now)
+        while now - crash_times[0] > self.__crash_window:
+            crash_times.popleft()
+
+        if len(crash_times) > self.__max_crashes:
+            self.__failed_stages.add(stage)
+            self.__local_logger.critical(
+                f"{stage} crashed {len(crash_times)} times in {self.__crash_window} s, not restarting",
+                True,
+            )
+            return
+
+        delay = min(self.__base_delay * 2 ** (len(crash_times) - 1), self.__max_delay)
+        self.__local_logger.warning(
+            f"Worker died ({stage} {worker.name}, exit code {worker.exitcode}), restarting in {delay} s",
+            True,
+        )
+        self.__pending_restarts.append((now + delay, now, manager, worker))
+
+    def __restart_due_workers(self) -> None:
+        now = time.monotonic()
+        still_pending = []
+        for restart in self.__pending_restarts:
+            restart_time, detection_time, manager, worker = restart
+            if restart_time > now:
+                still_pending.append(restart)
+                continue
+
+            if not manager.restart_worker(worker):
+                continue
+
+            stage = manager.get_worker_properties().get_target_name()
+            self.restart_counts[stage] = self.restart_counts.get(stage, 0) + 1
+            self.recovery_times.setdefault(stage, []).append(time.monotonic() - detection_time)
+
+        self.__pending_restarts = still_pending
+
+    def __str__(self) -> str:
+        return f"Restarts: {self.restart_counts}, recovery times (s): {self.recovery_times}"